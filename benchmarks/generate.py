@@ -0,0 +1,118 @@
+"""
+Deterministic synthetic repositories for the benchmarks.
+
+The same RepoShape (including its seed) always produces byte-identical
+trees, so timings from different runs and machines are comparable.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List
+
+MARKER = ".bench-shape.json"
+
+# Directories vibemark excludes by default; files here must never be read.
+EXCLUDED_DIRS = [".venv", "build", "__pycache__"]
+
+
+@dataclass(frozen=True)
+class RepoShape:
+    files: int = 1000
+    # Maximum directory depth below the root.
+    depth: int = 4
+    # Source files per directory, on average.
+    files_per_dir: int = 20
+    # LOC per file follows a log-normal distribution with this median.
+    median_loc: int = 120
+    loc_sigma: float = 1.0
+    max_loc: int = 5000
+    # Extra files under default-excluded directories, as a fraction of files.
+    excluded_fraction: float = 0.2
+    # A few pathological files, each huge_loc lines long.
+    huge_files: int = 2
+    huge_loc: int = 200_000
+    seed: int = 1234
+
+    def key(self) -> str:
+        data = json.dumps(asdict(self), sort_keys=True).encode("utf-8")
+        return hashlib.sha1(data).hexdigest()[:12]
+
+
+def _dir_paths(rng: random.Random, shape: RepoShape) -> List[str]:
+    count = max(1, math.ceil(shape.files / shape.files_per_dir))
+    dirs = [""]
+    while len(dirs) < count:
+        parent = rng.choice(dirs)
+        if parent.count("/") + 1 >= shape.depth and parent:
+            continue
+        name = f"pkg{len(dirs)}"
+        dirs.append(f"{parent}/{name}" if parent else name)
+    return dirs
+
+
+def _body(rng: random.Random, loc: int) -> str:
+    lines = []
+    for i in range(loc):
+        roll = rng.random()
+        if roll < 0.12:
+            lines.append("")
+        elif roll < 0.2:
+            lines.append(f"    # comment {i}")
+        elif roll < 0.22:
+            lines.append("x = '" + "y" * 300 + "'")
+        else:
+            lines.append(f"    value_{i} = compute({i}, {rng.randrange(1000)})")
+    return "\n".join(lines) + "\n"
+
+
+def generate(root: Path, shape: RepoShape) -> Path:
+    """
+    Build the repo for shape under root/<shape key> (reused when it already
+    exists) and return its path.
+    """
+    target = root / f"repo-{shape.files}-{shape.key()}"
+    marker = target / MARKER
+    if marker.exists():
+        return target
+    if target.exists():
+        shutil.rmtree(target)
+    rng = random.Random(shape.seed)
+    dirs = _dir_paths(rng, shape)
+    mu = math.log(max(shape.median_loc, 1))
+
+    def write(rel: str, loc: int) -> None:
+        path = target / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(_body(rng, loc), encoding="utf-8")
+
+    for i in range(shape.files):
+        if i < shape.huge_files:
+            loc = shape.huge_loc
+        else:
+            loc = min(shape.max_loc, max(1, int(rng.lognormvariate(mu, shape.loc_sigma))))
+        directory = rng.choice(dirs)
+        name = f"mod{i}.py"
+        write(f"{directory}/{name}" if directory else name, loc)
+    for i in range(int(shape.files * shape.excluded_fraction)):
+        write(f"{rng.choice(EXCLUDED_DIRS)}/lib{i % 7}/dep{i}.py", 50)
+    marker.write_text(json.dumps(asdict(shape), sort_keys=True), encoding="utf-8")
+    return target
+
+
+def source_files(repo: Path) -> List[Path]:
+    """
+    The generated source files outside excluded directories, sorted.
+    """
+    out = []
+    for dirpath, dirnames, filenames in os.walk(repo):
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+        out.extend(Path(dirpath) / f for f in sorted(filenames) if f.endswith(".py"))
+    return out
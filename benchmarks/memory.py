@@ -0,0 +1,119 @@
+"""
+Bytes per file held by the loaded state, by in-memory layout.
+
+    python -m benchmarks.memory --files 100000
+
+Each layout is built from the same JSON state text; the report is the
+memory still allocated once the parsed payload is gone (retained) and the
+high-water mark while loading (peak), both per file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from vibemark.cli import coerce_int, files_from_payload  # noqa: E402
+from vibemark.filetable import FileProgress  # noqa: E402
+from vibemark.ranges import LineRanges  # noqa: E402
+
+
+@dataclass
+class DictFileProgress:
+    """
+    FileProgress as it was before it got __slots__: one __dict__ per file.
+    """
+
+    path: str
+    total_loc: int
+    read_loc: int
+    mtime_ns: int
+    size: int = 0
+    blob: str = ""
+    lines: Optional[array] = None
+    ranges: Optional[LineRanges] = None
+
+
+def state_text(files: int, seed: int) -> str:
+    rng = random.Random(seed)
+    entries = {}
+    for i in range(files):
+        total = rng.randrange(1, 2000)
+        entries[f"src/pkg{i % 500}/sub{i % 37}/module_{i}.py"] = {
+            "total_loc": total,
+            "read_loc": rng.choice((0, 0, total, rng.randrange(total + 1))),
+            "mtime_ns": 1_700_000_000_000_000_000 + rng.randrange(10**15),
+            "size": total * rng.randrange(20, 60),
+        }
+    return json.dumps({"version": 1, "files": entries})
+
+
+def load_objects(cls: type, raw: Dict[str, object]) -> Dict[str, object]:
+    files = raw["files"]
+    assert isinstance(files, dict)
+    return {
+        rel: cls(
+            rel,
+            coerce_int(meta.get("total_loc", 0)),
+            coerce_int(meta.get("read_loc", 0)),
+            coerce_int(meta.get("mtime_ns", 0)),
+            coerce_int(meta.get("size", 0)),
+        )
+        for rel, meta in files.items()
+    }
+
+
+LAYOUTS: Dict[str, Callable[[Dict[str, object]], object]] = {
+    "dataclass": lambda raw: load_objects(DictFileProgress, raw),
+    "slots": lambda raw: load_objects(FileProgress, raw),
+    "table": files_from_payload,
+}
+
+
+def measure(text: str, build: Callable[[Dict[str, object]], object]) -> Dict[str, int]:
+    gc.collect()
+    tracemalloc.start()
+    state = build(json.loads(text))
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del state
+    return {"retained": retained, "peak": peak}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    text = state_text(args.files, args.seed)
+    results = {}
+    for name, build in LAYOUTS.items():
+        usage = measure(text, build)
+        results[name] = {k: round(v / args.files, 1) for k, v in usage.items()}
+        print(
+            f"{name:<10} retained {results[name]['retained']:>8.1f} B/file"
+            f"  peak {results[name]['peak']:>8.1f} B/file"
+        )
+    if args.output:
+        report = {"files": args.files, "bytes_per_file": results}
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
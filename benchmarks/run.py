@@ -0,0 +1,184 @@
+"""
+Time vibemark on synthetic repositories and compare against a baseline.
+
+    python -m benchmarks.run --sizes 1000,10000 --output results.json
+    python -m benchmarks.run --baseline results.json --tolerance 0.25
+
+Scenarios per size: cold scan, update with no changes, update after
+touching 1% of the files, stats, and marking one file done. Each is the
+best of --repeat runs, in seconds. Run from the repository root.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from typer.testing import CliRunner
+
+from benchmarks.generate import RepoShape, generate, source_files
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from vibemark.cli import JOURNAL_FILENAME, LOCK_FILENAME, STATE_FILENAME, app  # noqa: E402
+from vibemark.sqlite_state import DB_FILENAME  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10_000, 100_000]
+# Differences below this many seconds are noise, whatever the tolerance.
+MIN_REGRESSION_SECONDS = 0.005
+
+runner = CliRunner()
+
+
+def _invoke(args: List[str]) -> None:
+    result = runner.invoke(app, args, input="n\n")
+    if result.exit_code != 0:
+        raise RuntimeError(f"vibemark {' '.join(args)} failed:\n{result.output}")
+
+
+def _best(repeat: int, setup: Callable[[], None], fn: Callable[[], None]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _clear_state(repo: Path) -> None:
+    for name in (STATE_FILENAME, JOURNAL_FILENAME, LOCK_FILENAME, DB_FILENAME):
+        (repo / name).unlink(missing_ok=True)
+
+
+def _touch_some(files: List[Path], fraction: float, rng: random.Random) -> None:
+    for path in rng.sample(files, max(1, int(len(files) * fraction))):
+        with path.open("a", encoding="utf-8") as f:
+            f.write("touched = True\n")
+        st = path.stat()
+        # Make sure the mtime moves even on coarse-grained filesystems.
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def run_size(workdir: Path, shape: RepoShape, repeat: int) -> Dict[str, float]:
+    repo = generate(workdir, shape)
+    root = ["--root", str(repo)]
+    files = source_files(repo)
+    rng = random.Random(shape.seed)
+    done_target = files[len(files) // 2].relative_to(repo).as_posix()
+
+    def nothing() -> None:
+        pass
+
+    results: Dict[str, float] = {}
+    results["scan"] = _best(
+        repeat, lambda: _clear_state(repo), lambda: _invoke(["scan", *root])
+    )
+    update = ["update", "--reset-changed", "no", *root]
+    results["update_nochange"] = _best(repeat, nothing, lambda: _invoke(update))
+    results["update_1pct"] = _best(
+        repeat, lambda: _touch_some(files, 0.01, rng), lambda: _invoke(update)
+    )
+    results["stats"] = _best(repeat, nothing, lambda: _invoke(["stats", *root]))
+    results["done"] = _best(
+        repeat, nothing, lambda: _invoke(["done", done_target, *root])
+    )
+    # Leave the generated tree reusable for the next run.
+    _clear_state(repo)
+    return results
+
+
+def compare(
+    current: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Scenarios slower than baseline * (1 + tolerance), as messages.
+    """
+    regressions = []
+    for size, scenarios in current.items():
+        for name, seconds in scenarios.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            if seconds > base * (1 + tolerance) and seconds - base > MIN_REGRESSION_SECONDS:
+                regressions.append(
+                    f"{name} @ {size} files: {seconds:.4f}s vs baseline {base:.4f}s"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Comma-separated file counts",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario")
+    parser.add_argument("--depth", type=int, default=RepoShape.depth)
+    parser.add_argument("--median-loc", type=int, default=RepoShape.median_loc)
+    parser.add_argument("--huge-files", type=int, default=RepoShape.huge_files)
+    parser.add_argument("--seed", type=int, default=RepoShape.seed)
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path(".bench-repos"),
+        help="Where generated repos are kept and reused",
+    )
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="Results JSON to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown against the baseline, as a fraction",
+    )
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, float]] = {}
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        shape = RepoShape(
+            files=size,
+            depth=args.depth,
+            median_loc=args.median_loc,
+            huge_files=min(args.huge_files, size),
+            seed=args.seed,
+        )
+        results[str(size)] = run_size(args.workdir, shape, args.repeat)
+        timings = "  ".join(f"{k}={v:.4f}s" for k, v in results[str(size)].items())
+        print(f"{size:>7} files  {timings}", flush=True)
+
+    report = {
+        "version": 1,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
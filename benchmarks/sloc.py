@@ -0,0 +1,212 @@
+"""
+Throughput of --loc-mode sloc per language, against physical counting.
+
+    python -m benchmarks.sloc --files 200 --lines 400
+
+For each language a deterministic set of source files is counted the way
+a scan reads them, with count_all, once without and once with sloc; best
+of --repeat runs. Lines are drawn from plain code, comments, strings
+holding comment markers (or block comments, or docstrings), code with a
+trailing comment and blank lines, weighted like typical source
+(--weights); sloc time grows with the share of lines that hold a string
+or comment.
+
+sloc scanning runs on Python's regex engine, so it stays several times
+slower than physical counting. The run exits with status 1 when any
+language is more than --max-slowdown times slower.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from vibemark.loc import count_all  # noqa: E402
+
+Line = Callable[[int], List[str]]
+
+# plain code, comment, string/block comment/docstring, trailing comment, blank
+WEIGHTS = (60, 10, 8, 7, 15)
+
+# sloc against physical counting, above which a run fails: just over the
+# 3.5-4.5x these files measure, so a regression shows.
+MAX_SLOWDOWN = 5.0
+
+
+def _python(i: int) -> List[str]:
+    return [
+        f"    value_{i} = compute({i}, other.attr) + [item.size for item in rows]",
+        f"    # comment {i}",
+        f'    """Docstring {i}."""' if i % 2 else f"    key = '# not a comment {i}'",
+        f"    total += item.size  # trailing {i}",
+        "",
+    ]
+
+
+def _c_like(i: int) -> List[str]:
+    return [
+        f"    int value_{i} = compute({i}, other->attr) + rows[item].size;",
+        f"    // comment {i}",
+        f"    /* block {i}\n     * continues\n     */"
+        if i % 2
+        else f'    const char *key = "/* not a comment {i} */";',
+        f"    total += item.size; /* trailing {i} */",
+        "",
+    ]
+
+
+def _javascript(i: int) -> List[str]:
+    return [
+        f"  const value{i} = compute({i}, other.attr) + rows[item].size;",
+        f"  // comment {i}",
+        f"  const t{i} = `template\n  // still a string ${{x}}`;"
+        if i % 2
+        else f"  const key = '// not a comment {i}';",
+        f"  total += item.size; /* trailing {i} */",
+        "",
+    ]
+
+
+def _go(i: int) -> List[str]:
+    return [
+        f"\tvalue{i} := compute({i}, other.Attr) + rows[item].Size",
+        f"\t// comment {i}",
+        f"\traw{i} := `raw\n/* still a string */`"
+        if i % 2
+        else f'\tkey := "// not a comment {i}"',
+        f"\ttotal += item.Size /* trailing {i} */",
+        "",
+    ]
+
+
+def _rust(i: int) -> List[str]:
+    return [
+        f"    let value_{i} = compute({i}, other.attr) + rows[item].size;",
+        f"    // comment {i}",
+        f'    let key = r#"// not a comment {i}"#;'
+        if i % 2
+        else f"    fn f{i}<'a>(x: &'a str) -> &'a str {{ x }}",
+        f"    total += item.size; /* trailing {i} */",
+        "",
+    ]
+
+
+def _shell(i: int) -> List[str]:
+    return [
+        f"value_{i}=$(compute {i} --other attr | sort -u)",
+        f"# comment {i}",
+        f'key="# not a comment {i}"' if i % 2 else f"echo $# ${{#args}} {i}",
+        f"total=$((total + {i}))  # trailing",
+        "",
+    ]
+
+
+LANGUAGES: Dict[str, tuple] = {
+    "python": ("py", _python),
+    "c": ("c", _c_like),
+    "javascript": ("ts", _javascript),
+    "go": ("go", _go),
+    "rust": ("rs", _rust),
+    "shell": ("sh", _shell),
+}
+
+
+def write_sources(
+    root: Path,
+    ext: str,
+    line: Line,
+    files: int,
+    lines: int,
+    seed: int,
+    weights: Sequence[int] = WEIGHTS,
+) -> List[Path]:
+    rng = random.Random(seed)
+    paths = []
+    for n in range(files):
+        path = root / f"file{n}.{ext}"
+        text = "\n".join(
+            rng.choices(line(i), weights=weights)[0] for i in range(lines)
+        )
+        path.write_text(text + "\n", encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def best_time(paths: List[Path], sloc: bool, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            count_all(path, sloc=sloc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200, help="Files per language")
+    parser.add_argument("--lines", type=int, default=400, help="Lines per file")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument(
+        "--weights",
+        default=",".join(map(str, WEIGHTS)),
+        help="Weights of code,comment,string,trailing,blank lines",
+    )
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=MAX_SLOWDOWN,
+        help="Fail when sloc is more than this many times slower",
+    )
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    args = parser.parse_args(argv)
+    weights = [int(w) for w in args.weights.split(",")]
+    if len(weights) != len(WEIGHTS):
+        parser.error(f"--weights needs {len(WEIGHTS)} values")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for language, (ext, line) in LANGUAGES.items():
+            root = Path(tmp) / language
+            root.mkdir()
+            paths = write_sources(
+                root, ext, line, args.files, args.lines, args.seed, weights
+            )
+            size = sum(p.stat().st_size for p in paths)
+            physical = best_time(paths, False, args.repeat)
+            sloc = best_time(paths, True, args.repeat)
+            results[language] = {
+                "mb_per_s_physical": round(size / physical / 1e6, 1),
+                "mb_per_s_sloc": round(size / sloc / 1e6, 1),
+                "slowdown": round(sloc / physical, 2),
+            }
+            r = results[language]
+            print(
+                f"{language:<11} physical {r['mb_per_s_physical']:>7.1f} MB/s"
+                f"  sloc {r['mb_per_s_sloc']:>7.1f} MB/s  x{r['slowdown']:.2f}"
+            )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    slow = [lang for lang, r in results.items() if r["slowdown"] > args.max_slowdown]
+    for language in slow:
+        print(
+            f"REGRESSION {language}: sloc x{results[language]['slowdown']:.2f}"
+            f" > x{args.max_slowdown:.2f}",
+            file=sys.stderr,
+        )
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
-from importlib.metadata import PackageNotFoundError, version
-from pathlib import Path
-import tomllib
+import functools
+import os
 
 
 def _read_pyproject_version() -> str:
-    root = Path(__file__).resolve().parents[2]
-    pyproject = root / "pyproject.toml"
-    if not pyproject.exists():
+    import tomllib
+
+    here = os.path.dirname(os.path.realpath(__file__))
+    pyproject = os.path.join(here, os.pardir, os.pardir, "pyproject.toml")
+    if not os.path.exists(pyproject):
         return "0+unknown"
     try:
-        data = tomllib.loads(pyproject.read_text(encoding="utf-8"))
+        with open(pyproject, encoding="utf-8") as f:
+            data = tomllib.loads(f.read())
     except Exception:
         return "0+unknown"
     project = data.get("project", {})
@@ -22,11 +24,18 @@ def _read_pyproject_version() -> str:
     return "0+unknown"
 
 
+@functools.cache
 def get_version() -> str:
+    # importlib.metadata is slow to import; only pay for it when asked.
+    from importlib.metadata import PackageNotFoundError, version
+
     try:
         return version("vibemark")
     except PackageNotFoundError:
         return _read_pyproject_version()
 
 
-__version__ = get_version()
+def __getattr__(name: str) -> str:
+    if name == "__version__":
+        return get_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,3 @@
+from vibemark.client import main
+
+main()
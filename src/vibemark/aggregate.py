@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import sys
+from array import array
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from vibemark.filetable import FileProgress, FileTable
+
+# Below this many files the array-module path is done before NumPy would
+# even finish importing (~0.1s); above it, or once something else has
+# imported NumPy, the vectorized path wins.
+NUMPY_MIN_FILES = 200_000
+
+
+def load_numpy(files: int, use_numpy: Optional[bool] = None) -> Any:
+    """
+    The numpy module when it should be used for files entries, else None.
+    use_numpy forces the choice (False, or True when NumPy is installed).
+    """
+    if use_numpy is False:
+        return None
+    if use_numpy is None and files < NUMPY_MIN_FILES and "numpy" not in sys.modules:
+        return None
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class Aggregate:
+    """
+    total_loc and read_loc of a set of entries as two contiguous int64
+    columns, with totals, status counts and the remaining/done orderings
+    computed in bulk instead of by visiting one FileProgress at a time.
+
+    A FileTable's columns are used directly; other mappings are copied
+    into columns in one pass. Orderings are stable: ties keep the mapping's
+    order, exactly like sorted(..., reverse=True) and heapq.nlargest.
+    """
+
+    def __init__(
+        self, items: Mapping[str, FileProgress], use_numpy: Optional[bool] = None
+    ) -> None:
+        self.items = items
+        if isinstance(items, FileTable):
+            self.paths, total, read = items.columns()
+        else:
+            self.paths = []
+            total, read = array("q"), array("q")
+            for path, fp in items.items():
+                self.paths.append(path)
+                total.append(fp.total_loc)
+                read.append(fp.read_loc)
+        self.total: array[int] = total
+        self.read: array[int] = read
+        # With NumPy, the same columns as int64 ndarrays.
+        self.np: Any = load_numpy(len(self.paths), use_numpy)
+        self.np_total: Any = None
+        self.np_read: Any = None
+        if self.np is not None:
+            # Copies, so the table's arrays are not pinned by buffer exports
+            # and can still grow.
+            self.np_total = self.np.frombuffer(total, dtype=self.np.int64).copy()
+            self.np_read = self.np.frombuffer(read, dtype=self.np.int64).copy()
+        self._split: Optional[Tuple[Any, Any]] = None
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def totals(self) -> Tuple[int, int]:
+        """
+        (total_loc, read_loc) summed over all entries.
+        """
+        if self.np is not None:
+            return int(self.np_total.sum()), int(self.np_read.sum())
+        return sum(self.total), sum(self.read)
+
+    def status_counts(self) -> Dict[str, int]:
+        """
+        How many entries are unread, partial and done (see file_status).
+        """
+        if self.np is not None:
+            unread = self.np_read <= 0
+            done = ~unread & (self.np_read >= self.np_total)
+            counts = int(unread.sum()), int(done.sum())
+        else:
+            counts = (
+                sum(1 for r in self.read if r <= 0),
+                sum(1 for t, r in zip(self.total, self.read) if 0 < r and t <= r),
+            )
+        return {
+            "unread": counts[0],
+            "partial": len(self) - counts[0] - counts[1],
+            "done": counts[1],
+        }
+
+    def _unfinished_and_done(self) -> Tuple[Any, Any]:
+        """
+        Positions with read_loc < total_loc, and the rest, in one pass.
+        """
+        if self._split is None:
+            if self.np is not None:
+                mask = self.np_read < self.np_total
+                self._split = (
+                    self.np.flatnonzero(mask),
+                    self.np.flatnonzero(~mask),
+                )
+            else:
+                unfinished: List[int] = []
+                done: List[int] = []
+                for i, t, r in zip(itertools.count(), self.total, self.read):
+                    (unfinished if r < t else done).append(i)
+                self._split = (unfinished, done)
+        return self._split
+
+    def remaining(self, limit: Optional[int] = None) -> List[FileProgress]:
+        """
+        Unfinished entries by remaining LOC, largest first; with a limit,
+        only the largest `limit`.
+        """
+        positions = self._unfinished_and_done()[0]
+        if self.np is not None:
+            order = self._np_order(positions, self.np_total - self.np_read, limit)
+        else:
+            total, read = self.total, self.read
+            order = _py_order(positions, lambda i: total[i] - read[i], limit)
+        return self._entries(order)
+
+    def done(self, limit: Optional[int] = None) -> List[FileProgress]:
+        """
+        Fully read entries by LOC, largest first.
+        """
+        positions = self._unfinished_and_done()[1]
+        if self.np is not None:
+            order = self._np_order(positions, self.np_total, limit)
+        else:
+            order = _py_order(positions, self.total.__getitem__, limit)
+        return self._entries(order)
+
+    def _np_order(self, positions: Any, key: Any, limit: Optional[int]) -> List[int]:
+        np = self.np
+        keys = key[positions]
+        if limit is not None and limit < len(positions):
+            if limit <= 0:
+                return []
+            # argpartition-style selection of the largest `limit`, taking
+            # the earliest of any entries tied at the cut-off.
+            cut = len(keys) - limit
+            kth = np.partition(keys, cut)[cut]
+            above = np.flatnonzero(keys > kth)
+            ties = np.flatnonzero(keys == kth)[: limit - len(above)]
+            keep = np.sort(np.concatenate([above, ties]))
+            positions, keys = positions[keep], keys[keep]
+        return positions[np.lexsort((positions, -keys))].tolist()
+
+    def _entries(self, order: List[int]) -> List[FileProgress]:
+        items, paths = self.items, self.paths
+        return [items[paths[i]] for i in order]
+
+
+def _py_order(
+    positions: List[int], key: Callable[[int], int], limit: Optional[int]
+) -> List[int]:
+    if limit is None:
+        return sorted(positions, key=key, reverse=True)
+    return heapq.nlargest(limit, positions, key=key)
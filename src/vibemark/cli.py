@@ -4,30 +4,93 @@ from __future__ import annotations
 import builtins
 import csv
 import fnmatch
+import functools
+import heapq
+import io
+import itertools
 import json
+import os
+import stat
 import sys
-from dataclasses import dataclass
+import time
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, cast
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Self,
+    Tuple,
+    cast,
+)
 
 import typer
 from rich.console import Console
-from rich.table import Table
-from rich.prompt import Confirm
-from rich import box
 
-from vibemark import __version__
+from vibemark import get_version, sqlite_state, timings
+from vibemark.aggregate import Aggregate
+from vibemark.dirtree import DirNode, DirTree
+from vibemark.excludes import ExcludeMatcher
+from vibemark.filetable import FileProgress, FileTable
+from vibemark.linediff import (
+    decode_hashes,
+    encode_hashes,
+    hashes_and_counts,
+    remap_ranges,
+    surviving_lines,
+)
+from vibemark.loc import LOC_MODES, LocCounts, count_all, count_loc
+from vibemark.ranges import LineRanges
+from vibemark.summary import add_file, parse_summary, summarize
+
+if TYPE_CHECKING:
+    from rich.table import Table
+
+    from vibemark.watch import Snapshot, Watcher
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks
+    fcntl = None  # type: ignore[assignment]
+
 
 app = typer.Typer(
     add_completion=False, help="vibemark — track code reading progress by LOC"
 )
 exclude_app = typer.Typer(help="Manage persistent exclude globs.")
 ext_app = typer.Typer(help="Manage persistent scan extensions.")
+state_app = typer.Typer(help="Manage the state storage backend.")
+workspace_app = typer.Typer(
+    help="Work with several vibemark roots (e.g. monorepo sub-projects) at once."
+)
+daemon_app = typer.Typer(
+    help="Keep the state loaded in a background process for set/done/reset/stats."
+)
 app.add_typer(exclude_app, name="exclude")
 app.add_typer(ext_app, name="ext")
+app.add_typer(state_app, name="state")
+app.add_typer(daemon_app, name="daemon")
+app.add_typer(workspace_app, name="workspace")
 console = Console()
 
 STATE_FILENAME = ".vibemark.json"
+JOURNAL_FILENAME = ".vibemark.journal"
+LOCK_FILENAME = ".vibemark.lock"
+WORKSPACE_FILENAME = ".vibemark-workspace.json"
+# Fold the journal back into the snapshot once it grows past this many bytes.
+JOURNAL_COMPACT_BYTES = 1 << 20
 
 DEFAULT_EXCLUDES = [
     ".git/*",
@@ -50,21 +113,91 @@ def is_excluded(rel: str, exclude_globs: List[str]) -> bool:
     return any(fnmatch.fnmatch(rel, g) for g in exclude_globs)
 
 
-def count_loc(path: Path, mode: str = "physical") -> int:
+def iter_source_files(
+    root: Path,
+    exclude_globs: List[str],
+    extensions: List[str],
+    start: str = "",
+) -> Iterator[Tuple[str, os.DirEntry[str]]]:
     """
-    mode:
-      - physical: count all lines
-      - nonempty: count non-empty lines
-    (Easy to add "sloc" later: ignore comments/blank lines)
+    Walk root once, yielding (rel_path, entry) for files with a matching
+    extension. Excluded directories are pruned before they are entered and
+    symlinked directories are not followed. start limits the walk to one
+    directory below root (relative posix path).
     """
+    suffixes = tuple(f".{ext}" for ext in normalize_extensions(extensions))
+    if not suffixes:
+        return
+    matcher = ExcludeMatcher(exclude_globs)
+    if start and matcher.can_prune(start):
+        return
+    stack: List[Tuple[str, str]] = [
+        (str(root / start), start + "/") if start else (str(root), "")
+    ]
+    # Plain locals keep the loop cheap; reported to --timings at the end.
+    walked = evaluated = 0
     try:
-        text = path.read_text(encoding="utf-8", errors="replace")
-    except Exception:
-        return 0
-    lines = text.splitlines()
-    if mode == "nonempty":
-        return sum(1 for ln in lines if ln.strip())
-    return len(lines)
+        while stack:
+            dir_path, rel_dir = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                rel = rel_dir + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        evaluated += 1
+                        if not matcher.can_prune(rel):
+                            stack.append((entry.path, rel + "/"))
+                        continue
+                    walked += 1
+                    if not entry.name.endswith(suffixes) or not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                evaluated += 1
+                if matcher.matches(rel):
+                    continue
+                yield rel, entry
+    finally:
+        timings.count("files_walked", walked)
+        timings.count("excludes_evaluated", evaluated)
+
+
+def map_files(fn: Callable[[Path], Any], paths: List[Path], jobs: int = 1) -> List[Any]:
+    """
+    fn for each path, in input order. With jobs > 1 the files are read on a
+    thread pool; jobs=0 uses one worker per CPU.
+    """
+    workers = jobs or os.cpu_count() or 1
+    if workers <= 1 or len(paths) < 2:
+        return [fn(p) for p in paths]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, paths))
+
+
+def count_many(
+    paths: List[Path], sloc: bool = False, jobs: int = 1
+) -> List[LocCounts]:
+    """
+    count_all for each path, in input order.
+    """
+    return map_files(functools.partial(count_all, sloc=sloc), paths, jobs)
+
+
+def hash_many(
+    paths: List[Path], mode: str = "physical", sloc: bool = False, jobs: int = 1
+) -> List[Tuple[array, LocCounts]]:
+    """
+    hashes_and_counts for each path, in input order.
+    """
+    return map_files(
+        functools.partial(hashes_and_counts, mode=mode, sloc=sloc), paths, jobs
+    )
 
 
 def coerce_int(value: object) -> int:
@@ -80,35 +213,49 @@ def coerce_int(value: object) -> int:
     return 0
 
 
-@dataclass
-class FileProgress:
-    path: str
-    total_loc: int
-    read_loc: int
-    mtime_ns: int
+def state_path(root: Path) -> Path:
+    return root / STATE_FILENAME
 
-    @property
-    def status(self) -> str:
-        if self.read_loc <= 0:
-            return "unread"
-        if self.read_loc >= self.total_loc:
-            return "done"
-        return "partial"
 
-    def clamp(self) -> None:
-        if self.total_loc < 0:
-            self.total_loc = 0
-        if self.read_loc < 0:
-            self.read_loc = 0
-        if self.read_loc > self.total_loc:
-            self.read_loc = self.total_loc
+def journal_path(root: Path) -> Path:
+    return root / JOURNAL_FILENAME
 
 
-def state_path(root: Path) -> Path:
-    return root / STATE_FILENAME
+def db_path(root: Path) -> Path:
+    return root / sqlite_state.DB_FILENAME
+
+
+def uses_sqlite(root: Path) -> bool:
+    return db_path(root).exists()
+
+
+@contextmanager
+def state_lock(root: Path, exclusive: bool = True) -> Generator[None, None, None]:
+    """
+    Hold an advisory flock on .vibemark.lock, so a snapshot rewrite and a
+    journal append from another process (such as the daemon) never
+    interleave. Readers only lock once a writer has created the file.
+    """
+    p = root / LOCK_FILENAME
+    if fcntl is None or not (exclusive or p.exists()):
+        yield
+        return
+    try:
+        f = p.open("a" if exclusive else "r")
+    except OSError:
+        # Read-only root: nothing else can be writing here either.
+        yield
+        return
+    with f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
 
 
+@timings.timed("load")
 def load_state_payload(root: Path) -> Dict[str, object]:
+    if uses_sqlite(root):
+        with state_lock(root, exclusive=False):
+            return sqlite_state.read_payload(db_path(root))
     p = state_path(root)
     if not p.exists():
         return {
@@ -117,31 +264,121 @@ def load_state_payload(root: Path) -> Dict[str, object]:
             "excludes": [],
             "extensions": DEFAULT_EXTENSIONS,
         }
-    return json.loads(p.read_text(encoding="utf-8"))
+    with state_lock(root, exclusive=False):
+        raw = json.loads(p.read_text(encoding="utf-8"))
+        replay_journal(root, raw)
+    return raw
+
+
+def replay_journal(root: Path, raw: Dict[str, object]) -> None:
+    """
+    Apply progress records appended since the last snapshot, in order.
+    """
+    try:
+        text = journal_path(root).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return
+    files = raw.get("files")
+    if not isinstance(files, dict):
+        return
+    summary = parse_summary(raw.get("summary"))
+    for line in text.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # A torn append from an interrupted process.
+            continue
+        if not isinstance(record, dict):
+            continue
+        rel = record.pop("path", None)
+        meta = files.get(rel)
+        if isinstance(meta, dict):
+            if summary is not None:
+                add_file(summary, *entry_locs(meta), sign=-1)
+            meta.update(record)
+            if summary is not None:
+                add_file(summary, *entry_locs(meta))
+    if summary is not None:
+        raw["summary"] = summary
+
+
+def entry_locs(meta: Dict[str, object]) -> Tuple[int, int]:
+    return coerce_int(meta.get("total_loc", 0)), coerce_int(meta.get("read_loc", 0))
 
 
-def load_state(root: Path) -> Dict[str, FileProgress]:
-    raw = load_state_payload(root)
+def append_journal(root: Path, records: List[Dict[str, object]]) -> int:
+    """
+    Append records to the journal and return its new size in bytes. A
+    torn last record (no trailing newline) is ended first, so the new
+    records start on a line of their own.
+    """
+    data = "".join(json.dumps(r, sort_keys=True) + "\n" for r in records)
+    with journal_path(root).open("a+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        if end:
+            f.seek(end - 1)
+            if f.read(1) != b"\n":
+                data = "\n" + data
+        f.write(data.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+
+def files_from_payload(raw: Dict[str, object]) -> MutableMapping[str, FileProgress]:
     files = raw.get("files", {})
     if not isinstance(files, dict):
-        return {}
-    out: Dict[str, FileProgress] = {}
+        return FileTable()
+    out = FileTable()
     for rel, meta in files.items():
         if not isinstance(rel, str):
             continue
         if not isinstance(meta, dict):
             continue
         meta_dict = cast(dict[str, object], meta)
-        out[rel] = FileProgress(
+        fp = FileProgress(
             path=rel,
             total_loc=coerce_int(meta_dict.get("total_loc", 0)),
             read_loc=coerce_int(meta_dict.get("read_loc", 0)),
             mtime_ns=coerce_int(meta_dict.get("mtime_ns", 0)),
+            size=coerce_int(meta_dict.get("size", 0)),
+            blob=str(meta_dict.get("blob") or ""),
+            lines=decode_lines(meta_dict.get("lines")),
+            ranges=decode_ranges(meta_dict.get("ranges")),
+            locs=decode_locs(meta_dict.get("locs")),
         )
-        out[rel].clamp()
+        fp.clamp()
+        out[rel] = fp
     return out
 
 
+def decode_lines(value: object) -> Optional[array]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return decode_hashes(value)
+    except ValueError:
+        return None
+
+
+def decode_ranges(value: object) -> Optional[LineRanges]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return LineRanges.parse(value)
+    except ValueError:
+        return None
+
+
+def decode_locs(value: object) -> Optional[LocCounts]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return LocCounts.parse(value)
+    except ValueError:
+        return None
+
+
 def normalize_exclude_glob(glob: str) -> str:
     return glob.strip().replace("\\", "/")
 
@@ -173,7 +410,10 @@ def normalize_extensions(exts: List[str]) -> List[str]:
 
 
 def load_excludes(root: Path) -> List[str]:
-    raw = load_state_payload(root)
+    return excludes_from_payload(load_state_payload(root))
+
+
+def excludes_from_payload(raw: Dict[str, object]) -> List[str]:
     excludes = raw.get("excludes", [])
     if not isinstance(excludes, list):
         return []
@@ -181,7 +421,10 @@ def load_excludes(root: Path) -> List[str]:
 
 
 def load_extensions(root: Path) -> List[str]:
-    raw = load_state_payload(root)
+    return extensions_from_payload(load_state_payload(root))
+
+
+def extensions_from_payload(raw: Dict[str, object]) -> List[str]:
     exts = raw.get("extensions", [])
     if not isinstance(exts, list):
         return DEFAULT_EXTENSIONS
@@ -189,32 +432,332 @@ def load_extensions(root: Path) -> List[str]:
     return normalized or DEFAULT_EXTENSIONS
 
 
+def loc_mode_from_payload(raw: Dict[str, object]) -> Optional[str]:
+    mode = raw.get("loc_mode")
+    return mode if isinstance(mode, str) else None
+
+
+def track_lines_from_payload(raw: Dict[str, object]) -> bool:
+    return raw.get("track_lines") is True
+
+
 def save_state(
     root: Path,
-    items: Dict[str, FileProgress],
+    items: Mapping[str, FileProgress],
     excludes: Optional[List[str]] = None,
     extensions: Optional[List[str]] = None,
+    loc_mode: Optional[str] = None,
+    track_lines: Optional[bool] = None,
 ) -> None:
-    p = state_path(root)
-    if excludes is None:
-        excludes = load_excludes(root)
-    if extensions is None:
-        extensions = load_extensions(root)
-    files = {
-        rel: {
-            "total_loc": fp.total_loc,
-            "read_loc": fp.read_loc,
-            "mtime_ns": fp.mtime_ns,
+    """
+    Write items as the state's entries, keeping every setting not given.
+    """
+    if None in (excludes, extensions, loc_mode, track_lines):
+        raw = load_state_payload(root)
+        if excludes is None:
+            excludes = excludes_from_payload(raw)
+        if extensions is None:
+            extensions = extensions_from_payload(raw)
+        if loc_mode is None:
+            loc_mode = loc_mode_from_payload(raw)
+        if track_lines is None:
+            track_lines = track_lines_from_payload(raw)
+    assert excludes is not None and extensions is not None
+    write_state(root, items, excludes, extensions, loc_mode, bool(track_lines))
+
+
+@timings.timed("save")
+def write_state(
+    root: Path,
+    items: Mapping[str, FileProgress],
+    excludes: List[str],
+    extensions: List[str],
+    loc_mode: Optional[str],
+    track_lines: bool = False,
+) -> None:
+    """
+    Serialize items and settings to the active backend without reading it.
+    """
+    if isinstance(items, FileTable):
+        files = {
+            fields[0]: entry_record(*fields[1:]) for fields in items.rows_by_path()
         }
-        for rel, fp in sorted(items.items(), key=lambda kv: kv[0])
-    }
-    payload = {
+    else:
+        files = {
+            rel: file_record(fp)
+            for rel, fp in sorted(items.items(), key=lambda kv: kv[0])
+        }
+    payload: Dict[str, object] = {
         "version": 1,
         "files": files,
         "excludes": normalize_excludes(excludes),
         "extensions": normalize_extensions(extensions),
+        "summary": summarize(entry_pairs(items)),
+    }
+    if loc_mode is not None:
+        payload["loc_mode"] = loc_mode
+    if track_lines:
+        payload["track_lines"] = True
+    with state_lock(root):
+        if uses_sqlite(root):
+            sqlite_state.write_payload(db_path(root), payload)
+            return
+        write_json_payload(state_path(root), payload, journal_path(root))
+
+
+def entry_pairs(items: Mapping[str, FileProgress]) -> Iterator[Tuple[int, int]]:
+    if isinstance(items, FileTable):
+        return items.locs()
+    return ((fp.total_loc, fp.read_loc) for fp in items.values())
+
+
+def write_json_payload(
+    p: Path, payload: Dict[str, object], journal: Optional[Path] = None
+) -> None:
+    """
+    Write the snapshot atomically: a temp file in the same directory is
+    fsynced and then renamed over p, so readers never see a torn file.
+    The journal the new snapshot supersedes is removed just before the
+    rename, so a crash in between can never replay it onto the new one.
+    """
+    text = json.dumps(payload, indent=2, sort_keys=True) + "\n"
+    tmp = p.with_name(f"{p.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if journal is not None:
+            journal.unlink(missing_ok=True)
+        os.replace(tmp, p)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def file_record(fp: FileProgress) -> Dict[str, object]:
+    return entry_record(
+        fp.total_loc,
+        fp.read_loc,
+        fp.mtime_ns,
+        fp.size,
+        fp.blob,
+        fp.lines,
+        fp.ranges,
+        fp.locs,
+    )
+
+
+def entry_record(
+    total_loc: int,
+    read_loc: int,
+    mtime_ns: int,
+    size: int,
+    blob: str,
+    lines: Optional[array],
+    ranges: Optional[LineRanges],
+    locs: Optional[LocCounts] = None,
+) -> Dict[str, object]:
+    record: Dict[str, object] = {
+        "total_loc": total_loc,
+        "read_loc": read_loc,
+        "mtime_ns": mtime_ns,
+        "size": size,
+    }
+    if blob:
+        record["blob"] = blob
+    if lines is not None:
+        record["lines"] = encode_hashes(lines)
+    if ranges is not None:
+        record["ranges"] = str(ranges)
+    if locs is not None:
+        record["locs"] = locs.format()
+    return record
+
+
+def progress_record(fp: FileProgress) -> Dict[str, object]:
+    return {
+        "path": fp.path,
+        "read_loc": fp.read_loc,
+        "ranges": None if fp.ranges is None else str(fp.ranges),
     }
-    p.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+@dataclass
+class StateSession:
+    """
+    The state of one root, parsed once per command and written back once.
+    """
+
+    root: Path
+    files: MutableMapping[str, FileProgress]
+    excludes: List[str]
+    extensions: List[str]
+    loc_mode: Optional[str] = None
+    track_lines: bool = False
+    _tree: Optional[DirTree] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @classmethod
+    def load(cls, root: Path) -> Self:
+        raw = load_state_payload(root)
+        return cls(
+            root=root,
+            files=files_from_payload(raw),
+            excludes=excludes_from_payload(raw),
+            extensions=extensions_from_payload(raw),
+            loc_mode=loc_mode_from_payload(raw),
+            track_lines=track_lines_from_payload(raw),
+        )
+
+    def dir_tree(self) -> DirTree:
+        """
+        The entries by directory, built on first use. Progress changes made
+        through apply_to_targets keep its rollups current.
+        """
+        if self._tree is None:
+            self._tree = DirTree(self.files.values())
+        return self._tree
+
+    def switch_loc_mode(self, loc_mode: str) -> None:
+        """
+        Make loc_mode the state's LOC mode, restating the entries from their
+        stored counts when it differs (see restate_entries).
+        """
+        if self.loc_mode == loc_mode:
+            return
+        restate_entries(self.files, loc_mode)
+        self.loc_mode = loc_mode
+        self._tree = None
+
+    def save(self) -> None:
+        write_state(
+            self.root,
+            self.files,
+            self.excludes,
+            self.extensions,
+            self.loc_mode,
+            self.track_lines,
+        )
+
+    def save_entries(self, rels: List[str]) -> None:
+        """
+        Persist progress changes to the given entries only. The SQLite
+        backend updates just those rows; the JSON backend appends read_loc
+        and ranges to the journal and compacts it into a new snapshot once
+        it grows too large.
+        """
+        with timings.phase("save"), state_lock(self.root):
+            if uses_sqlite(self.root):
+                sqlite_state.upsert_files(
+                    db_path(self.root),
+                    {rel: file_record(self.files[rel]) for rel in rels},
+                )
+                return
+            records: List[Dict[str, object]] = [
+                progress_record(self.files[rel]) for rel in rels
+            ]
+            size = append_journal(self.root, records)
+        if size > JOURNAL_COMPACT_BYTES:
+            self.save()
+
+
+def load_state(root: Path) -> MutableMapping[str, FileProgress]:
+    """
+    The state's entries alone, as StateSession.load parses them.
+    """
+    return StateSession.load(root).files
+
+
+def check_loc_mode(loc_mode: str) -> str:
+    if loc_mode not in LOC_MODES:
+        raise typer.BadParameter(f"--loc-mode must be one of: {', '.join(LOC_MODES)}.")
+    return loc_mode
+
+
+def restated_read(read_loc: int, total_loc: int, new_total: int) -> int:
+    """
+    read_loc carried over to a new line count for the same content: unread
+    and fully read files stay so, partial progress keeps its share.
+    """
+    if read_loc <= 0 or new_total <= 0:
+        return 0
+    if read_loc >= total_loc:
+        return new_total
+    return max(1, min(new_total - 1, read_loc * new_total // total_loc))
+
+
+def restate_entries(items: Mapping[str, FileProgress], loc_mode: str) -> int:
+    """
+    Switch entries to loc_mode from their stored counts, without reading
+    any file. Read ranges and line fingerprints number lines in the old
+    mode, so they are dropped. Entries without a count for loc_mode are
+    left as they are; returns how many.
+    """
+    missing = 0
+    for fp in items.values():
+        locs = fp.locs
+        total = None if locs is None else locs.for_mode(loc_mode)
+        if total is None:
+            missing += 1
+            continue
+        fp.read_loc = restated_read(fp.read_loc, fp.total_loc, total)
+        fp.total_loc = total
+        fp.ranges = None
+        fp.lines = None
+    return missing
+
+
+def in_loc_mode(items: Mapping[str, FileProgress], loc_mode: str) -> FileTable:
+    """
+    A copy of items restated in loc_mode for reporting; the state itself
+    is left alone.
+    """
+    view = FileTable(items.values())
+    if restate_entries(view, loc_mode):
+        raise typer.BadParameter(
+            f"No saved {loc_mode} counts for some files; "
+            f"run `vibemark update --loc-mode {loc_mode}` once."
+        )
+    return view
+
+
+def counts_sloc(items: Mapping[str, FileProgress]) -> bool:
+    """
+    Whether any entry carries a sloc count, which later scans then keep
+    current (for every file) so switching to sloc never needs a re-read.
+    """
+    if isinstance(items, FileTable):
+        return items.has_counts("sloc")
+    return any(
+        fp.locs is not None and fp.locs.sloc is not None for fp in items.values()
+    )
+
+
+class ScannedFile(NamedTuple):
+    total_loc: int
+    mtime_ns: int
+    size: int
+    blob: str = ""
+    lines: Optional[array] = None
+    locs: Optional[LocCounts] = None
+
+
+FoundFile = Tuple[str, Path, ScannedFile, bool]
+
+
+def same_signature(fp: FileProgress, mtime_ns: int, size: int) -> bool:
+    """
+    Whether a file with this mtime and size is unchanged since fp was
+    counted. States written before sizes were saved have size 0 there,
+    which is taken as unknown: only the mtime is compared, and the next
+    save stores the size.
+    """
+    return mtime_ns == fp.mtime_ns and (fp.size == 0 or size == fp.size)
+
+
+SCAN_SOURCES = {"fs", "git"}
 
 
 def scan_repo(
@@ -223,36 +766,247 @@ def scan_repo(
     loc_mode: str,
     include_empty: bool,
     extensions: List[str],
-) -> Dict[str, Tuple[int, int]]:
+    known: Optional[Mapping[str, FileProgress]] = None,
+    jobs: int = 1,
+    track_lines: bool = False,
+) -> Dict[str, ScannedFile]:
+    """
+    Returns mapping rel_path -> (total_loc, mtime_ns, size, blob, lines, locs)
+
+    Files whose size and mtime match their entry in known reuse its stored
+    counts instead of being read again. The rest are counted in every LOC
+    mode (sloc too when it is loc_mode or known already has it) with up to
+    `jobs` parallel readers; results keep the walk order either way. With
+    track_lines, each file also gets a per-line fingerprint.
+    """
+    known = known or {}
+    sloc = loc_mode == "sloc" or counts_sloc(known)
+    found: List[FoundFile] = []
+    with timings.phase("walk"):
+        for rel, entry in iter_source_files(root, exclude, extensions):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            prev = known.get(rel)
+            if prev is not None and not same_signature(
+                prev, st.st_mtime_ns, st.st_size
+            ):
+                prev = None
+            scanned = ScannedFile(0, st.st_mtime_ns, st.st_size)
+            found.append(
+                found_file(
+                    rel, Path(entry.path), scanned, prev, loc_mode, track_lines, sloc
+                )
+            )
+    return count_found(found, loc_mode, include_empty, jobs, track_lines, sloc)
+
+
+def scan_git_index(
+    root: Path,
+    exclude: List[str],
+    loc_mode: str,
+    include_empty: bool,
+    extensions: List[str],
+    known: Optional[Mapping[str, FileProgress]] = None,
+    jobs: int = 1,
+    track_lines: bool = False,
+) -> Dict[str, ScannedFile]:
     """
-    Returns mapping rel_path -> (total_loc, mtime_ns)
+    Like scan_repo, but enumerates files tracked by git instead of walking
+    the tree, and reuses stored counts when the blob ID is unchanged.
     """
-    results: Dict[str, Tuple[int, int]] = {}
-    normalized_exts = normalize_extensions(extensions)
-    if not normalized_exts:
-        return results
-    for ext in normalized_exts:
-        for path in root.rglob(f"*.{ext}"):
-            if not path.is_file():
+    from vibemark.gitindex import GitError, tracked_blobs
+
+    known = known or {}
+    sloc = loc_mode == "sloc" or counts_sloc(known)
+    suffixes = tuple(f".{ext}" for ext in normalize_extensions(extensions))
+    matcher = ExcludeMatcher(exclude)
+    found: List[FoundFile] = []
+    with timings.phase("walk"):
+        try:
+            blobs = tracked_blobs(root)
+        except GitError as exc:
+            raise typer.BadParameter(f"--source git needs a git checkout: {exc}")
+        timings.count("files_walked", len(blobs))
+        for rel, blob in blobs.items():
+            if not rel.endswith(suffixes):
                 continue
-            rel = path.relative_to(root).as_posix()
-            if is_excluded(rel, exclude):
+            timings.count("excludes_evaluated")
+            if matcher.matches(rel):
                 continue
-            st = path.stat()
-            total = count_loc(path, mode=loc_mode)
-            if not include_empty and total == 0:
+            path = root / rel
+            try:
+                st = path.stat()
+            except OSError:
                 continue
-            results[rel] = (total, st.st_mtime_ns)
+            prev = known.get(rel)
+            if prev is not None and prev.blob != blob:
+                prev = None
+            scanned = ScannedFile(0, st.st_mtime_ns, st.st_size, blob)
+            found.append(
+                found_file(rel, path, scanned, prev, loc_mode, track_lines, sloc)
+            )
+    return count_found(found, loc_mode, include_empty, jobs, track_lines, sloc)
+
+
+def found_file(
+    rel: str,
+    path: Path,
+    scanned: ScannedFile,
+    prev: Optional[FileProgress],
+    loc_mode: str,
+    track_lines: bool,
+    sloc: bool = False,
+) -> FoundFile:
+    """
+    Take counts from prev (an entry whose signature still matches) when it
+    has everything this scan needs; otherwise mark the file for reading.
+    """
+    locs = None if prev is None else prev.locs
+    total = None if locs is None else locs.for_mode(loc_mode)
+    if (
+        prev is None
+        or locs is None
+        or total is None
+        or (sloc and locs.sloc is None)
+        or (track_lines and prev.lines is None)
+    ):
+        return rel, path, scanned, False
+    lines = prev.lines if track_lines else None
+    return rel, path, scanned._replace(total_loc=total, lines=lines, locs=locs), True
+
+
+def count_found(
+    found: List[FoundFile],
+    loc_mode: str,
+    include_empty: bool,
+    jobs: int,
+    track_lines: bool = False,
+    sloc: bool = False,
+) -> Dict[str, ScannedFile]:
+    """
+    Fill in locs and total_loc (and lines, with track_lines) for found files
+    not flagged for reuse, then drop empty files unless include_empty. Each
+    file is read once for all of them. Keeps the order of found.
+    """
+    to_count = [path for _, path, _, reuse in found if not reuse]
+    if timings.active is not None:
+        timings.count("files_read", len(to_count))
+        timings.count(
+            "bytes_read", sum(sf.size for _, _, sf, reuse in found if not reuse)
+        )
+    with timings.phase("count"):
+        if track_lines:
+            hashed = iter(hash_many(to_count, loc_mode, sloc, jobs))
+        else:
+            counted = iter(count_many(to_count, sloc or loc_mode == "sloc", jobs))
+
+    results: Dict[str, ScannedFile] = {}
+    for rel, _, scanned, reuse in found:
+        if not reuse and track_lines:
+            lines, locs = next(hashed)
+            scanned = scanned._replace(total_loc=len(lines), lines=lines, locs=locs)
+        elif not reuse:
+            locs = next(counted)
+            total = locs.for_mode(loc_mode)
+            assert total is not None
+            scanned = scanned._replace(total_loc=total, locs=locs)
+        if not include_empty and scanned.total_loc == 0:
+            continue
+        results[rel] = scanned
     return results
 
 
-def totals(items: Dict[str, FileProgress]) -> Tuple[int, int]:
+def refresh_metadata(fp: FileProgress, scanned: ScannedFile) -> None:
+    fp.mtime_ns = scanned.mtime_ns
+    fp.size = scanned.size
+    fp.blob = scanned.blob
+    fp.lines = scanned.lines
+    fp.locs = scanned.locs
+
+
+def restate_entry(fp: FileProgress, new: ScannedFile) -> None:
+    """
+    Take new's counts for content fp already had, counted in another LOC
+    mode; read progress keeps its share (see restated_read).
+    """
+    fp.read_loc = restated_read(fp.read_loc, fp.total_loc, new.total_loc)
+    fp.total_loc = new.total_loc
+    fp.ranges = None
+    refresh_metadata(fp, new)
+
+
+def carry_read_lines(fp: FileProgress, new: ScannedFile) -> Optional[int]:
+    """
+    Move read credit onto new content when both sides have line
+    fingerprints: read lines that survived the edit keep counting.
+    Returns how many were kept, or None without fingerprints.
+    """
+    if fp.lines is None or new.lines is None:
+        return None
+    if fp.ranges is not None:
+        fp.ranges = remap_ranges(fp.lines, new.lines, fp.ranges)
+        kept = fp.ranges.count
+    else:
+        kept = surviving_lines(fp.lines, new.lines, fp.read_loc)
+    fp.read_loc = kept
+    return kept
+
+
+def get_scanner(source: str) -> Callable[..., Dict[str, ScannedFile]]:
+    source = source.lower()
+    if source not in SCAN_SOURCES:
+        raise typer.BadParameter("--source must be fs or git.")
+    return scan_git_index if source == "git" else scan_repo
+
+
+def load_summary(root: Path) -> Optional[Dict[str, int]]:
+    """
+    The summary block of the saved state without building its entries, or
+    None when it has to be computed from them: no summary saved yet, or a
+    daemon session that may hold unflushed progress.
+    """
+    if root in warm_sessions:
+        return None
+    if uses_sqlite(root):
+        with state_lock(root, exclusive=False):
+            value = sqlite_state.read_meta(db_path(root), "summary")
+        return parse_summary(value)
+    if not state_path(root).exists():
+        return None
+    return parse_summary(load_state_payload(root).get("summary"))
+
+
+def top_remaining(
+    items: Mapping[str, FileProgress], limit: Optional[int] = None
+) -> List[FileProgress]:
+    """
+    Unfinished files by remaining LOC, largest first. With a limit only the
+    largest `limit` are selected instead of sorting everything.
+    """
+    return Aggregate(items).remaining(limit)
+
+
+def print_totals(read: int, total: int) -> None:
+    pct = (read / total * 100.0) if total else 0.0
+    console.print(
+        f"Total: [bold]{read}/{total}[/bold] LOC read  ([bold]{pct:.1f}%[/bold])"
+    )
+
+
+def totals(items: Mapping[str, FileProgress]) -> Tuple[int, int]:
+    if isinstance(items, FileTable):
+        return items.totals()
     total = sum(fp.total_loc for fp in items.values())
     read = sum(fp.read_loc for fp in items.values())
     return total, read
 
 
-def render_table(items: Dict[str, FileProgress], limit: int = 200) -> Table:
+def render_table(items: Mapping[str, FileProgress], limit: int = 200) -> Table:
+    from rich import box
+    from rich.table import Table
+
     t = Table(title="vibemark", box=box.SIMPLE_HEAVY)
     t.add_column("#", style="dim", width=4, justify="right")
     t.add_column("Status", width=8)
@@ -275,6 +1029,29 @@ def render_table(items: Dict[str, FileProgress], limit: int = 200) -> Table:
     return t
 
 
+def render_dir_table(dirs: List[Tuple[str, int, DirNode]]) -> Table:
+    from rich import box
+    from rich.table import Table
+
+    t = Table(title="By directory", box=box.SIMPLE)
+    t.add_column("Read", justify="right")
+    t.add_column("LOC", justify="right")
+    t.add_column("%", justify="right")
+    t.add_column("Files", justify="right")
+    t.add_column("Directory", overflow="fold")
+    for path, level, node in dirs:
+        name = path.rsplit("/", 1)[-1] if level else (path or ".")
+        pct = (node.read_loc / node.total_loc * 100.0) if node.total_loc else 0.0
+        t.add_row(
+            str(node.read_loc),
+            str(node.total_loc),
+            f"{pct:.1f}",
+            str(node.file_count),
+            "  " * level + name + "/",
+        )
+    return t
+
+
 def resolve_root(root: Optional[Path]) -> Path:
     r = root or Path.cwd()
     r = r.resolve()
@@ -285,12 +1062,13 @@ def resolve_root(root: Optional[Path]) -> Path:
 
 def _version_callback(value: bool) -> None:
     if value:
-        console.print(__version__)
+        console.print(get_version())
         raise typer.Exit()
 
 
 @app.callback()
 def main(
+    ctx: typer.Context,
     version: bool = typer.Option(
         False,
         "--version",
@@ -304,6 +1082,20 @@ def main(
         "--color",
         help="Force color output even when piping (e.g. to less -R)",
     ),
+    show_timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Report time per phase, file/byte/exclude counts and peak memory "
+        "on stderr",
+    ),
+    timings_json: Optional[Path] = typer.Option(
+        None,
+        "--timings-json",
+        help="Write the --timings report as JSON to this file instead",
+    ),
+    profile: Optional[Path] = typer.Option(
+        None, "--profile", help="Run the command under cProfile, saving stats here"
+    ),
 ) -> None:
     """
     vibemark — track code reading progress by LOC
@@ -311,13 +1103,30 @@ def main(
     global console
     if color:
         console = Console(force_terminal=True)
+    if show_timings or timings_json is not None:
+        timings.start(ctx.invoked_subcommand or "")
+        json_path = None if timings_json is None else str(timings_json)
+        ctx.call_on_close(lambda: timings.stop(json_path))
+    if profile is not None:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        # Registered after timings, so it is stopped first and the report
+        # does not include writing the profile.
+        ctx.call_on_close(lambda: stop_profile(profiler, profile))
+        profiler.enable()
     return None
 
 
+def stop_profile(profiler: Any, out: Path) -> None:
+    profiler.disable()
+    profiler.dump_stats(str(out))
+
+
 @app.command()
 def scan(
     root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
-    loc_mode: str = typer.Option("physical", help="LOC mode: physical|nonempty"),
+    loc_mode: str = typer.Option("physical", help="LOC mode: physical|nonempty|sloc"),
     exclude: List[str] = typer.Option(
         None,
         "--exclude",
@@ -331,36 +1140,80 @@ def scan(
     include_empty: bool = typer.Option(
         False, "--include-empty", help="Include empty files (0 LOC) in scan"
     ),
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs", "-j", help="Parallel file readers for LOC counting (0 = per CPU)"
+        ),
+    ] = 1,
+    source: Annotated[
+        str,
+        typer.Option(
+            "--source",
+            help="File source: fs (walk the tree) or git (tracked files, blob IDs)",
+        ),
+    ] = "fs",
+    track_lines: Annotated[
+        Optional[bool],
+        typer.Option(
+            "--track-lines/--no-track-lines",
+            help="Keep per-line fingerprints so update can keep credit for "
+            "unchanged lines (saved for later runs)",
+        ),
+    ] = None,
 ) -> None:
     """
     Scan repo for Python files and create/update .vibemark.json
     """
     root = resolve_root(root)
-    saved_excludes = load_excludes(root)
-    saved_extensions = load_extensions(root)
-    ex = DEFAULT_EXCLUDES + saved_excludes + (exclude or [])
-    existing = load_state(root)
-    extensions = normalize_extensions(ext or saved_extensions)
+    if jobs < 0:
+        raise typer.BadParameter("--jobs must be >= 0.")
+    check_loc_mode(loc_mode)
+    scanner = get_scanner(source)
+    session = StateSession.load(root)
+    if track_lines is not None:
+        session.track_lines = track_lines
+    # Unchanged files switch modes from their stored counts, unread.
+    session.switch_loc_mode(loc_mode)
+    ex = DEFAULT_EXCLUDES + session.excludes + (exclude or [])
+    existing = session.files
+    extensions = normalize_extensions(ext or session.extensions)
     if not extensions:
         raise typer.BadParameter("No extensions provided.")
-    scanned = scan_repo(
+    scanned = scanner(
         root,
         ex,
         loc_mode=loc_mode,
         include_empty=include_empty,
         extensions=extensions,
+        known=existing,
+        jobs=jobs,
+        track_lines=session.track_lines,
     )
 
     # Add/update scanned files, keep read_loc if present
-    new_state: Dict[str, FileProgress] = {}
-    for rel, (total_loc, mtime_ns) in scanned.items():
+    new_state = FileTable()
+    for rel, sf in scanned.items():
         prev = existing.get(rel)
         read_loc = prev.read_loc if prev else 0
-        fp = FileProgress(rel, total_loc, read_loc, mtime_ns)
+        fp = FileProgress(
+            rel,
+            sf.total_loc,
+            read_loc,
+            sf.mtime_ns,
+            sf.size,
+            sf.blob,
+            sf.lines,
+            locs=sf.locs,
+        )
+        if prev is not None:
+            fp.ranges = prev.ranges
         fp.clamp()
         new_state[rel] = fp
 
-    save_state(root, new_state, excludes=saved_excludes, extensions=extensions)
+    session.files = new_state
+    session.extensions = extensions
+    session.save()
     total, read = totals(new_state)
     console.print(
         f"[green]Scanned[/green] {len(new_state)} files. Total {read}/{total} LOC read."
@@ -386,69 +1239,112 @@ def stats(
         "--exclude",
         help="Exclude glob for this run (repeatable), e.g. src/pkg/*",
     ),
+    by_dir: bool = typer.Option(
+        False, "--by-dir", help="Show progress rolled up per directory"
+    ),
+    depth: int = typer.Option(2, help="Directory levels to show with --by-dir"),
+    under: Optional[str] = typer.Option(
+        None, "--dir", help="Directory to show with --by-dir (implies --by-dir)"
+    ),
+    loc_mode: Optional[str] = typer.Option(
+        None,
+        "--loc-mode",
+        help="Report in this LOC mode (physical|nonempty|sloc) using the counts "
+        "saved by the last scan, without reading files",
+    ),
 ) -> None:
     """
     Show total progress and largest remaining files.
     """
     root = resolve_root(root)
-    items = load_state(root)
-    if not items:
-        console.print("[yellow]No state found. Run[/yellow] vibemark scan")
-        raise typer.Exit(1)
-
-    if exclude:
-        items = {
-            rel: fp
-            for rel, fp in items.items()
-            if not is_excluded(rel, exclude)
-        }
-
     fmt = format.lower()
     if fmt not in {"table", "csv", "tsv"}:
         raise typer.BadParameter("--format must be table, csv, or tsv")
+    by_dir = by_dir or under is not None
+    if by_dir and depth < 0:
+        raise typer.BadParameter("--depth must be >= 0.")
+    if loc_mode is not None:
+        check_loc_mode(loc_mode)
+
+    if fmt == "table" and no_table and not exclude and loc_mode is None:
+        # Totals only: answer from the saved summary when there is one.
+        summary = load_summary(root)
+    else:
+        summary = None
+    if summary is not None and summary["files"]:
+        print_totals(summary["read_loc"], summary["total_loc"])
+        return
+
+    session = require_session(root)
+    items = session.files
+
+    if exclude:
+        matcher = ExcludeMatcher(exclude)
+        items = {rel: fp for rel, fp in items.items() if not matcher.matches(rel)}
+    if loc_mode is not None and loc_mode != session.loc_mode:
+        items = in_loc_mode(items, loc_mode)
+
+    dirs: List[Tuple[str, int, DirNode]] = []
+    if by_dir:
+        if items is session.files:
+            tree = session.dir_tree()
+        else:
+            tree = DirTree(items.values())
+        rel_dir = normalize_path_arg(root, under or "").strip("/")
+        if rel_dir == ".":
+            rel_dir = ""
+        dirs = list(tree.walk(rel_dir, depth))
+        if not dirs:
+            raise typer.BadParameter(f"Unknown directory: {rel_dir}")
+
+    # Totals, the remaining ranking and the done list all come from one
+    # set of total/read columns.
+    agg = Aggregate(items)
+    done_files = agg.done() if include_done else []
 
     if fmt in {"csv", "tsv"}:
-        remaining = sorted(
-            (fp for fp in items.values() if fp.read_loc < fp.total_loc),
-            key=lambda fp: (fp.total_loc - fp.read_loc),
-            reverse=True,
-        )
-        if not all:
-            remaining = remaining[:top]
-        if include_done:
-            done_files = sorted(
-                (fp for fp in items.values() if fp.read_loc >= fp.total_loc),
-                key=lambda fp: fp.total_loc,
-                reverse=True,
-            )
-            remaining = remaining + done_files
         delimiter = "\t" if fmt == "tsv" else ","
         writer = csv.writer(sys.stdout, delimiter=delimiter)
+        if by_dir:
+            writer.writerow(["directory", "read", "total", "remaining", "files"])
+            for path, _, node in dirs:
+                writer.writerow(
+                    [
+                        path + "/" if path else "./",
+                        node.read_loc,
+                        node.total_loc,
+                        node.total_loc - node.read_loc,
+                        node.file_count,
+                    ]
+                )
+            return
+        remaining = agg.remaining(None if all else max(top, 0))
+        remaining = remaining + done_files
         writer.writerow(["file", "status", "read", "total", "remaining"])
         for fp in remaining:
             writer.writerow([fp.path, fp.status, fp.read_loc, fp.total_loc, fp.total_loc - fp.read_loc])
         return
 
-    total, read = totals(items)
-    pct = (read / total * 100.0) if total else 0.0
-    console.print(
-        f"Total: [bold]{read}/{total}[/bold] LOC read  ([bold]{pct:.1f}%[/bold])"
-    )
+    total, read = agg.totals()
+    print_totals(read, total)
 
     if no_table:
         return
 
+    if by_dir:
+        with timings.phase("render"):
+            console.print(render_dir_table(dirs))
+        return
+
     if top <= 0 and not all:
         raise typer.BadParameter("--top must be > 0 unless --all is provided.")
 
-    remaining = sorted(
-        (fp for fp in items.values() if fp.read_loc < fp.total_loc),
-        key=lambda fp: (fp.total_loc - fp.read_loc),
-        reverse=True,
-    )
+    remaining = agg.remaining(None if all else top)
 
-    if not all:
-        remaining = remaining[:top]
+    # Rich tables are only imported when one is drawn, so csv/tsv and
+    # --no-table output start faster.
+    from rich import box
+    from rich.table import Table
 
     title = "All remaining" if all else f"Top {top} remaining"
     t = Table(title=title, box=box.SIMPLE)
@@ -460,29 +1356,33 @@ def stats(
         rem = fp.total_loc - fp.read_loc
         t.add_row(str(rem), f"{fp.read_loc}/{fp.total_loc}", str(fp.total_loc), fp.path)
 
-    if include_done:
-        done_files = sorted(
-            (fp for fp in items.values() if fp.read_loc >= fp.total_loc),
-            key=lambda fp: fp.total_loc,
-            reverse=True,
+    for fp in done_files:
+        t.add_row(
+            "[dim]0[/dim]",
+            f"[dim]{fp.read_loc}/{fp.total_loc}[/dim]",
+            f"[dim]{fp.total_loc}[/dim]",
+            f"[dim]{fp.path}[/dim]",
         )
-        for fp in done_files:
-            t.add_row(
-                "[dim]0[/dim]",
-                f"[dim]{fp.read_loc}/{fp.total_loc}[/dim]",
-                f"[dim]{fp.total_loc}[/dim]",
-                f"[dim]{fp.path}[/dim]",
-            )
 
-    console.print(t)
+    with timings.phase("render"):
+        console.print(t)
+
 
+# Sessions kept loaded by `vibemark daemon serve`, by root. Empty in a
+# normal command-line run.
+warm_sessions: Dict[Path, StateSession] = {}
 
-def require_state(root: Path) -> Dict[str, FileProgress]:
-    items = load_state(root)
-    if not items:
+
+def require_session(root: Path) -> StateSession:
+    session = warm_sessions.get(root) or StateSession.load(root)
+    if not session.files:
         console.print("[yellow]No state found. Run[/yellow] vibemark scan")
         raise typer.Exit(1)
-    return items
+    return session
+
+
+def require_state(root: Path) -> MutableMapping[str, FileProgress]:
+    return require_session(root).files
 
 
 def normalize_path_arg(root: Path, p: str) -> str:
@@ -506,14 +1406,15 @@ def exclude_add(
     Add persistent exclude globs saved in .vibemark.json
     """
     root = resolve_root(root)
-    items = load_state(root)
-    excludes = load_excludes(root)
+    session = StateSession.load(root)
+    excludes = session.excludes
     to_add = normalize_excludes(globs)
     if not to_add:
         raise typer.BadParameter("No excludes provided.")
     new_excludes = normalize_excludes(excludes + to_add)
     added = [glob for glob in new_excludes if glob not in excludes]
-    save_state(root, items, excludes=new_excludes)
+    session.excludes = new_excludes
+    session.save()
     if added:
         console.print("[green]Added excludes:[/green]")
         for glob in added:
@@ -531,14 +1432,14 @@ def exclude_remove(
     Remove persistent exclude globs from .vibemark.json
     """
     root = resolve_root(root)
-    items = load_state(root)
-    excludes = load_excludes(root)
+    session = StateSession.load(root)
+    excludes = session.excludes
     to_remove = builtins.set(normalize_excludes(globs))
     if not to_remove:
         raise typer.BadParameter("No excludes provided.")
     removed = [glob for glob in excludes if glob in to_remove]
-    new_excludes = [glob for glob in excludes if glob not in to_remove]
-    save_state(root, items, excludes=new_excludes)
+    session.excludes = [glob for glob in excludes if glob not in to_remove]
+    session.save()
     if removed:
         console.print("[green]Removed excludes:[/green]")
         for glob in removed:
@@ -555,7 +1456,7 @@ def exclude_list(
     List default and saved exclude globs.
     """
     root = resolve_root(root)
-    saved = load_excludes(root)
+    saved = StateSession.load(root).excludes
     console.print("[bold]Default excludes[/bold]")
     for glob in DEFAULT_EXCLUDES:
         console.print(f"- {glob}")
@@ -575,8 +1476,9 @@ def exclude_clear(
     Clear all saved exclude globs.
     """
     root = resolve_root(root)
-    items = load_state(root)
-    save_state(root, items, excludes=[])
+    session = StateSession.load(root)
+    session.excludes = []
+    session.save()
     console.print("[green]Cleared saved excludes.[/green]")
 
 
@@ -619,14 +1521,15 @@ def ext_add(
     Add persistent file extensions for scans.
     """
     root = resolve_root(root)
-    items = load_state(root)
-    extensions = load_extensions(root)
+    session = StateSession.load(root)
+    extensions = session.extensions
     to_add = normalize_extensions(exts)
     if not to_add:
         raise typer.BadParameter("No extensions provided.")
     new_extensions = normalize_extensions(extensions + to_add)
     added = [ext for ext in new_extensions if ext not in extensions]
-    save_state(root, items, extensions=new_extensions)
+    session.extensions = new_extensions
+    session.save()
     if added:
         console.print("[green]Added extensions:[/green]")
         for ext in added:
@@ -644,8 +1547,8 @@ def ext_remove(
     Remove persistent file extensions for scans.
     """
     root = resolve_root(root)
-    items = load_state(root)
-    extensions = load_extensions(root)
+    session = StateSession.load(root)
+    extensions = session.extensions
     to_remove = builtins.set(normalize_extensions(exts))
     if not to_remove:
         raise typer.BadParameter("No extensions provided.")
@@ -653,7 +1556,8 @@ def ext_remove(
     new_extensions = [ext for ext in extensions if ext not in to_remove]
     if not new_extensions:
         raise typer.BadParameter("At least one extension is required.")
-    save_state(root, items, extensions=new_extensions)
+    session.extensions = new_extensions
+    session.save()
     if removed:
         console.print("[green]Removed extensions:[/green]")
         for ext in removed:
@@ -670,7 +1574,7 @@ def ext_list(
     List saved file extensions used for scans.
     """
     root = resolve_root(root)
-    extensions = load_extensions(root)
+    extensions = StateSession.load(root).extensions
     console.print("[bold]Extensions used for scan[/bold]")
     for ext in extensions:
         console.print(f"- {ext}")
@@ -684,8 +1588,9 @@ def ext_clear(
     Reset extensions to the default list.
     """
     root = resolve_root(root)
-    items = load_state(root)
-    save_state(root, items, extensions=DEFAULT_EXTENSIONS)
+    session = StateSession.load(root)
+    session.extensions = DEFAULT_EXTENSIONS
+    session.save()
     console.print("[green]Reset extensions to defaults.[/green]")
 
 
@@ -719,68 +1624,351 @@ def ext_clear_legacy(
     ext_clear(root=root)
 
 
-@app.command()
-def set(
-    path: str = typer.Argument(
-        ..., help="File path (relative to root or absolute under root)"
-    ),
-    read_loc: int = typer.Argument(..., help="How many LOC you read in this file"),
+@state_app.command("convert")
+def state_convert(
+    backend: str = typer.Argument(..., help="Target backend: json|sqlite"),
     root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
 ) -> None:
     """
-    Set partial progress for a file.
+    Move state between .vibemark.json and the SQLite .vibemark.db backend.
     """
     root = resolve_root(root)
-    items = require_state(root)
-    rel = normalize_path_arg(root, path)
-    if rel not in items:
-        raise typer.BadParameter(f"Unknown file: {rel} (did you scan?)")
-    items[rel].read_loc = read_loc
-    items[rel].clamp()
-    save_state(root, items)
-    console.print(f"Updated {rel}: {items[rel].read_loc}/{items[rel].total_loc}")
+    backend = backend.lower()
+    if backend not in {"json", "sqlite"}:
+        raise typer.BadParameter("Backend must be json or sqlite.")
+    current = "sqlite" if uses_sqlite(root) else "json"
+    if backend == current:
+        console.print(f"[yellow]State already uses {backend}.[/yellow]")
+        return
+    payload = load_state_payload(root)
+    if backend == "sqlite":
+        sqlite_state.write_payload(db_path(root), payload)
+        state_path(root).unlink(missing_ok=True)
+        journal_path(root).unlink(missing_ok=True)
+        target = db_path(root)
+    else:
+        write_json_payload(state_path(root), payload)
+        db_path(root).unlink()
+        target = state_path(root)
+    console.print(f"[green]Converted state to {backend}:[/green] {target.name}")
 
 
-@app.command()
-def done(
-    path: str = typer.Argument(...),
-    root: Optional[Path] = typer.Option(None),
+@daemon_app.command("serve")
+def daemon_serve(
+    root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
+    flush_delay: float = typer.Option(
+        0.5, help="Seconds to hold progress writes so bursts are written together"
+    ),
+    idle_timeout: float = typer.Option(
+        0.0, help="Exit after this many idle seconds (0 = never)"
+    ),
 ) -> None:
     """
-    Mark a file as fully read.
+    Run the daemon in the foreground.
+    """
+    from vibemark.daemon import Daemon, DaemonError
+
+    root = resolve_root(root)
+    try:
+        Daemon(root, flush_delay, idle_timeout).serve()
+    except DaemonError as exc:
+        raise typer.BadParameter(str(exc))
+
+
+@daemon_app.command("start")
+def daemon_start(
+    root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
+    idle_timeout: float = typer.Option(
+        0.0, help="Exit after this many idle seconds (0 = never)"
+    ),
+) -> None:
+    """
+    Start the daemon in the background.
+    """
+    import subprocess
+
+    from vibemark.client import send
+
+    root = resolve_root(root)
+    if send(str(root), {"op": "ping"}) is not None:
+        console.print("[green]Daemon already running.[/green]")
+        return
+    subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "vibemark",
+            "daemon",
+            "serve",
+            "--root",
+            str(root),
+            "--idle-timeout",
+            str(idle_timeout),
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    for _ in range(50):
+        reply = send(str(root), {"op": "ping"})
+        if reply is not None:
+            console.print(f"[green]Daemon started[/green] (pid {reply.get('pid')}).")
+            return
+        time.sleep(0.1)
+    console.print("[red]Daemon did not start.[/red] Try vibemark daemon serve")
+    raise typer.Exit(1)
+
+
+@daemon_app.command("stop")
+def daemon_stop(
+    root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
+) -> None:
+    """
+    Flush pending writes and stop the daemon.
+    """
+    from vibemark.client import send
+
+    root = resolve_root(root)
+    if send(str(root), {"op": "stop"}) is None:
+        console.print("No daemon running.")
+        return
+    console.print("[green]Daemon stopped.[/green]")
+
+
+@daemon_app.command("status")
+def daemon_status(
+    root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
+) -> None:
+    """
+    Show whether a daemon is serving this root.
+    """
+    from vibemark.client import send
+
+    root = resolve_root(root)
+    reply = send(str(root), {"op": "ping"})
+    if reply is None:
+        console.print("No daemon running.")
+        raise typer.Exit(1)
+    console.print(f"Daemon running (pid {reply.get('pid')}) for {reply.get('root')}")
+
+
+@app.command()
+def compact(
+    root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
+) -> None:
+    """
+    Fold the progress journal back into .vibemark.json.
+    """
+    root = resolve_root(root)
+    if uses_sqlite(root) or not journal_path(root).exists():
+        console.print("[green]Nothing to compact.[/green]")
+        return
+    session = StateSession.load(root)
+    session.save()
+    console.print(f"[green]Compacted[/green] {len(session.files)} files.")
+
+
+def read_path_list(source: str) -> List[str]:
+    """
+    Read paths from a file ("-" for stdin), NUL-separated if the input
+    contains a NUL byte (e.g. git diff --name-only -z), else one per line.
+    """
+    if source == "-":
+        text = sys.stdin.read()
+    else:
+        text = Path(source).read_text(encoding="utf-8")
+    entries = text.split("\0") if "\0" in text else text.splitlines()
+    return [entry for entry in entries if entry]
+
+
+def select_targets(
+    session: StateSession,
+    paths: Optional[List[str]],
+    from_file: Optional[str],
+) -> Tuple[List[str], List[str]]:
+    """
+    Resolve path arguments to state keys. Arguments containing glob
+    characters are matched against every key; a directory selects every
+    file below it. Returns (matched, unknown), both in argument order
+    without duplicates.
+    """
+    root, items = session.root, session.files
+    args = list(paths or [])
+    if from_file is not None:
+        args.extend(read_path_list(from_file))
+    if not args:
+        raise typer.BadParameter("No paths provided.")
+    matched: Dict[str, None] = {}
+    unknown: List[str] = []
+    for arg in args:
+        rel = normalize_path_arg(root, arg)
+        if any(ch in rel for ch in "*?["):
+            matcher = ExcludeMatcher([rel])
+            hits = sorted(key for key in items if matcher.matches(key))
+            if not hits:
+                unknown.append(rel)
+            matched.update(dict.fromkeys(hits))
+        elif rel in items:
+            matched[rel] = None
+        else:
+            # "." (or the root given as an absolute path) selects everything.
+            tree = session.dir_tree()
+            node = tree.find("" if rel == "." else rel)
+            if node is None or not node.file_count:
+                unknown.append(rel)
+                continue
+            matched.update(dict.fromkeys(fp.path for fp in tree.iter_files(node)))
+    return list(matched), unknown
+
+
+def apply_to_targets(
+    root: Path,
+    paths: Optional[List[str]],
+    from_file: Optional[str],
+    apply: Callable[[FileProgress], None],
+) -> Tuple[List[FileProgress], List[str]]:
+    """
+    Apply one progress change to every selected file with a single state
+    load and save. Returns the updated entries and the unknown paths.
+    """
+    session = require_session(root)
+    matched, unknown = select_targets(session, paths, from_file)
+    if not matched:
+        if len(unknown) == 1:
+            raise typer.BadParameter(f"Unknown file: {unknown[0]} (did you scan?)")
+        raise typer.BadParameter("No known files matched (did you scan?)")
+    updated = [session.files[rel] for rel in matched]
+    tree = session._tree
+    for fp in updated:
+        before = fp.total_loc, fp.read_loc
+        apply(fp)
+        fp.clamp()
+        if tree is not None:
+            tree.update(fp, *before)
+    session.save_entries(matched)
+    return updated, unknown
+
+
+def report_targets(
+    updated: List[FileProgress], unknown: List[str], action: str, single: str
+) -> None:
+    if len(updated) == 1:
+        console.print(single)
+    else:
+        console.print(f"{action} {len(updated)} files.")
+    if unknown:
+        console.print(f"[yellow]Skipped {len(unknown)} unknown paths:[/yellow]")
+        for rel in unknown:
+            console.print(f"- {rel}", markup=False)
+
+
+def parse_progress(value: str) -> Tuple[int, Optional[LineRanges]]:
+    """
+    Parse a set argument: a line count, or 1-based inclusive line ranges.
+    """
+    value = value.strip()
+    try:
+        return int(value), None
+    except ValueError:
+        pass
+    try:
+        ranges = LineRanges.parse(value)
+    except ValueError:
+        raise typer.BadParameter(
+            f"Expected a line count or ranges like 400-600, got: {value}"
+        )
+    return ranges.count, ranges
+
+
+PATHS_HELP = (
+    "File paths, directories or globs (relative to root or absolute under root)"
+)
+FROM_FILE_HELP = "Also read paths from FILE ('-' for stdin), one per line or NUL-separated"
+
+
+@app.command()
+def set(
+    paths: List[str] = typer.Argument(None, help=PATHS_HELP),
+    read_loc: str = typer.Argument(
+        ...,
+        help="How many LOC you read, or which lines, e.g. 120 or 400-600 or 1-20,40-60",
+    ),
+    root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
+    from_file: Optional[str] = typer.Option(None, "--from-file", help=FROM_FILE_HELP),
+) -> None:
+    """
+    Set partial progress for one or more files.
+
+    A plain number sets how many lines (from the top) were read. Line
+    ranges are added to the lines already marked as read.
     """
     root = resolve_root(root)
-    items = require_state(root)
-    rel = normalize_path_arg(root, path)
-    if rel not in items:
-        raise typer.BadParameter(f"Unknown file: {rel} (did you scan?)")
-    items[rel].read_loc = items[rel].total_loc
-    save_state(root, items)
-    console.print(f"[green]Done[/green] {rel}")
+    count, ranges = parse_progress(read_loc)
+
+    def apply(fp: FileProgress) -> None:
+        if ranges is None:
+            fp.read_loc = count
+            fp.ranges = None
+            return
+        if fp.ranges is None:
+            fp.ranges = LineRanges([(0, fp.read_loc)])
+        for start, end in ranges:
+            fp.ranges.add(start, end)
+
+    updated, unknown = apply_to_targets(root, paths, from_file, apply)
+    fp = updated[0]
+    lines = "" if fp.ranges is None else f" (lines {fp.ranges})"
+    report_targets(
+        updated,
+        unknown,
+        "Updated",
+        f"Updated {fp.path}: {fp.read_loc}/{fp.total_loc}{lines}",
+    )
+
+
+@app.command()
+def done(
+    paths: List[str] = typer.Argument(None, help=PATHS_HELP),
+    root: Optional[Path] = typer.Option(None),
+    from_file: Optional[str] = typer.Option(None, "--from-file", help=FROM_FILE_HELP),
+) -> None:
+    """
+    Mark one or more files as fully read.
+    """
+    root = resolve_root(root)
+
+    def apply(fp: FileProgress) -> None:
+        fp.read_loc = fp.total_loc
+        fp.ranges = None
+
+    updated, unknown = apply_to_targets(root, paths, from_file, apply)
+    report_targets(updated, unknown, "Done", f"[green]Done[/green] {updated[0].path}")
 
 
 @app.command()
 def reset(
-    path: str = typer.Argument(...),
+    paths: List[str] = typer.Argument(None, help=PATHS_HELP),
     root: Optional[Path] = typer.Option(None),
+    from_file: Optional[str] = typer.Option(None, "--from-file", help=FROM_FILE_HELP),
 ) -> None:
     """
-    Reset a file's progress to unread.
+    Reset one or more files' progress to unread.
     """
     root = resolve_root(root)
-    items = require_state(root)
-    rel = normalize_path_arg(root, path)
-    if rel not in items:
-        raise typer.BadParameter(f"Unknown file: {rel} (did you scan?)")
-    items[rel].read_loc = 0
-    save_state(root, items)
-    console.print(f"Reset {rel}")
+
+    def apply(fp: FileProgress) -> None:
+        fp.read_loc = 0
+        fp.ranges = None
+
+    updated, unknown = apply_to_targets(root, paths, from_file, apply)
+    report_targets(updated, unknown, "Reset", f"Reset {updated[0].path}")
 
 
 @app.command()
 def update(
     root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
-    loc_mode: str = typer.Option("physical", help="LOC mode: physical|nonempty"),
+    loc_mode: str = typer.Option("physical", help="LOC mode: physical|nonempty|sloc"),
     exclude: List[str] = typer.Option(
         None, "--exclude", help="Exclude glob for this run (repeatable)"
     ),
@@ -797,39 +1985,84 @@ def update(
         "--reset-changed",
         help="Reset progress for changed files: ask|yes|no",
     ),
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs", "-j", help="Parallel file readers for LOC counting (0 = per CPU)"
+        ),
+    ] = 1,
+    source: Annotated[
+        str,
+        typer.Option(
+            "--source",
+            help="File source: fs (walk the tree) or git (tracked files, blob IDs)",
+        ),
+    ] = "fs",
+    track_lines: Annotated[
+        Optional[bool],
+        typer.Option(
+            "--track-lines/--no-track-lines",
+            help="Keep per-line fingerprints so update can keep credit for "
+            "unchanged lines (saved for later runs)",
+        ),
+    ] = None,
 ) -> None:
     """
     Re-scan and detect modified files.
     """
+    from rich.prompt import Confirm
+
     root = resolve_root(root)
+    if jobs < 0:
+        raise typer.BadParameter("--jobs must be >= 0.")
     reset_changed = reset_changed.lower()
     if reset_changed not in {"ask", "yes", "no"}:
         raise typer.BadParameter("Invalid --reset-changed value. Use ask, yes, or no.")
-    saved_excludes = load_excludes(root)
-    saved_extensions = load_extensions(root)
-    ex = DEFAULT_EXCLUDES + saved_excludes + (exclude or [])
-    items = require_state(root)
-    extensions = normalize_extensions(ext or saved_extensions)
+    check_loc_mode(loc_mode)
+    scanner = get_scanner(source)
+    session = require_session(root)
+    if track_lines is not None:
+        session.track_lines = track_lines
+    # A different --loc-mode is applied from stored counts first, so files
+    # that did not change are not reported as changed.
+    session.switch_loc_mode(loc_mode)
+    ex = DEFAULT_EXCLUDES + session.excludes + (exclude or [])
+    items = session.files
+    extensions = normalize_extensions(ext or session.extensions)
     if not extensions:
         raise typer.BadParameter("No extensions provided.")
-    scanned = scan_repo(
+    scanned = scanner(
         root,
         ex,
         loc_mode=loc_mode,
         include_empty=include_empty,
         extensions=extensions,
+        known=items,
+        jobs=jobs,
+        track_lines=session.track_lines,
     )
 
-    changed: List[Tuple[str, FileProgress, int, int]] = []
+    changed: List[Tuple[str, FileProgress, ScannedFile]] = []
     removed: List[str] = []
 
     for rel, fp in items.items():
         if rel not in scanned:
             removed.append(rel)
             continue
-        new_total, new_mtime = scanned[rel]
-        if (new_total != fp.total_loc) or (new_mtime != fp.mtime_ns):
-            changed.append((rel, fp, new_total, new_mtime))
+        new = scanned[rel]
+        # Blob IDs are only compared when both sides came from --source git;
+        # otherwise fall back to the mtime signature.
+        if fp.blob and new.blob:
+            content_changed = new.blob != fp.blob
+        else:
+            content_changed = not same_signature(fp, new.mtime_ns, new.size)
+        if content_changed:
+            changed.append((rel, fp, new))
+        elif new.total_loc != fp.total_loc:
+            # Same content, first counted in this --loc-mode.
+            restate_entry(fp, new)
+        else:
+            refresh_metadata(fp, new)
 
     # Handle removed files
     if removed:
@@ -843,10 +2076,16 @@ def update(
         console.print("[green]No changes detected.[/green]")
     else:
         console.print(f"[yellow]{len(changed)} files changed.[/yellow]")
-        for rel, fp, new_total, new_mtime in sorted(changed, key=lambda x: x[0]):
+        for rel, fp, new in sorted(changed, key=lambda x: x[0]):
             console.print(f"\n[bold]{rel}[/bold]")
-            console.print(f"  was: {fp.read_loc}/{fp.total_loc}  now LOC: {new_total}")
-            if fp.read_loc > 0:
+            console.print(
+                f"  was: {fp.read_loc}/{fp.total_loc}  now LOC: {new.total_loc}"
+            )
+            was = fp.read_loc
+            kept = carry_read_lines(fp, new) if was and reset_changed != "yes" else None
+            if kept is not None:
+                console.print(f"  kept {kept}/{was} read lines")
+            elif fp.read_loc > 0:
                 should_reset = reset_changed == "yes"
                 if reset_changed == "ask":
                     should_reset = Confirm.ask(
@@ -854,9 +2093,10 @@ def update(
                     )
                 if should_reset:
                     fp.read_loc = 0
+                    fp.ranges = None
             # Always update metadata & clamp
-            fp.total_loc = new_total
-            fp.mtime_ns = new_mtime
+            fp.total_loc = new.total_loc
+            refresh_metadata(fp, new)
             fp.clamp()
 
     # Add any new files
@@ -866,40 +2106,669 @@ def update(
             f"\n[cyan]{len(new_files)} new files found.[/cyan] Adding as unread."
         )
         for rel in new_files:
-            total, mtime = scanned[rel]
-            items[rel] = FileProgress(rel, total, 0, mtime)
+            sf = scanned[rel]
+            items[rel] = FileProgress(
+                rel,
+                sf.total_loc,
+                0,
+                sf.mtime_ns,
+                sf.size,
+                sf.blob,
+                sf.lines,
+                locs=sf.locs,
+            )
 
-    save_state(
-        root,
-        items,
-        excludes=saved_excludes,
-        extensions=extensions,
-    )
+    session.extensions = extensions
+    session.save()
     total, read = totals(items)
     console.print(f"\nSaved. Total {read}/{total} LOC read.")
 
 
+class ChangeSummary(NamedTuple):
+    changed: List[str]
+    added: List[str]
+    removed: List[str]
+    # (old path, new path) of files renamed or moved within the batch.
+    moved: List[Tuple[str, str]]
+
+
+def apply_changes(
+    session: StateSession,
+    touched: Iterable[str],
+    exclude: List[str],
+    extensions: List[str],
+    loc_mode: str,
+    include_empty: bool = False,
+    reset_changed: bool = False,
+) -> ChangeSummary:
+    """
+    Bring the state up to date for the touched paths only. A touched
+    directory (or "" for the root) re-checks every file below it. Changed
+    files keep their progress (moved along with --track-lines fingerprints)
+    unless reset_changed; vanished files are dropped. A file that vanished
+    while one with the same signature and LOC appeared was renamed or
+    moved: the new path takes over its progress.
+    """
+    root = session.root
+    items = session.files
+    suffixes = tuple(f".{ext}" for ext in normalize_extensions(extensions))
+    matcher = ExcludeMatcher(exclude)
+    check: Dict[str, None] = {}
+    # Tracked files below a touched path that is not a file are re-checked
+    # too: a directory that was renamed or moved away drops its entries.
+    prefixes: List[str] = []
+    for rel in touched:
+        path = root / rel
+        check[rel] = None
+        if path.is_dir() and not path.is_symlink():
+            for sub, _ in iter_source_files(root, exclude, extensions, start=rel):
+                check[sub] = None
+        if not path.is_file():
+            prefixes.append(rel + "/" if rel else "")
+    if prefixes:
+        below = tuple(prefixes)
+        check.update(dict.fromkeys(r for r in items if r.startswith(below)))
+
+    session.switch_loc_mode(loc_mode)
+    sloc = loc_mode == "sloc" or counts_sloc(items)
+    found: List[FoundFile] = []
+    for rel in check:
+        if not rel.endswith(suffixes) or matcher.matches(rel):
+            continue
+        path = root / rel
+        try:
+            st = path.lstat()
+        except OSError:
+            continue
+        if not stat.S_ISREG(st.st_mode):
+            continue
+        prev = items.get(rel)
+        if prev is not None and not same_signature(prev, st.st_mtime_ns, st.st_size):
+            prev = None
+        scanned = ScannedFile(0, st.st_mtime_ns, st.st_size)
+        found.append(
+            found_file(rel, path, scanned, prev, loc_mode, session.track_lines, sloc)
+        )
+    reused = {rel for rel, _, _, reuse in found if reuse}
+    scanned_files = count_found(
+        found, loc_mode, include_empty, 1, session.track_lines, sloc
+    )
+
+    summary = ChangeSummary([], [], [], [])
+    added: List[str] = []
+    gone: Dict[Tuple[int, int, int], List[FileProgress]] = {}
+    for rel in check:
+        fp = items.get(rel)
+        new = scanned_files.get(rel)
+        if new is None:
+            if fp is not None:
+                old = items.pop(rel)
+                gone.setdefault((old.mtime_ns, old.size, old.total_loc), []).append(old)
+                summary.removed.append(rel)
+        elif fp is None:
+            items[rel] = FileProgress(
+                rel,
+                new.total_loc,
+                0,
+                new.mtime_ns,
+                new.size,
+                new.blob,
+                new.lines,
+                locs=new.locs,
+            )
+            added.append(rel)
+        elif rel in reused:
+            refresh_metadata(fp, new)
+        elif same_signature(fp, new.mtime_ns, new.size):
+            restate_entry(fp, new)
+        else:
+            if reset_changed:
+                fp.read_loc = 0
+                fp.ranges = None
+            else:
+                carry_read_lines(fp, new)
+            fp.total_loc = new.total_loc
+            refresh_metadata(fp, new)
+            fp.clamp()
+            summary.changed.append(rel)
+    for rel in added:
+        fp = items[rel]
+        olds = gone.get((fp.mtime_ns, fp.size, fp.total_loc))
+        if not olds:
+            summary.added.append(rel)
+            continue
+        old = olds.pop(0)
+        fp.read_loc = old.read_loc
+        fp.ranges = old.ranges
+        summary.moved.append((old.path, rel))
+    if summary.moved:
+        moved_from = {old for old, _ in summary.moved}
+        summary.removed[:] = [rel for rel in summary.removed if rel not in moved_from]
+    if summary.added or summary.removed or summary.changed or summary.moved:
+        # Its rollups are stale, and it may hold views of freed rows.
+        session._tree = None
+    return summary
+
+
+def state_signature(root: Path) -> Tuple[Tuple[int, int], ...]:
+    """
+    (mtime_ns, size) of each state file, to notice writes by other commands.
+    """
+    sig = []
+    for p in (state_path(root), journal_path(root), db_path(root)):
+        try:
+            st = p.stat()
+        except OSError:
+            sig.append((0, -1))
+        else:
+            sig.append((st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+@app.command()
+def watch(
+    root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
+    loc_mode: str = typer.Option("physical", help="LOC mode: physical|nonempty|sloc"),
+    exclude: List[str] = typer.Option(
+        None, "--exclude", help="Exclude glob for this run (repeatable)"
+    ),
+    ext: List[str] = typer.Option(
+        None,
+        "--ext",
+        help="Include file extension(s) for scan (repeatable), e.g. py",
+    ),
+    include_empty: bool = typer.Option(
+        False, "--include-empty", help="Include empty files (0 LOC) in scan"
+    ),
+    reset_changed: bool = typer.Option(
+        False, "--reset-changed", help="Reset progress for files that change"
+    ),
+    debounce: float = typer.Option(
+        0.3, help="Seconds of quiet before a burst of changes is applied"
+    ),
+    poll: bool = typer.Option(
+        False, "--poll", help="Poll with stat instead of using inotify"
+    ),
+    interval: float = typer.Option(1.0, help="Seconds between scans with --poll"),
+) -> None:
+    """
+    Keep the state up to date as files change, until interrupted.
+    """
+    from vibemark.watch import (
+        InotifyWatcher,
+        PollingWatcher,
+        WatchError,
+        next_batch,
+    )
+
+    root = resolve_root(root)
+    check_loc_mode(loc_mode)
+    session = require_session(root)
+    ex = DEFAULT_EXCLUDES + session.excludes + (exclude or [])
+    extensions = normalize_extensions(ext or session.extensions)
+    if not extensions:
+        raise typer.BadParameter("No extensions provided.")
+    session.extensions = extensions
+
+    def snapshot() -> Snapshot:
+        sig: Snapshot = {}
+        for rel, entry in iter_source_files(root, ex, extensions):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            sig[rel] = (st.st_mtime_ns, st.st_size)
+        return sig
+
+    watcher: Watcher
+    if poll or not sys.platform.startswith("linux"):
+        watcher = PollingWatcher(snapshot, interval)
+    else:
+        try:
+            watcher = InotifyWatcher(root, ExcludeMatcher(ex).can_prune)
+        except WatchError as exc:
+            console.print(f"[yellow]{exc}; falling back to polling.[/yellow]")
+            watcher = PollingWatcher(snapshot, interval)
+
+    def sync(touched: Iterable[str]) -> None:
+        nonlocal session
+        if state_signature(root) != saved:
+            # Another vibemark command wrote progress since our last save.
+            session = StateSession.load(root)
+            session.extensions = extensions
+        mode_changed = session.loc_mode != loc_mode
+        summary = apply_changes(
+            session, touched, ex, extensions, loc_mode, include_empty, reset_changed
+        )
+        if summary.changed or summary.added or summary.removed or summary.moved:
+            session.save()
+            total, read = totals(session.files)
+            console.print(
+                f"{len(summary.changed)} changed, {len(summary.added)} new, "
+                f"{len(summary.moved)} moved, {len(summary.removed)} removed. "
+                f"Total {read}/{total} LOC read."
+            )
+        elif mode_changed:
+            # The entries were restated in the new LOC mode.
+            session.save()
+
+    saved = state_signature(root)
+    with watcher:
+        # Catch up with edits made while nothing was watching.
+        sync([""])
+        saved = state_signature(root)
+        console.print(f"Watching {root} (Ctrl+C to stop)")
+        try:
+            while True:
+                touched = next_batch(watcher, debounce)
+                sync(touched)
+                saved = state_signature(root)
+        except KeyboardInterrupt:
+            console.print("Stopped.")
+
+
+def workspace_path(root: Path) -> Path:
+    return root / WORKSPACE_FILENAME
+
+
+def load_workspace(root: Path) -> List[str]:
+    """
+    Member roots listed in the workspace file, relative to root.
+    """
+    p = workspace_path(root)
+    if not p.exists():
+        return []
+    raw = json.loads(p.read_text(encoding="utf-8"))
+    members = raw.get("members", []) if isinstance(raw, dict) else []
+    if not isinstance(members, list):
+        return []
+    return [m for m in members if isinstance(m, str)]
+
+
+def save_workspace(root: Path, members: List[str]) -> None:
+    payload: Dict[str, object] = {
+        "version": 1,
+        "members": sorted(builtins.set(members)),
+    }
+    write_json_payload(workspace_path(root), payload)
+
+
+def require_workspace(root: Path) -> List[str]:
+    members = load_workspace(root)
+    if not members:
+        console.print(
+            "[yellow]No workspace members. Run[/yellow] vibemark workspace add"
+        )
+        raise typer.Exit(1)
+    return members
+
+
+class MemberReport(NamedTuple):
+    member: str
+    output: str = ""
+    total_loc: int = 0
+    read_loc: int = 0
+    files: int = 0
+    # Largest remaining files as (remaining, path, read_loc, total_loc),
+    # largest first.
+    top: Tuple[Tuple[int, str, int, int], ...] = ()
+    error: str = ""
+
+
+def map_members(
+    fn: Callable[..., MemberReport], calls: List[Tuple[Any, ...]], jobs: int
+) -> List[MemberReport]:
+    """
+    fn(*args) for each member's args, in input order. Members run in a
+    process pool, so parsing and counting in different roots overlap;
+    jobs=0 uses one process per CPU.
+    """
+    workers = min(jobs or os.cpu_count() or 1, len(calls))
+    if workers <= 1:
+        return [fn(*args) for args in calls]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, *zip(*calls)))
+
+
+@contextmanager
+def captured_console() -> Generator[io.StringIO, None, None]:
+    """
+    Send console output to a buffer while a member command runs.
+    """
+    global console
+    saved = console
+    buf = io.StringIO()
+    console = Console(file=buf, width=saved.width)
+    try:
+        yield buf
+    finally:
+        console = saved
+
+
+def member_report(
+    member: str, session: StateSession, top: int, output: str
+) -> MemberReport:
+    total, read = totals(session.files)
+    return MemberReport(
+        member,
+        output=output,
+        total_loc=total,
+        read_loc=read,
+        files=len(session.files),
+        top=tuple(
+            (fp.total_loc - fp.read_loc, fp.path, fp.read_loc, fp.total_loc)
+            for fp in top_remaining(session.files, top)
+        ),
+    )
+
+
+def has_state(root: Path) -> bool:
+    return state_path(root).exists() or uses_sqlite(root)
+
+
+def member_stats(member: str, root: str, top: int) -> MemberReport:
+    path = Path(root)
+    if not has_state(path):
+        return MemberReport(member, error="no state (run vibemark workspace scan)")
+    try:
+        return member_report(member, StateSession.load(path), top, "")
+    except Exception as exc:
+        return MemberReport(member, error=str(exc) or type(exc).__name__)
+
+
+def member_scan(member: str, root: str, loc_mode: str) -> MemberReport:
+    path = Path(root)
+    try:
+        with captured_console() as buf:
+            scan(
+                root=path,
+                loc_mode=loc_mode,
+                exclude=[],
+                ext=[],
+                include_empty=False,
+            )
+        return member_report(member, StateSession.load(path), 0, buf.getvalue())
+    except Exception as exc:
+        return MemberReport(member, error=str(exc) or type(exc).__name__)
+
+
+def member_update(member: str, root: str, reset_changed: bool) -> MemberReport:
+    """
+    Non-interactive update: changed files keep (or with reset_changed,
+    lose) their progress, vanished files are dropped.
+    """
+    path = Path(root)
+    if not has_state(path):
+        return MemberReport(member, error="no state (run vibemark workspace scan)")
+    try:
+        session = StateSession.load(path)
+        summary = apply_changes(
+            session,
+            [""],
+            DEFAULT_EXCLUDES + session.excludes,
+            normalize_extensions(session.extensions),
+            session.loc_mode or "physical",
+            reset_changed=reset_changed,
+        )
+        if summary.changed or summary.added or summary.removed or summary.moved:
+            session.save()
+        output = (
+            f"{len(summary.changed)} changed, {len(summary.added)} new, "
+            f"{len(summary.moved)} moved, {len(summary.removed)} removed."
+        )
+        return member_report(member, session, 0, output)
+    except Exception as exc:
+        return MemberReport(member, error=str(exc) or type(exc).__name__)
+
+
+def member_calls(root: Path, members: List[str], *args: Any) -> List[Tuple[Any, ...]]:
+    return [(member, str((root / member).resolve()), *args) for member in members]
+
+
+def merge_top(
+    reports: List[MemberReport], top: int
+) -> List[Tuple[int, str, int, int]]:
+    """
+    The largest remaining files across members. Each member's list is
+    already sorted, so a k-way merge takes the first `top` without
+    re-sorting everything.
+    """
+
+    def prefixed(report: MemberReport) -> Iterator[Tuple[int, str, int, int]]:
+        prefix = "" if report.member == "." else report.member + "/"
+        for remaining, path, read, total in report.top:
+            yield remaining, prefix + path, read, total
+
+    merged = heapq.merge(
+        *(prefixed(r) for r in reports), key=lambda row: row[0], reverse=True
+    )
+    return list(itertools.islice(merged, top))
+
+
+def print_member_outputs(reports: List[MemberReport]) -> None:
+    for report in reports:
+        console.print(f"[bold]{report.member}[/bold]", highlight=False)
+        if report.error:
+            console.print(f"  [red]{report.error}[/red]", highlight=False)
+        for line in report.output.splitlines():
+            console.print(f"  {line}", markup=False, highlight=False)
+    total = sum(r.total_loc for r in reports)
+    read = sum(r.read_loc for r in reports)
+    print_totals(read, total)
+
+
+WORKSPACE_JOBS_HELP = "Member roots processed in parallel (0 = one process per CPU)"
+
+
+@workspace_app.command("add")
+def workspace_add(
+    paths: List[str] = typer.Argument(..., help="Member root directories"),
+    root: Optional[Path] = typer.Option(None, help="Workspace root (default: cwd)"),
+) -> None:
+    """
+    Add member roots to .vibemark-workspace.json
+    """
+    root = resolve_root(root)
+    members = load_workspace(root)
+    added: List[str] = []
+    for arg in paths:
+        path = Path(arg)
+        if not path.is_absolute():
+            path = Path.cwd() / path
+        path = path.resolve()
+        if not path.is_dir():
+            raise typer.BadParameter(f"Not a directory: {arg}")
+        member = Path(os.path.relpath(path, root)).as_posix()
+        if member not in members and member not in added:
+            added.append(member)
+    save_workspace(root, members + added)
+    if added:
+        console.print("[green]Added members:[/green]")
+        for member in added:
+            console.print(f"- {member}", markup=False)
+    else:
+        console.print("[yellow]No new members added.[/yellow]")
+
+
+@workspace_app.command("remove")
+def workspace_remove(
+    members: List[str] = typer.Argument(..., help="Member roots as listed"),
+    root: Optional[Path] = typer.Option(None, help="Workspace root (default: cwd)"),
+) -> None:
+    """
+    Remove member roots from .vibemark-workspace.json
+    """
+    root = resolve_root(root)
+    current = load_workspace(root)
+    to_remove = {Path(m).as_posix().rstrip("/") for m in members}
+    remaining = [m for m in current if m not in to_remove]
+    removed = [m for m in current if m in to_remove]
+    save_workspace(root, remaining)
+    if removed:
+        console.print("[green]Removed members:[/green]")
+        for member in removed:
+            console.print(f"- {member}", markup=False)
+    else:
+        console.print("[yellow]No matching members found.[/yellow]")
+
+
+@workspace_app.command("list")
+def workspace_list(
+    root: Optional[Path] = typer.Option(None, help="Workspace root (default: cwd)"),
+) -> None:
+    """
+    List member roots.
+    """
+    root = resolve_root(root)
+    members = load_workspace(root)
+    if not members:
+        console.print("No workspace members.")
+        return
+    for member in members:
+        console.print(f"- {member}", markup=False)
+
+
+@workspace_app.command("stats")
+def workspace_stats(
+    root: Optional[Path] = typer.Option(None, help="Workspace root (default: cwd)"),
+    top: int = typer.Option(15, help="Show top N remaining by LOC across members"),
+    jobs: int = typer.Option(0, "--jobs", "-j", help=WORKSPACE_JOBS_HELP),
+) -> None:
+    """
+    Show combined progress of all members and their largest remaining files.
+    """
+    from rich import box
+    from rich.table import Table
+
+    root = resolve_root(root)
+    if top <= 0:
+        raise typer.BadParameter("--top must be > 0.")
+    if jobs < 0:
+        raise typer.BadParameter("--jobs must be >= 0.")
+    members = require_workspace(root)
+    reports = map_members(member_stats, member_calls(root, members, top), jobs)
+
+    t = Table(title="Workspace", box=box.SIMPLE)
+    t.add_column("Read", justify="right")
+    t.add_column("LOC", justify="right")
+    t.add_column("%", justify="right")
+    t.add_column("Files", justify="right")
+    t.add_column("Member", overflow="fold")
+    for r in reports:
+        if r.error:
+            t.add_row("", "", "", "", f"{r.member} [dim]({r.error})[/dim]")
+            continue
+        pct = (r.read_loc / r.total_loc * 100.0) if r.total_loc else 0.0
+        t.add_row(
+            str(r.read_loc), str(r.total_loc), f"{pct:.1f}", str(r.files), r.member
+        )
+    console.print(t)
+    print_totals(sum(r.read_loc for r in reports), sum(r.total_loc for r in reports))
+
+    rows = merge_top(reports, top)
+    if not rows:
+        return
+    t = Table(title=f"Top {top} remaining", box=box.SIMPLE)
+    t.add_column("Remaining", justify="right")
+    t.add_column("Read", justify="right")
+    t.add_column("LOC", justify="right")
+    t.add_column("File", overflow="fold")
+    for remaining, path, read, total in rows:
+        t.add_row(str(remaining), f"{read}/{total}", str(total), path)
+    console.print(t)
+
+
+@workspace_app.command("scan")
+def workspace_scan(
+    root: Optional[Path] = typer.Option(None, help="Workspace root (default: cwd)"),
+    loc_mode: str = typer.Option("physical", help="LOC mode: physical|nonempty|sloc"),
+    jobs: int = typer.Option(0, "--jobs", "-j", help=WORKSPACE_JOBS_HELP),
+) -> None:
+    """
+    Scan every member root, using each member's saved excludes and extensions.
+    """
+    root = resolve_root(root)
+    if jobs < 0:
+        raise typer.BadParameter("--jobs must be >= 0.")
+    members = require_workspace(root)
+    print_member_outputs(
+        map_members(member_scan, member_calls(root, members, loc_mode), jobs)
+    )
+
+
+@workspace_app.command("update")
+def workspace_update(
+    root: Optional[Path] = typer.Option(None, help="Workspace root (default: cwd)"),
+    reset_changed: bool = typer.Option(
+        False, "--reset-changed", help="Reset progress for files that changed"
+    ),
+    jobs: int = typer.Option(0, "--jobs", "-j", help=WORKSPACE_JOBS_HELP),
+) -> None:
+    """
+    Re-scan every member without prompting: changed files keep their
+    progress unless --reset-changed, and vanished files are dropped.
+    """
+    root = resolve_root(root)
+    if jobs < 0:
+        raise typer.BadParameter("--jobs must be >= 0.")
+    members = require_workspace(root)
+    print_member_outputs(
+        map_members(member_update, member_calls(root, members, reset_changed), jobs)
+    )
+
+
 @app.command()
 def export_md(
     root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
     header: str = typer.Option("## Review", help="Markdown header title"),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="Write to this file instead of stdout"
+    ),
 ) -> None:
     """
     Export a markdown checklist
     """
-    root = resolve_root(root)
-    items = require_state(root)
-
-    lines = [header, ""]
-    rows = sorted(items.values(), key=lambda fp: fp.path)
-    for fp in rows:
-        checked = "x" if fp.status == "done" else " "
-        extra = ""
-        if fp.status == "partial":
-            extra = f"  ({fp.read_loc}/{fp.total_loc} read)"
-        lines.append(f"- [{checked}] {fp.path}  {fp.total_loc} LOC{extra}")
-
-    console.print("\n".join(lines), markup=False)
+    run_export(resolve_root(root), "md", output, header)
+
+
+EXPORT_FORMATS = ("md", "jsonl", "html")
+
+
+@app.command()
+def export(
+    root: Optional[Path] = typer.Option(None, help="Repo root (default: cwd)"),
+    format: str = typer.Option("md", "--format", help="Output format: md|jsonl|html"),
+    output: Optional[Path] = typer.Option(
+        None, "--output", "-o", help="Write to this file instead of stdout"
+    ),
+    title: Optional[str] = typer.Option(
+        None, help="Title (default: '## Review' for md, 'vibemark review' for html)"
+    ),
+) -> None:
+    """
+    Export progress per file as a markdown checklist, JSON Lines or an HTML
+    report.
+    """
+    fmt = format.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise typer.BadParameter("--format must be md, jsonl, or html")
+    if title is None:
+        title = "## Review" if fmt == "md" else "vibemark review"
+    run_export(resolve_root(root), fmt, output, title)
+
+
+def run_export(root: Path, fmt: str, output: Optional[Path], title: str) -> None:
+    """
+    Stream one row per file, in path order, to output (or stdout) without
+    building the document or going through the Rich console.
+    """
+    from vibemark.export import FORMATS, export_rows, open_output
+
+    items = require_session(root).files
+    with open_output(output) as out:
+        FORMATS[fmt](out, export_rows(items), title)
 
 
 if __name__ == "__main__":
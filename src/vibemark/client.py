@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socket
+import sys
+from typing import Dict, List, Optional
+
+# Commands a running daemon answers; everything else runs in-process.
+FORWARDED = {"set", "done", "reset", "stats"}
+
+CONNECT_TIMEOUT = 0.5
+# A daemon that takes longer (stuck on the state lock, say) is given up
+# on, and the command runs in-process; set/done/reset are idempotent.
+REPLY_TIMEOUT = 10.0
+
+
+def find_root(argv: List[str]) -> str:
+    """
+    The root a command will run against: its --root option, else the cwd.
+    """
+    root = None
+    for i, arg in enumerate(argv):
+        if arg == "--root" and i + 1 < len(argv):
+            root = argv[i + 1]
+        elif arg.startswith("--root="):
+            root = arg.partition("=")[2]
+    return os.path.realpath(root or os.getcwd())
+
+
+def socket_path(root: str) -> str:
+    """
+    Per-user, per-root socket path in the runtime directory. Kept out of
+    the repo, and short enough for the AF_UNIX path limit.
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    digest = hashlib.sha1(os.fsencode(root)).hexdigest()[:16]
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(base, f"vibemark-{uid}-{digest}.sock")
+
+
+def send(root: str, message: Dict[str, object]) -> Optional[Dict[str, object]]:
+    """
+    Send one request to the daemon for root and return its reply, or None
+    when no daemon is listening or it does not answer in time.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(socket_path(root))
+            sock.settimeout(REPLY_TIMEOUT)
+            sock.sendall(json.dumps(message).encode("utf-8"))
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            while chunk := sock.recv(65536):
+                chunks.append(chunk)
+        reply = json.loads(b"".join(chunks))
+    except (OSError, ValueError):
+        return None
+    return reply if isinstance(reply, dict) else None
+
+
+def forward(argv: List[str]) -> Optional[int]:
+    """
+    Run argv on the daemon, printing its output. Returns the exit code, or
+    None when the command should run in-process instead.
+    """
+    if not argv or argv[0] not in FORWARDED or os.environ.get("VIBEMARK_NO_DAEMON"):
+        return None
+    if "--help" in argv or "-" in argv:
+        # Help text and stdin (--from-file -) belong to this process.
+        return None
+    try:
+        width: Optional[int] = os.get_terminal_size(sys.stdout.fileno()).columns
+    except (OSError, ValueError):
+        width = None
+    root = find_root(argv)
+    reply = send(
+        root,
+        {
+            "op": "run",
+            "argv": argv,
+            "cwd": os.getcwd(),
+            "root": root,
+            "color": sys.stdout.isatty(),
+            "width": width,
+        },
+    )
+    if reply is None or "code" not in reply:
+        return None
+    sys.stdout.write(str(reply.get("stdout", "")))
+    sys.stderr.write(str(reply.get("stderr", "")))
+    code = reply["code"]
+    return code if isinstance(code, int) else 1
+
+
+def main() -> None:
+    """
+    Console entry point: use the daemon when one is running for this root,
+    otherwise import the full CLI.
+    """
+    code = forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+    from vibemark.cli import app
+
+    app()
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from rich.console import Console
+
+from vibemark import cli
+from vibemark.client import FORWARDED, send, socket_path
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+@dataclass
+class CoalescingSession(cli.StateSession):
+    """
+    A session whose progress writes are held back and written together by
+    flush(), so a burst of set/done calls costs one journal append.
+    """
+
+    pending: Set[str] = field(default_factory=set)
+
+    def save_entries(self, rels: List[str]) -> None:
+        self.pending.update(rels)
+
+    def flush(self) -> None:
+        if self.pending:
+            rels = sorted(rel for rel in self.pending if rel in self.files)
+            self.pending.clear()
+            if rels:
+                super().save_entries(rels)
+
+
+class Daemon:
+    """
+    Serve forwarded commands for one root from a process that has the CLI
+    imported and the state parsed.
+
+    The session is reloaded whenever the state files change under it
+    (another command wrote them); pending writes are flushed first, at
+    most flush_delay seconds after the first one. With idle_timeout > 0 the
+    daemon exits after that many seconds without requests.
+    """
+
+    def __init__(
+        self, root: Path, flush_delay: float = 0.5, idle_timeout: float = 0.0
+    ) -> None:
+        self.root = root.resolve()
+        self.path = socket_path(str(self.root))
+        self.flush_delay = flush_delay
+        self.idle_timeout = idle_timeout
+        self.session: Optional[CoalescingSession] = None
+        self._signature: Tuple[Tuple[int, int], ...] = ()
+        self._dirty_since: Optional[float] = None
+        self._stopping = False
+
+    def _current(self) -> CoalescingSession:
+        signature = cli.state_signature(self.root)
+        if self.session is None or signature != self._signature:
+            self.flush()
+            self.session = CoalescingSession.load(self.root)
+            self._signature = cli.state_signature(self.root)
+            cli.warm_sessions[self.root] = self.session
+        return self.session
+
+    def flush(self) -> None:
+        if self.session is None or not self.session.pending:
+            return
+        # Only trust the cached state afterwards if nobody else wrote first.
+        fresh = cli.state_signature(self.root) == self._signature
+        self.session.flush()
+        self._signature = cli.state_signature(self.root) if fresh else ()
+        self._dirty_since = None
+
+    def handle(self, request: Dict[str, object]) -> Dict[str, object]:
+        op = request.get("op")
+        if op == "ping":
+            return {"pid": os.getpid(), "root": str(self.root)}
+        if op == "stop":
+            self._stopping = True
+            return {"stopped": True}
+        argv = request.get("argv")
+        if op != "run" or not isinstance(argv, list) or request.get("root") != str(
+            self.root
+        ):
+            return {"error": "unsupported request"}
+        if not argv or argv[0] not in FORWARDED:
+            return {"error": "command is not served by the daemon"}
+        return self._run([str(a) for a in argv], request)
+
+    def _run(self, argv: List[str], request: Dict[str, object]) -> Dict[str, object]:
+        session = self._current()
+        cwd = request.get("cwd")
+        if isinstance(cwd, str):
+            os.chdir(cwd)
+        width = request.get("width")
+        out, err = io.StringIO(), io.StringIO()
+        saved_console = cli.console
+        cli.console = Console(
+            force_terminal=bool(request.get("color")),
+            width=width if isinstance(width, int) else None,
+        )
+        code = 0
+        try:
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                try:
+                    cli.app(args=argv, prog_name="vibemark")
+                except SystemExit as exc:
+                    code = exc.code if isinstance(exc.code, int) else int(bool(exc.code))
+                except Exception:
+                    traceback.print_exc()
+                    code = 1
+        finally:
+            cli.console = saved_console
+        if session.pending and self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+        return {"code": code, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+    def _bind(self) -> socket.socket:
+        if send(str(self.root), {"op": "ping"}) is not None:
+            raise DaemonError(f"a daemon is already running for {self.root}")
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        sock.listen(16)
+        return sock
+
+    def _timeout(self, last_request: float) -> Optional[float]:
+        now = time.monotonic()
+        waits = []
+        if self._dirty_since is not None:
+            waits.append(self._dirty_since + self.flush_delay - now)
+        if self.idle_timeout > 0:
+            waits.append(last_request + self.idle_timeout - now)
+        return max(0.0, min(waits)) if waits else None
+
+    def serve(self) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonError("the daemon needs Unix domain sockets")
+        sock = self._bind()
+        if threading.current_thread() is threading.main_thread():
+            # Let `kill` flush pending writes too.
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        last_request = time.monotonic()
+        try:
+            while not self._stopping:
+                ready, _, _ = select.select([sock], [], [], self._timeout(last_request))
+                if not ready:
+                    self.flush()
+                    if (
+                        self.idle_timeout > 0
+                        and time.monotonic() - last_request >= self.idle_timeout
+                    ):
+                        break
+                    continue
+                conn, _ = sock.accept()
+                with conn:
+                    reply = self._serve_one(conn)
+                    with contextlib.suppress(OSError):
+                        conn.sendall(json.dumps(reply).encode("utf-8"))
+                last_request = time.monotonic()
+        finally:
+            self.flush()
+            sock.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+            cli.warm_sessions.pop(self.root, None)
+
+    def _serve_one(self, conn: socket.socket) -> Dict[str, object]:
+        chunks = []
+        while chunk := conn.recv(65536):
+            chunks.append(chunk)
+        try:
+            request = json.loads(b"".join(chunks))
+        except ValueError:
+            return {"error": "malformed request"}
+        if not isinstance(request, dict):
+            return {"error": "malformed request"}
+        return self.handle(request)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from vibemark.filetable import FileProgress
+
+
+class DirNode:
+    __slots__ = ("children", "files", "total_loc", "read_loc", "file_count")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, DirNode] = {}
+        # File name -> entry, for files directly in this directory.
+        self.files: Dict[str, FileProgress] = {}
+        # Rollups over the whole subtree.
+        self.total_loc = 0
+        self.read_loc = 0
+        self.file_count = 0
+
+
+class DirTree:
+    """
+    State entries arranged by directory, with read/total LOC and file
+    counts rolled up at every level.
+
+    Adding, removing or updating one entry touches only the nodes on its
+    path; looking up a directory walks its path, and listing its files
+    visits only its subtree.
+    """
+
+    def __init__(self, entries: Iterable[FileProgress] = ()) -> None:
+        self.root = DirNode()
+        for fp in entries:
+            self.add(fp)
+
+    def _path(self, rel: str, create: bool = False) -> Optional[List[DirNode]]:
+        """
+        Nodes from the root down to the directory holding rel.
+        """
+        nodes = [self.root]
+        for part in rel.split("/")[:-1]:
+            node = nodes[-1].children.get(part)
+            if node is None:
+                if not create:
+                    return None
+                node = nodes[-1].children[part] = DirNode()
+            nodes.append(node)
+        return nodes
+
+    @staticmethod
+    def _bump(nodes: List[DirNode], total: int, read: int, count: int) -> None:
+        for node in nodes:
+            node.total_loc += total
+            node.read_loc += read
+            node.file_count += count
+
+    def add(self, fp: FileProgress) -> None:
+        nodes = self._path(fp.path, create=True)
+        assert nodes is not None
+        name = fp.path.rsplit("/", 1)[-1]
+        old = nodes[-1].files.get(name)
+        if old is not None:
+            self._bump(nodes, -old.total_loc, -old.read_loc, -1)
+        nodes[-1].files[name] = fp
+        self._bump(nodes, fp.total_loc, fp.read_loc, 1)
+
+    def remove(self, rel: str) -> None:
+        nodes = self._path(rel)
+        if nodes is None:
+            return
+        fp = nodes[-1].files.pop(rel.rsplit("/", 1)[-1], None)
+        if fp is None:
+            return
+        self._bump(nodes, -fp.total_loc, -fp.read_loc, -1)
+        # Drop directories left without files.
+        parts = rel.split("/")[:-1]
+        for depth in range(len(parts), 0, -1):
+            if nodes[depth].file_count:
+                break
+            del nodes[depth - 1].children[parts[depth - 1]]
+
+    def update(self, fp: FileProgress, old_total: int, old_read: int) -> None:
+        """
+        Roll up a change to an entry already in the tree, given its
+        previous total_loc and read_loc.
+        """
+        nodes = self._path(fp.path)
+        if nodes is None:
+            return
+        self._bump(nodes, fp.total_loc - old_total, fp.read_loc - old_read, 0)
+
+    def find(self, rel_dir: str) -> Optional[DirNode]:
+        """
+        The node for a directory ("" is the root), or None.
+        """
+        rel_dir = rel_dir.strip("/")
+        if not rel_dir:
+            return self.root
+        nodes = self._path(rel_dir + "/")
+        return None if nodes is None else nodes[-1]
+
+    def iter_files(self, node: DirNode) -> Iterator[FileProgress]:
+        """
+        Entries under node: each directory's files by name, then its
+        subdirectories by name.
+        """
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for name in sorted(current.files):
+                yield current.files[name]
+            # Reversed so the smallest name is popped first.
+            for name in sorted(current.children, reverse=True):
+                stack.append(current.children[name])
+
+    def walk(
+        self, rel_dir: str = "", max_depth: Optional[int] = None
+    ) -> Iterator[Tuple[str, int, DirNode]]:
+        """
+        (path, depth, node) for the directory and the ones below it, depth
+        first in name order, down to max_depth levels (None = all).
+        """
+        start = self.find(rel_dir)
+        if start is None:
+            return
+        prefix = rel_dir.strip("/")
+        stack: List[Tuple[str, int, DirNode]] = [(prefix, 0, start)]
+        while stack:
+            path, depth, node = stack.pop()
+            yield path, depth, node
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for name in sorted(node.children, reverse=True):
+                child = f"{path}/{name}" if path else name
+                stack.append((child, depth + 1, node.children[name]))
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import fnmatch
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Pattern
+
+# fnmatch.fnmatch compares os.path.normcase()d strings, which on Windows
+# folds case and treats "/" and "\\" alike. Mirror that so compiled matching
+# agrees with is_excluded.
+_NORMCASE = os.path.normcase("A/") != "A/"
+_MAGIC = re.compile(r"[*?[]")
+
+
+def _norm_glob(glob: str) -> str:
+    return glob.replace("\\", "/").lower() if _NORMCASE else glob
+
+
+def _norm_path(rel: str) -> str:
+    rel = rel.replace("\\", "/")
+    return rel.lower() if _NORMCASE else rel
+
+
+class _PrefixNode:
+    __slots__ = ("children", "partials")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _PrefixNode] = {}
+        # Literal prefixes of the next path segment, e.g. "" for "dir/*".
+        self.partials: List[str] = []
+
+
+class ExcludeMatcher:
+    """
+    Exclude globs compiled once per run.
+
+    Matches exactly like is_excluded(): fnmatch against the posix-style
+    relative path, where "*" also matches "/". Globs that are literal, or a
+    literal prefix followed by "*" (the common "dir/*" shape), are answered
+    with a set lookup and a path-segment trie; the rest share one regex.
+    """
+
+    def __init__(self, globs: Iterable[str]) -> None:
+        self.globs = list(globs)
+        self._literals: set[str] = set()
+        self._prefixes = _PrefixNode()
+        self._has_prefixes = False
+        patterns: List[str] = []
+        prune_patterns: List[str] = []
+        for glob in self.globs:
+            g = _norm_glob(glob)
+            if not _MAGIC.search(g):
+                self._literals.add(g)
+                continue
+            stem = g.rstrip("*")
+            if stem != g and not _MAGIC.search(stem):
+                self._add_prefix(stem)
+                continue
+            patterns.append(fnmatch.translate(g))
+            if g.endswith("*"):
+                prune_patterns.append(fnmatch.translate(g))
+        self._regex = self._compile(patterns)
+        self._prune_regex = self._compile(prune_patterns)
+
+    @staticmethod
+    def _compile(patterns: List[str]) -> Optional[Pattern[str]]:
+        if not patterns:
+            return None
+        return re.compile("|".join(patterns))
+
+    def _add_prefix(self, prefix: str) -> None:
+        *dirs, partial = prefix.split("/")
+        node = self._prefixes
+        for part in dirs:
+            node = node.children.setdefault(part, _PrefixNode())
+        node.partials.append(partial)
+        self._has_prefixes = True
+
+    def _prefix_match(self, rel: str) -> bool:
+        node: Optional[_PrefixNode] = self._prefixes
+        for part in rel.split("/"):
+            assert node is not None
+            if node.partials and any(part.startswith(p) for p in node.partials):
+                return True
+            node = node.children.get(part)
+            if node is None:
+                return False
+        return False
+
+    def matches(self, rel: str) -> bool:
+        rel = _norm_path(rel)
+        if rel in self._literals:
+            return True
+        if self._has_prefixes and self._prefix_match(rel):
+            return True
+        return self._regex is not None and self._regex.match(rel) is not None
+
+    def can_prune(self, rel_dir: str) -> bool:
+        """
+        True when every path under rel_dir is excluded, so a walk can skip
+        the directory without listing it. A glob ending in "*" that matches
+        "rel_dir/" matches any longer path too.
+        """
+        prefix = _norm_path(rel_dir).rstrip("/") + "/"
+        if self._has_prefixes and self._prefix_match(prefix):
+            return True
+        return (
+            self._prune_regex is not None
+            and self._prune_regex.match(prefix) is not None
+        )
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import io
+import json
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+from vibemark.filetable import FileProgress, FileTable
+from vibemark.summary import file_status
+
+# (path, total_loc, read_loc)
+ExportRow = Tuple[str, int, int]
+
+BUFFER_BYTES = 1 << 16
+
+
+@contextmanager
+def open_output(path: Optional[Path]) -> Generator[TextIO, None, None]:
+    """
+    path opened for writing UTF-8 text with a large buffer, or stdout when
+    None, written through its byte buffer so a terminal does not get a
+    flush per line.
+    """
+    if path is not None:
+        with path.open("w", encoding="utf-8", buffering=BUFFER_BYTES) as f:
+            yield f
+        return
+    raw = getattr(sys.stdout, "buffer", None)
+    if raw is None:
+        yield sys.stdout
+        return
+    sys.stdout.flush()
+    out = io.TextIOWrapper(raw, encoding="utf-8", line_buffering=False)
+    try:
+        yield out
+    finally:
+        out.flush()
+        # Leave sys.stdout's buffer open for whatever writes next.
+        out.detach()
+
+
+def export_rows(items: Mapping[str, FileProgress]) -> Iterator[ExportRow]:
+    """
+    (path, total_loc, read_loc) of every entry, ordered by path. A
+    FileTable is read straight from its columns, one row at a time.
+    """
+    if isinstance(items, FileTable):
+        paths, total, read = items.columns()
+        order = sorted(range(len(paths)), key=paths.__getitem__)
+        return ((paths[i], total[i], read[i]) for i in order)
+    entries = sorted(items.values(), key=lambda fp: fp.path)
+    return ((fp.path, fp.total_loc, fp.read_loc) for fp in entries)
+
+
+def write_markdown(out: TextIO, rows: Iterable[ExportRow], title: str) -> None:
+    """
+    A checklist, one "- [ ] path  N LOC" line per file; done files are
+    ticked and partial ones show how much was read.
+    """
+    out.write(f"{title}\n\n")
+    out.writelines(_markdown_line(*row) for row in rows)
+
+
+def _markdown_line(path: str, total: int, read: int) -> str:
+    status = file_status(total, read)
+    if status == "done":
+        return f"- [x] {path}  {total} LOC\n"
+    if status == "partial":
+        return f"- [ ] {path}  {total} LOC  ({read}/{total} read)\n"
+    return f"- [ ] {path}  {total} LOC\n"
+
+
+def write_jsonl(out: TextIO, rows: Iterable[ExportRow], title: str) -> None:
+    """
+    One JSON object per file: path, status, read_loc, total_loc.
+    """
+    dumps = json.dumps
+    out.writelines(
+        f'{{"path": {dumps(path)}, "status": "{file_status(total, read)}", '
+        f'"read_loc": {read}, "total_loc": {total}}}\n'
+        for path, total, read in rows
+    )
+
+
+def write_html(out: TextIO, rows: Iterable[ExportRow], title: str) -> None:
+    """
+    A self-contained page: the rows are embedded as a JSON array and the
+    table is drawn in pages as it scrolls into view, so opening a report
+    with 100k files stays fast.
+    """
+    out.write(_HTML_HEAD.replace("{title}", _html_escape(title)))
+    first = True
+    for path, total, read in rows:
+        # "<" is escaped so a path can never close the script element.
+        cell = json.dumps(path).replace("<", "\\u003c")
+        out.write(f'{"" if first else ","}\n[{cell},{total},{read}]')
+        first = False
+    out.write(_HTML_TAIL)
+
+
+def _html_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+FORMATS: Dict[str, Callable[[TextIO, Iterable[ExportRow], str], None]] = {
+    "md": write_markdown,
+    "jsonl": write_jsonl,
+    "html": write_html,
+}
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body { font: 14px system-ui, sans-serif; margin: 2em; color: #222; }
+#summary { margin: 1em 0; }
+input { font: inherit; padding: 4px 8px; width: 24em; }
+table { border-collapse: collapse; margin-top: 1em; }
+th, td { padding: 2px 12px; text-align: right; }
+th { cursor: pointer; border-bottom: 1px solid #999; user-select: none; }
+td.path, th.path { text-align: left; font-family: ui-monospace, monospace; }
+tr.done td { color: #999; }
+.bar { display: inline-block; width: 80px; height: 8px; background: #eee; }
+.bar span { display: block; height: 100%; background: #4a4; }
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<div id="summary"></div>
+<input id="filter" placeholder="Filter by path">
+<table>
+<thead><tr>
+<th class="path" data-key="0">File</th><th data-key="3">Status</th>
+<th data-key="2">Read</th><th data-key="1">LOC</th>
+<th data-key="4">Remaining</th><th>Progress</th>
+</tr></thead>
+<tbody id="rows"></tbody>
+</table>
+<div id="more"></div>
+<script type="application/json" id="data">["""
+
+_HTML_TAIL = """
+]</script>
+<script>
+const STATUS = ["unread", "partial", "done"];
+const rows = JSON.parse(document.getElementById("data").textContent).map(
+  ([path, total, read]) => [
+    path, total, read, read <= 0 ? 0 : read >= total ? 2 : 1, total - read,
+  ]
+);
+const tbody = document.getElementById("rows");
+const more = document.getElementById("more");
+const PAGE = 500;
+let view = rows;
+let shown = 0;
+let sortKey = 0;
+let sortDir = 1;
+
+let total = 0, read = 0;
+const counts = [0, 0, 0];
+for (const r of rows) { total += r[1]; read += r[2]; counts[r[3]]++; }
+const pct = total ? (100 * read / total).toFixed(1) : "0.0";
+document.getElementById("summary").textContent =
+  `${read}/${total} LOC read (${pct}%) in ${rows.length} files: ` +
+  `${counts[2]} done, ${counts[1]} partial, ${counts[0]} unread.`;
+
+function cell(tr, text, cls) {
+  const td = tr.insertCell();
+  td.textContent = text;
+  if (cls) td.className = cls;
+}
+
+function drawPage() {
+  const end = Math.min(shown + PAGE, view.length);
+  const frag = document.createDocumentFragment();
+  for (; shown < end; shown++) {
+    const [path, total, read, status, remaining] = view[shown];
+    const tr = document.createElement("tr");
+    tr.className = STATUS[status];
+    cell(tr, path, "path");
+    cell(tr, STATUS[status]);
+    cell(tr, read);
+    cell(tr, total);
+    cell(tr, remaining);
+    const bar = tr.insertCell();
+    bar.innerHTML = '<span class="bar"><span></span></span>';
+    bar.firstChild.firstChild.style.width = (total ? 100 * read / total : 0) + "%";
+    frag.appendChild(tr);
+  }
+  tbody.appendChild(frag);
+  more.textContent = shown < view.length ? `${shown} of ${view.length} shown` : "";
+}
+
+function redraw() {
+  tbody.textContent = "";
+  shown = 0;
+  drawPage();
+}
+
+// Rows are added a page at a time whenever the end of the table is near.
+new IntersectionObserver((entries) => {
+  if (entries[0].isIntersecting && shown < view.length) drawPage();
+}, { rootMargin: "400px" }).observe(more);
+
+document.getElementById("filter").addEventListener("input", (e) => {
+  const q = e.target.value.toLowerCase();
+  view = q ? rows.filter((r) => r[0].toLowerCase().includes(q)) : rows;
+  redraw();
+});
+
+for (const th of document.querySelectorAll("th[data-key]")) {
+  th.addEventListener("click", () => {
+    const key = Number(th.dataset.key);
+    sortDir = key === sortKey ? -sortDir : key === 0 ? 1 : -1;
+    sortKey = key;
+    const cmp = (a, b) => (a[key] < b[key] ? -1 : a[key] > b[key] ? 1 : 0);
+    rows.sort((a, b) => sortDir * cmp(a, b) || (a[0] < b[0] ? -1 : 1));
+    const q = document.getElementById("filter").value.toLowerCase();
+    view = q ? rows.filter((r) => r[0].toLowerCase().includes(q)) : rows;
+    redraw();
+  });
+}
+
+redraw();
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,397 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, overload
+
+from vibemark.loc import LocCounts
+from vibemark.ranges import LineRanges
+from vibemark.summary import file_status
+
+T = TypeVar("T")
+
+# (path, total_loc, read_loc, mtime_ns, size, blob, lines, ranges, locs)
+EntryFields = Tuple[
+    str,
+    int,
+    int,
+    int,
+    int,
+    str,
+    Optional[array],
+    Optional[LineRanges],
+    Optional[LocCounts],
+]
+
+
+@dataclass(slots=True)
+class FileProgress:
+    path: str
+    total_loc: int
+    read_loc: int
+    mtime_ns: int
+    size: int = 0
+    # Git object ID of the content, when scanned with --source git.
+    blob: str = ""
+    # Per-line CRC32 fingerprint, when line tracking is enabled.
+    lines: Optional[array] = None
+    # Which lines were read, once progress is set by range. Without it,
+    # read_loc means "the first read_loc lines".
+    ranges: Optional[LineRanges] = None
+    # The file's LOC in every mode, as of its last read; total_loc is the
+    # one for the state's loc_mode.
+    locs: Optional[LocCounts] = None
+
+    @property
+    def status(self) -> str:
+        return file_status(self.total_loc, self.read_loc)
+
+    def clamp(self) -> None:
+        if self.total_loc < 0:
+            self.total_loc = 0
+        if self.ranges is not None:
+            self.ranges.clip(self.total_loc)
+            self.read_loc = self.ranges.count
+            if not self.ranges:
+                # Nothing left inside the file: the same as no ranges.
+                self.ranges = None
+        if self.read_loc < 0:
+            self.read_loc = 0
+        if self.read_loc > self.total_loc:
+            self.read_loc = self.total_loc
+
+
+def _fields(fp: FileProgress) -> Tuple[object, ...]:
+    return (
+        fp.path,
+        fp.total_loc,
+        fp.read_loc,
+        fp.mtime_ns,
+        fp.size,
+        fp.blob,
+        fp.lines,
+        fp.ranges,
+        fp.locs,
+    )
+
+
+class FileRow(FileProgress):
+    """
+    A FileProgress whose fields live in one row of a FileTable: reading or
+    assigning an attribute goes straight to the table's columns.
+    """
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: FileTable, row: int) -> None:
+        self._table = table
+        self._row = row
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FileProgress):
+            return NotImplemented
+        return _fields(self) == _fields(other)
+
+    @property
+    def path(self) -> str:  # type: ignore[override]
+        return self._table._paths[self._row]
+
+    @path.setter
+    def path(self, value: str) -> None:
+        # The path is the entry's key in the table.
+        raise AttributeError("a FileRow's path cannot be changed")
+
+    @property
+    def total_loc(self) -> int:  # type: ignore[override]
+        return self._table.total_loc[self._row]
+
+    @total_loc.setter
+    def total_loc(self, value: int) -> None:
+        self._table.total_loc[self._row] = value
+
+    @property
+    def read_loc(self) -> int:  # type: ignore[override]
+        return self._table.read_loc[self._row]
+
+    @read_loc.setter
+    def read_loc(self, value: int) -> None:
+        self._table.read_loc[self._row] = value
+
+    @property
+    def mtime_ns(self) -> int:  # type: ignore[override]
+        return self._table.mtime_ns[self._row]
+
+    @mtime_ns.setter
+    def mtime_ns(self, value: int) -> None:
+        self._table.mtime_ns[self._row] = value
+
+    @property
+    def size(self) -> int:  # type: ignore[override]
+        return self._table.size[self._row]
+
+    @size.setter
+    def size(self, value: int) -> None:
+        self._table.size[self._row] = value
+
+    @property
+    def blob(self) -> str:  # type: ignore[override]
+        return self._table._blobs.get(self._row, "")
+
+    @blob.setter
+    def blob(self, value: str) -> None:
+        _set_sparse(self._table._blobs, self._row, value)
+
+    @property
+    def lines(self) -> Optional[array]:  # type: ignore[override]
+        return self._table._lines.get(self._row)
+
+    @lines.setter
+    def lines(self, value: Optional[array]) -> None:
+        _set_sparse(self._table._lines, self._row, value)
+
+    @property
+    def ranges(self) -> Optional[LineRanges]:  # type: ignore[override]
+        return self._table._ranges.get(self._row)
+
+    @ranges.setter
+    def ranges(self, value: Optional[LineRanges]) -> None:
+        _set_sparse(self._table._ranges, self._row, value)
+
+    @property
+    def locs(self) -> Optional[LocCounts]:  # type: ignore[override]
+        return self._table.row_locs(self._row)
+
+    @locs.setter
+    def locs(self, value: Optional[LocCounts]) -> None:
+        self._table.set_locs(self._row, value)
+
+
+_NO_LOCS = (None, None, None)
+
+
+def _set_sparse(column: Dict[int, T], row: int, value: Optional[T]) -> None:
+    # An empty lines array is a real value (a file with no lines); only
+    # None and the empty blob mean "not set".
+    if value is None or value == "":
+        column.pop(row, None)
+    else:
+        column[row] = value
+
+
+class FileTable(MutableMapping[str, FileProgress]):
+    """
+    State entries by path, stored by column instead of one object per file.
+
+    Each path is kept once, in a row table; total_loc, read_loc, mtime_ns,
+    size and the count in each LOC mode (-1 when not counted) are parallel
+    array('q') columns, and blob, lines and ranges (absent for most files)
+    live in dicts keyed by row. Looking an entry
+    up returns a FileRow view, so code written against a plain dict of
+    FileProgress works unchanged. Rows never move, so views of live
+    entries stay valid. Deleting an entry frees its row for the next new
+    path, which keeps long-lived tables from growing with churn; pop
+    returns a detached FileProgress for that reason.
+    """
+
+    def __init__(self, entries: Iterable[FileProgress] = ()) -> None:
+        self._rows: Dict[str, int] = {}
+        self._paths: List[str] = []
+        self.total_loc = array("q")
+        self.read_loc = array("q")
+        self.mtime_ns = array("q")
+        self.size = array("q")
+        self.mode_loc = {mode: array("q") for mode in LocCounts._fields}
+        self._blobs: Dict[int, str] = {}
+        self._lines: Dict[int, array] = {}
+        self._ranges: Dict[int, LineRanges] = {}
+        self._free: List[int] = []
+        # False once a freed row went to a new path: mapping order then no
+        # longer follows row order.
+        self._in_row_order = True
+        for fp in entries:
+            self[fp.path] = fp
+
+    def __getitem__(self, path: str) -> FileProgress:
+        return FileRow(self, self._rows[path])
+
+    def __setitem__(self, path: str, fp: FileProgress) -> None:
+        row = self._rows.get(path)
+        if row is None and self._free:
+            row = self._rows[path] = self._free.pop()
+            self._paths[row] = path
+            self._in_row_order = False
+        if row is not None:
+            self.total_loc[row] = fp.total_loc
+            self.read_loc[row] = fp.read_loc
+            self.mtime_ns[row] = fp.mtime_ns
+            self.size[row] = fp.size
+            self.set_locs(row, fp.locs)
+            _set_sparse(self._blobs, row, fp.blob)
+            _set_sparse(self._lines, row, fp.lines)
+            _set_sparse(self._ranges, row, fp.ranges)
+            return
+        # New row: the sparse columns have nothing to clear.
+        row = self._rows[path] = len(self._paths)
+        self._paths.append(path)
+        self.total_loc.append(fp.total_loc)
+        self.read_loc.append(fp.read_loc)
+        self.mtime_ns.append(fp.mtime_ns)
+        self.size.append(fp.size)
+        locs = fp.locs or _NO_LOCS
+        for column, value in zip(self.mode_loc.values(), locs):
+            column.append(-1 if value is None else value)
+        if fp.blob:
+            self._blobs[row] = fp.blob
+        if fp.lines is not None:
+            self._lines[row] = fp.lines
+        if fp.ranges is not None:
+            self._ranges[row] = fp.ranges
+
+    def __delitem__(self, path: str) -> None:
+        row = self._rows.pop(path)
+        self._blobs.pop(row, None)
+        self._lines.pop(row, None)
+        self._ranges.pop(row, None)
+        self._free.append(row)
+
+    @overload
+    def pop(self, path: str, /) -> FileProgress: ...
+
+    @overload
+    def pop(self, path: str, default: T, /) -> FileProgress | T: ...
+
+    def pop(self, path: str, *default: object) -> object:
+        """
+        Remove path and return its entry as a detached FileProgress, as
+        the row may be reused.
+        """
+        row = self._rows.get(path)
+        if row is None:
+            if default:
+                return default[0]
+            raise KeyError(path)
+        fp = FileProgress(*self.row_fields(row))
+        del self[path]
+        return fp
+
+    @overload
+    def get(self, path: object, /) -> Optional[FileProgress]: ...
+
+    @overload
+    def get(self, path: object, default: FileProgress, /) -> FileProgress: ...
+
+    @overload
+    def get(self, path: object, default: T, /) -> FileProgress | T: ...
+
+    def get(self, path: object, default: object = None) -> object:
+        row = self._rows.get(path) if isinstance(path, str) else None
+        return default if row is None else FileRow(self, row)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __repr__(self) -> str:
+        return f"FileTable({len(self)} files)"
+
+    def values(self) -> ValuesView[FileProgress]:
+        return _TableValues(self)
+
+    def items(self) -> ItemsView[str, FileProgress]:
+        return _TableItems(self)
+
+    def row_locs(self, row: int) -> Optional[LocCounts]:
+        physical, nonempty, sloc = (col[row] for col in self.mode_loc.values())
+        if physical < 0:
+            return None
+        return LocCounts(physical, nonempty, None if sloc < 0 else sloc)
+
+    def set_locs(self, row: int, locs: Optional[LocCounts]) -> None:
+        for column, value in zip(self.mode_loc.values(), locs or _NO_LOCS):
+            column[row] = -1 if value is None else value
+
+    def has_counts(self, mode: str) -> bool:
+        """
+        Whether any entry has a saved count for this LOC mode.
+        """
+        column = self.mode_loc[mode]
+        return any(column[row] >= 0 for row in self._rows.values())
+
+    def locs(self) -> Iterator[Tuple[int, int]]:
+        """
+        (total_loc, read_loc) of every entry, straight from the columns.
+        """
+        if len(self._rows) == len(self._paths):
+            return zip(self.total_loc, self.read_loc)
+        total, read = self.total_loc, self.read_loc
+        return ((total[row], read[row]) for row in self._rows.values())
+
+    def totals(self) -> Tuple[int, int]:
+        if len(self._rows) == len(self._paths):
+            return sum(self.total_loc), sum(self.read_loc)
+        total = read = 0
+        for t, r in self.locs():
+            total += t
+            read += r
+        return total, read
+
+    def columns(self) -> Tuple[List[str], array, array]:
+        """
+        Paths with their total_loc and read_loc columns, in mapping order.
+        While no row was removed or reused these are the table's own
+        arrays; do not modify them.
+        """
+        if self._in_row_order and len(self._rows) == len(self._paths):
+            return list(self._rows), self.total_loc, self.read_loc
+        rows = self._rows.values()
+        total, read = self.total_loc, self.read_loc
+        return (
+            list(self._rows),
+            array("q", (total[row] for row in rows)),
+            array("q", (read[row] for row in rows)),
+        )
+
+    def row_fields(self, row: int) -> EntryFields:
+        return (
+            self._paths[row],
+            self.total_loc[row],
+            self.read_loc[row],
+            self.mtime_ns[row],
+            self.size[row],
+            self._blobs.get(row, ""),
+            self._lines.get(row),
+            self._ranges.get(row),
+            self.row_locs(row),
+        )
+
+    def rows_by_path(self) -> Iterator[EntryFields]:
+        """
+        The fields of every entry as plain tuples, ordered by path.
+        """
+        row_fields = self.row_fields
+        for _, row in sorted(self._rows.items()):
+            yield row_fields(row)
+
+
+class _TableValues(ValuesView[FileProgress]):
+    _mapping: FileTable
+
+    def __iter__(self) -> Iterator[FileProgress]:
+        table = self._mapping
+        for row in table._rows.values():
+            yield FileRow(table, row)
+
+
+class _TableItems(ItemsView[str, FileProgress]):
+    _mapping: FileTable
+
+    def __iter__(self) -> Iterator[Tuple[str, FileProgress]]:
+        table = self._mapping
+        for path, row in table._rows.items():
+            yield path, FileRow(table, row)
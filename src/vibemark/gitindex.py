@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Index entry modes that are not regular files: symlinks and submodules.
+_SKIP_MODES = {"120000", "160000"}
+
+
+class GitError(RuntimeError):
+    pass
+
+
+def _git(root: Path, *args: str, stdin: Optional[str] = None) -> str:
+    try:
+        proc = subprocess.run(
+            ["git", *args],
+            cwd=root,
+            input=stdin,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="surrogateescape",
+            check=False,
+        )
+    except OSError as exc:
+        raise GitError(f"could not run git: {exc}") from exc
+    if proc.returncode != 0:
+        raise GitError(proc.stderr.strip() or f"git {args[0]} failed")
+    return proc.stdout
+
+
+def tracked_blobs(root: Path) -> Dict[str, str]:
+    """
+    Map each regular file tracked under root (relative posix path) to the
+    object ID of its working-tree content.
+
+    IDs come from the index (`git ls-files -s`). Files modified since they
+    were staged are re-hashed with `git hash-object`; files deleted from the
+    working tree are left out.
+    """
+    blobs: Dict[str, str] = {}
+    for record in _git(root, "ls-files", "-s", "-z").split("\0"):
+        if not record:
+            continue
+        meta, _, rel = record.partition("\t")
+        mode, blob, _stage = meta.split(" ")
+        if mode in _SKIP_MODES:
+            continue
+        blobs[rel] = blob
+
+    modified = dict.fromkeys(
+        rel
+        for rel in _git(root, "ls-files", "-m", "-z").split("\0")
+        if rel in blobs
+    )
+    present: List[str] = []
+    for rel in modified:
+        if (root / rel).is_file():
+            present.append(rel)
+        else:
+            del blobs[rel]
+    if present:
+        hashed = _git(
+            root, "hash-object", "--stdin-paths", stdin="\n".join(present) + "\n"
+        ).split()
+        blobs.update(zip(present, hashed))
+    return blobs
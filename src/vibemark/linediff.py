@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import base64
+import difflib
+import sys
+import zlib
+from array import array
+from pathlib import Path
+from typing import List, Tuple
+
+from vibemark.loc import LocCounts, strip_source
+from vibemark.ranges import LineRanges
+
+# One unsigned 32-bit CRC per counted line.
+HASH_TYPECODE = "I"
+
+
+def hashes_and_counts(
+    path: Path, mode: str = "physical", sloc: bool = False
+) -> Tuple[array, LocCounts]:
+    """
+    Fingerprint the lines count_loc would count in this mode, one CRC32
+    per line, together with the file's counts in every mode (sloc only
+    with sloc or in sloc mode), from a single read.
+    """
+    sloc = sloc or mode == "sloc"
+    try:
+        data = path.read_bytes()
+    except Exception:
+        return array(HASH_TYPECODE), LocCounts(0, 0, 0 if sloc else None)
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    content = [ln for ln in lines if ln.strip()]
+    counts = LocCounts(len(lines), len(content))
+    code: List[str] = []
+    if sloc:
+        text = strip_source(data, path.name).decode("utf-8", errors="replace")
+        code = [ln for ln in text.splitlines() if ln.strip()]
+        counts = counts._replace(sloc=len(code))
+    counted = code if mode == "sloc" else content if mode == "nonempty" else lines
+    hashes = array(HASH_TYPECODE, (zlib.crc32(ln.encode("utf-8")) for ln in counted))
+    return hashes, counts
+
+
+def encode_hashes(hashes: array) -> str:
+    """
+    Serialize a fingerprint as base64 of little-endian 32-bit ints.
+    """
+    if sys.byteorder == "big":
+        hashes = array(HASH_TYPECODE, hashes)
+        hashes.byteswap()
+    return base64.b64encode(hashes.tobytes()).decode("ascii")
+
+
+def decode_hashes(data: str) -> array:
+    hashes = array(HASH_TYPECODE)
+    hashes.frombytes(base64.b64decode(data))
+    if sys.byteorder == "big":
+        hashes.byteswap()
+    return hashes
+
+
+def _common_prefix(a: array, b: array) -> int:
+    # Binary search on slice equality keeps the comparisons in C.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a: array, b: array, limit: int) -> int:
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid :] == b[len(b) - mid :]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def matching_blocks(old: array, new: array) -> List[Tuple[int, int, int]]:
+    """
+    (old_start, new_start, size) runs of lines shared by old and new, in order.
+
+    The unchanged head and tail are matched first; only the region in
+    between goes through difflib, so the cost follows the size of the edit.
+    """
+    prefix = _common_prefix(old, new)
+    suffix = _common_suffix(old, new, min(len(old), len(new)) - prefix)
+    blocks = [(0, 0, prefix)] if prefix else []
+    old_end, new_end = len(old) - suffix, len(new) - suffix
+    if prefix < old_end and prefix < new_end:
+        matcher = difflib.SequenceMatcher(
+            None, old[prefix:old_end], new[prefix:new_end], autojunk=False
+        )
+        for a, b, size in matcher.get_matching_blocks():
+            if size:
+                blocks.append((prefix + a, prefix + b, size))
+    if suffix:
+        blocks.append((old_end, new_end, suffix))
+    return blocks
+
+
+def surviving_lines(old: array, new: array, read_loc: int) -> int:
+    """
+    How many of the first read_loc old lines still appear in new.
+    """
+    if read_loc <= 0:
+        return 0
+    if old[:read_loc] == new[:read_loc]:
+        return min(read_loc, len(old))
+    return sum(
+        max(0, min(a + size, read_loc) - a) for a, _, size in matching_blocks(old, new)
+    )
+
+
+def remap_ranges(old: array, new: array, ranges: LineRanges) -> LineRanges:
+    """
+    Carry read line ranges from old over to the matching lines in new;
+    lines that were edited or deleted drop out.
+    """
+    out = LineRanges()
+    for a, b, size in matching_blocks(old, new):
+        for start, end in ranges.overlapping(a, a + size):
+            out.add(start - a + b, end - a + b)
+    return out
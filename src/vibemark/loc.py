@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import io
+import re
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional, Tuple
+
+from vibemark.sloc import language_for, strip_comments
+
+CHUNK_SIZE = 1 << 20
+
+LOC_MODES = ("physical", "nonempty", "sloc")
+
+# Every character str.splitlines() breaks on, as UTF-8 bytes.
+_BREAK_BYTES = b"\n\r\x0b\x0c\x1c\x1d\x1e"
+_BREAK_TABLE = bytes.maketrans(_BREAK_BYTES, b"\n" * len(_BREAK_BYTES))
+_MULTIBYTE_BREAK = re.compile(rb"\xc2\x85|\xe2\x80[\xa8\xa9]")
+# Breaks become "\n" and every other byte "x", so a line start is b"\nx".
+_CONTENT_TABLE = bytes(0x0A if b in _BREAK_BYTES else 0x78 for b in range(256))
+
+# Non-breaking characters str.strip() removes, as UTF-8 bytes.
+_INLINE_SPACE = b" \t\x1f"
+_MULTIBYTE_SPACE = re.compile(
+    rb"\xc2\xa0|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xaf]|\xe2\x81\x9f|\xe3\x80\x80"
+)
+
+
+def _split_point(data: bytes) -> int:
+    """
+    Length of the prefix of data that is safe to count on its own: a trailing
+    "\\r" (maybe half of "\\r\\n") or partial UTF-8 sequence is held back.
+    """
+    n = len(data)
+    if n >= 2 and data[-2] >= 0xE0 and 0x80 <= data[-1] < 0xC0:
+        return n - 2
+    if n >= 1 and (data[-1] >= 0xC0 or data[-1] == 0x0D):
+        return n - 1
+    return n
+
+
+def _normalize(seg: bytes, strip_spaces: bool) -> bytes:
+    """
+    Map every line break in seg to a single "\\n". With strip_spaces, also
+    drop whitespace that does not break lines and map all content to "x".
+    """
+    if b"\r" in seg:
+        seg = seg.replace(b"\r\n", b"\n")
+    if not seg.isascii():
+        seg = _MULTIBYTE_BREAK.sub(b"\n", seg)
+        if strip_spaces:
+            seg = _MULTIBYTE_SPACE.sub(b"", seg)
+    if strip_spaces:
+        return seg.translate(_CONTENT_TABLE, _INLINE_SPACE)
+    return seg.translate(_BREAK_TABLE)
+
+
+def count_lines(stream: BinaryIO, mode: str = "physical") -> int:
+    """
+    Count lines in a binary stream, chunk by chunk, without decoding.
+
+    Gives the same result as len(text.splitlines()) (physical) or the number
+    of lines with non-whitespace content (nonempty) for the text that
+    read_text(encoding="utf-8", errors="replace") would return.
+    """
+    nonempty = mode == "nonempty"
+    count = 0
+    # Whether the last normalized byte seen so far is part of a line's content.
+    open_line = False
+    carry = b""
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        data = carry + chunk
+        if not data:
+            break
+        cut = _split_point(data) if chunk else len(data)
+        seg, carry = data[:cut], data[cut:]
+        seg = _normalize(seg, strip_spaces=nonempty)
+        if seg:
+            if nonempty:
+                count += seg.count(b"\nx")
+                if not open_line and seg[0] != 0x0A:
+                    count += 1
+            else:
+                count += seg.count(b"\n")
+            open_line = seg[-1] != 0x0A
+        if not chunk:
+            break
+    if open_line and not nonempty:
+        count += 1
+    return count
+
+
+def count_lines_both(stream: BinaryIO) -> Tuple[int, int]:
+    """
+    (physical, nonempty) line counts of a binary stream in one pass, equal
+    to count_lines in each mode.
+    """
+    physical = nonempty = 0
+    # Whether the last normalized byte seen so far is part of a line's content.
+    open_content = False
+    carry = last = b""
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        data = carry + chunk
+        if not data:
+            break
+        cut = _split_point(data) if chunk else len(data)
+        seg, carry = data[:cut], data[cut:]
+        # Dropping inline whitespace keeps every break, so one normalized
+        # copy gives both counts.
+        content = _normalize(seg, strip_spaces=True)
+        if content:
+            physical += content.count(b"\n")
+            nonempty += content.count(b"\nx")
+            if not open_content and content[0] != 0x0A:
+                nonempty += 1
+            open_content = content[-1] != 0x0A
+        if seg:
+            last = seg
+        if not chunk:
+            break
+    # A last line without a break still counts, even if it is only spaces.
+    if last and _normalize(last[-3:], strip_spaces=False)[-1] != 0x0A:
+        physical += 1
+    return physical, nonempty
+
+
+class LocCounts(NamedTuple):
+    """
+    A file's line count in every LOC mode, from one read. sloc is None when
+    it was not counted (it costs several times more than the others).
+    """
+
+    physical: int
+    nonempty: int
+    sloc: Optional[int] = None
+
+    def for_mode(self, mode: str) -> Optional[int]:
+        if mode not in LOC_MODES:
+            raise ValueError(f"Unknown LOC mode: {mode}")
+        return getattr(self, mode)
+
+    def format(self) -> str:
+        """
+        The counts as "physical,nonempty[,sloc]", for the state file.
+        """
+        return ",".join(str(n) for n in self if n is not None)
+
+    @classmethod
+    def parse(cls, text: str) -> LocCounts:
+        values = [int(part) for part in text.split(",")]
+        if len(values) not in (2, 3) or min(values) < 0:
+            raise ValueError(f"Invalid LOC counts: {text!r}")
+        return cls(*values)
+
+
+def count_all(path: Path, sloc: bool = False) -> LocCounts:
+    """
+    physical and nonempty counts (and with sloc, the sloc count) of a file,
+    reading it once. Unreadable files count as empty.
+    """
+    try:
+        if not sloc:
+            with path.open("rb") as f:
+                return LocCounts(*count_lines_both(f))
+        # The whole file is in memory anyway: normalize its breaks once and
+        # take every count from that copy.
+        data = _normalize(path.read_bytes(), strip_spaces=False)
+        physical = data.count(b"\n") + (data[-1:] not in (b"", b"\n"))
+        nonempty = _count_nonempty(data)
+        language = language_for(path.name)
+        if language is None:
+            return LocCounts(physical, nonempty, nonempty)
+        code = strip_comments(data, language)
+        return LocCounts(physical, nonempty, _count_nonempty(code))
+    except Exception:
+        return LocCounts(0, 0, 0 if sloc else None)
+
+
+def _count_nonempty(data: bytes) -> int:
+    """
+    Lines with content in data, whose breaks are already all "\n".
+    """
+    if not data.isascii():
+        data = _MULTIBYTE_SPACE.sub(b"", data)
+    content = data.translate(_CONTENT_TABLE, _INLINE_SPACE)
+    return content.count(b"\nx") + (content[:1] not in (b"", b"\n"))
+
+
+def strip_source(data: bytes, name: str) -> bytes:
+    """
+    data with every line break as "\\n" and, when the extension of the
+    file name has a scanner (see vibemark.sloc), comments and docstrings
+    removed.
+    """
+    data = _normalize(data, strip_spaces=False)
+    language = language_for(name)
+    return data if language is None else strip_comments(data, language)
+
+
+def sloc_bytes(path: Path) -> bytes:
+    return strip_source(path.read_bytes(), path.name)
+
+
+def count_loc(path: Path, mode: str = "physical") -> int:
+    """
+    mode:
+      - physical: count all lines
+      - nonempty: count non-empty lines
+      - sloc: count non-empty lines that are not only comments or
+        docstrings (nonempty for languages without a scanner)
+    """
+    try:
+        if mode == "sloc":
+            return count_lines(io.BytesIO(sloc_bytes(path)), mode="nonempty")
+        with path.open("rb") as f:
+            return count_lines(f, mode=mode)
+    except Exception:
+        return 0
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, Tuple
+
+
+class LineRanges:
+    """
+    A set of 0-based line numbers kept as sorted, disjoint, non-touching
+    half-open intervals [start, end).
+
+    Bounds live in one flat array('q') (starts at even indices, ends at odd
+    ones), so adding a range is two bisects plus one slice assignment, and
+    count (the number of lines covered) is maintained incrementally.
+    """
+
+    __slots__ = ("_bounds", "count")
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()) -> None:
+        self._bounds = array("q")
+        self.count = 0
+        for start, end in intervals:
+            self.add(start, end)
+
+    def add(self, start: int, end: int) -> None:
+        start = max(start, 0)
+        if end <= start:
+            return
+        b = self._bounds
+        # Intervals first..last overlap or touch [start, end).
+        first = bisect_left(b, start) // 2
+        hi = bisect_right(b, end)
+        last = hi // 2 if hi % 2 else hi // 2 - 1
+        if first <= last:
+            removed = sum(b[2 * k + 1] - b[2 * k] for k in range(first, last + 1))
+            start = min(start, b[2 * first])
+            end = max(end, b[2 * last + 1])
+        else:
+            removed = 0
+        b[2 * first : 2 * last + 2] = array("q", (start, end))
+        self.count += (end - start) - removed
+
+    def clip(self, limit: int) -> None:
+        """
+        Drop every line at or beyond limit.
+        """
+        b = self._bounds
+        p = bisect_left(b, limit)
+        if p % 2:
+            b[p] = limit
+            del b[p + 1 :]
+        else:
+            del b[p:]
+        self.count = sum(b[1::2]) - sum(b[::2])
+
+    def overlapping(self, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        """
+        The parts of the set that fall inside [start, end).
+        """
+        b = self._bounds
+        k = bisect_right(b, start) // 2
+        while 2 * k < len(b) and b[2 * k] < end:
+            lo, hi = max(b[2 * k], start), min(b[2 * k + 1], end)
+            if lo < hi:
+                yield lo, hi
+            k += 1
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        b = self._bounds
+        return zip(b[::2], b[1::2])
+
+    def __len__(self) -> int:
+        return len(self._bounds) // 2
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LineRanges):
+            return NotImplemented
+        return self._bounds == other._bounds
+
+    def __repr__(self) -> str:
+        return f"LineRanges({str(self)!r})"
+
+    def __str__(self) -> str:
+        """
+        1-based inclusive form, e.g. "1-20,400-600,712".
+        """
+        return ",".join(
+            str(end) if end - start == 1 else f"{start + 1}-{end}"
+            for start, end in self
+        )
+
+    @classmethod
+    def parse(cls, text: str) -> LineRanges:
+        """
+        Parse the 1-based inclusive form produced by str(). Raises ValueError.
+        """
+        ranges = cls()
+        for part in text.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            first, sep, last = part.partition("-")
+            lo = int(first)
+            hi = int(last) if sep else lo
+            if lo < 1 or hi < lo:
+                raise ValueError(f"invalid line range: {part}")
+            ranges.add(lo - 1, hi)
+        return ranges
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, Dict, List, Optional, Pattern, Tuple
+
+
+def _scanner(strings: List[bytes], comments: List[bytes]) -> Pattern[bytes]:
+    """
+    One regex matching any string or comment of a language. Every
+    alternative starts with a fixed byte, so re can skip plain code without
+    trying them. Strings are captured from their second byte on (which
+    keeps that first byte a literal), as is the first line break of a
+    multi-line comment: re.split then hands back exactly the text that
+    stays, all in C. Repeats are possessive (*+) wherever what follows can
+    never be taken by them, so a failed try does not backtrack.
+    """
+    kept = [s[:1] + b"(" + s[1:] + b")" for s in strings]
+    return re.compile(b"|".join(kept + comments))
+
+
+def _quoted(q: bytes, multiline: bool = False) -> bytes:
+    """
+    A string between two q quotes with backslash escapes.
+    """
+    body = rb"[^" + q + rb"\\" + (b"" if multiline else rb"\n") + b"]"
+    escape = rb"\\[\s\S]" if multiline else rb"\\[^\n]"
+    return q + body + b"*+(?:" + escape + body + b"*+)*+" + q
+
+
+def _triple(q: bytes) -> bytes:
+    """
+    A triple-quoted string, which may span lines.
+    """
+    body = rb"[^" + q + rb"\\]"
+    other = rb"(?:\\[\s\S]|" + q + rb"(?!" + q * 2 + rb"))"
+    return q * 3 + body + b"*+(?:" + other + body + b"*+)*+" + q * 3
+
+
+# The first line break of a multi-line comment is kept so that code before
+# and after the comment stays on two lines.
+_C_BLOCK = rb"/\*[^*\n]*+(?:\*+(?!/)[^*\n]*+)*(?:\*/|(\n)[\s\S]*?(?:\*/|\Z))"
+_C_LINE = rb"//[^\n]*+"
+_C_CHAR = rb"'(?:\\[^'\n]*+|[^'\\\n]*+)'"
+
+
+def _python() -> Pattern[bytes]:
+    # A triple-quoted string alone on its line(s) is a docstring. It goes
+    # with the line break before it, which merges its (now empty) line into
+    # the previous one.
+    docstring = (
+        rb"\n[ \t]*+[rRuU]?+(?:" + _triple(b'"') + b"|" + _triple(b"'")
+        + rb")(?=[ \t]*+(?:#[^\n]*+)?+(?:\n|\Z))"
+    )
+    strings = [_triple(b'"'), _triple(b"'"), _quoted(b'"'), _quoted(b"'")]
+    return _scanner(strings, [docstring, rb"#[^\n]*+"])
+
+
+def _c_family() -> Pattern[bytes]:
+    return _scanner([_quoted(b'"'), _C_CHAR], [_C_BLOCK, _C_LINE])
+
+
+def _javascript() -> Pattern[bytes]:
+    strings = [_quoted(b'"'), _quoted(b"'"), _quoted(b"`", multiline=True)]
+    return _scanner(strings, [_C_BLOCK, _C_LINE])
+
+
+def _go() -> Pattern[bytes]:
+    return _scanner([_quoted(b'"'), rb"`[^`]*+`", _C_CHAR], [_C_BLOCK, _C_LINE])
+
+
+def _rust() -> Pattern[bytes]:
+    # Rust strings may span lines, and r#"..."# raw strings end at a quote
+    # followed by as many #. A lifetime ('a) is not taken for a char
+    # literal because no quote follows its first character.
+    strings = [
+        _quoted(b'"', multiline=True),
+        rb'r(?:"[^"]*+"|#"[\s\S]*?"#|##"[\s\S]*?"##|###"[\s\S]*?"###)',
+        rb"'(?:\\[^'\n]*+|[^'\\\n])'",
+    ]
+    return _scanner(strings, [_C_BLOCK, _C_LINE])
+
+
+def _shell() -> Pattern[bytes]:
+    # "#" only starts a comment at the start of a word ($#, ${#x} are code).
+    strings = [rb"'[^']*+'", _quoted(b'"', multiline=True)]
+    return _scanner(strings, [rb"#(?<![^\s;|&()]#)[^\n]*+"])
+
+
+LANGUAGES: Dict[str, Callable[[], Pattern[bytes]]] = {
+    "python": _python,
+    "c": _c_family,
+    "javascript": _javascript,
+    "go": _go,
+    "rust": _rust,
+    "shell": _shell,
+}
+
+EXTENSIONS: Dict[str, Tuple[str, ...]] = {
+    "python": ("py", "pyi", "pyw"),
+    "c": (
+        "c", "h", "cc", "cpp", "cxx", "c++", "hh", "hpp", "hxx", "ino",
+        "cs", "java", "kt", "kts", "scala", "swift", "m", "mm", "dart",
+    ),
+    "javascript": ("js", "jsx", "mjs", "cjs", "ts", "tsx", "mts", "cts"),
+    "go": ("go",),
+    "rust": ("rs",),
+    "shell": ("sh", "bash", "zsh", "ksh"),
+}
+
+_BY_EXTENSION = {ext: lang for lang, exts in EXTENSIONS.items() for ext in exts}
+_scanners: Dict[str, Pattern[bytes]] = {}
+
+
+def language_for(name: str) -> Optional[str]:
+    """
+    The scanner language for a file name, by extension, or None.
+    """
+    _, dot, ext = name.rpartition(".")
+    return _BY_EXTENSION.get(ext.lower()) if dot else None
+
+
+def strip_comments(data: bytes, language: str) -> bytes:
+    """
+    data (every line break already a single "\\n") without its comments
+    and docstrings, with the lines that hold code kept apart. Lines that
+    only held comments end up empty or merged into the line before them,
+    so the non-empty lines of the result are the source lines of code.
+    """
+    scanner = _scanners.get(language)
+    if scanner is None:
+        scanner = _scanners[language] = LANGUAGES[language]()
+    # The leading break lets a docstring on the first line match too.
+    return b"".join(filter(None, scanner.split(b"\n" + data)))
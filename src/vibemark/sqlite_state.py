@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+from contextlib import closing
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from vibemark.summary import add_file, parse_summary
+
+if TYPE_CHECKING:
+    import sqlite3
+
+DB_FILENAME = ".vibemark.db"
+
+FILE_DEFAULTS: Dict[str, object] = {
+    "total_loc": 0,
+    "read_loc": 0,
+    "mtime_ns": 0,
+    "size": 0,
+    "blob": "",
+    "lines": None,
+    "ranges": None,
+    "locs": None,
+}
+FILE_COLUMNS = tuple(FILE_DEFAULTS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    total_loc INTEGER NOT NULL,
+    read_loc INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    blob TEXT NOT NULL DEFAULT '',
+    lines TEXT,
+    ranges TEXT,
+    locs TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+UPSERT_FILE = """
+INSERT INTO files (
+    path, total_loc, read_loc, mtime_ns, size, blob, lines, ranges, locs
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(path) DO UPDATE SET
+    total_loc = excluded.total_loc,
+    read_loc = excluded.read_loc,
+    mtime_ns = excluded.mtime_ns,
+    size = excluded.size,
+    blob = excluded.blob,
+    lines = excluded.lines,
+    ranges = excluded.ranges,
+    locs = excluded.locs
+"""
+
+# Columns added after the first release of the schema, with their DDL.
+MIGRATIONS = {
+    "blob": "ALTER TABLE files ADD COLUMN blob TEXT NOT NULL DEFAULT ''",
+    "lines": "ALTER TABLE files ADD COLUMN lines TEXT",
+    "ranges": "ALTER TABLE files ADD COLUMN ranges TEXT",
+    "locs": "ALTER TABLE files ADD COLUMN locs TEXT",
+}
+
+# Top-level payload keys stored as JSON values in the meta table.
+META_KEYS = (
+    "version",
+    "excludes",
+    "extensions",
+    "loc_mode",
+    "track_lines",
+    "summary",
+)
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    # Imported here so JSON-backed runs never load the sqlite3 extension.
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+    for column, ddl in MIGRATIONS.items():
+        if column not in columns:
+            conn.execute(ddl)
+    return conn
+
+
+def _file_rows(files: Dict[str, Dict[str, object]]) -> List[Tuple[object, ...]]:
+    return [
+        (rel, *(meta.get(col, default) for col, default in FILE_DEFAULTS.items()))
+        for rel, meta in files.items()
+    ]
+
+
+def read_payload(path: Path) -> Dict[str, object]:
+    """
+    Read the database into the same payload shape as .vibemark.json.
+    """
+    with closing(connect(path)) as conn:
+        payload: Dict[str, object] = {}
+        for key, value in conn.execute("SELECT key, value FROM meta"):
+            if key in META_KEYS:
+                payload[key] = json.loads(value)
+        files: Dict[str, Dict[str, object]] = {}
+        query = f"SELECT path, {', '.join(FILE_COLUMNS)} FROM files"
+        for rel, *values in conn.execute(query):
+            files[rel] = dict(zip(FILE_COLUMNS, values))
+        payload["files"] = files
+    return payload
+
+
+def write_payload(path: Path, payload: Dict[str, object]) -> None:
+    """
+    Make the database match payload in one transaction: rows for removed
+    paths are deleted, the rest are upserted.
+    """
+    files = payload.get("files", {})
+    assert isinstance(files, dict)
+    with closing(connect(path)) as conn, conn:
+        stale = [
+            (rel,)
+            for (rel,) in conn.execute("SELECT path FROM files")
+            if rel not in files
+        ]
+        conn.executemany("DELETE FROM files WHERE path = ?", stale)
+        conn.executemany(UPSERT_FILE, _file_rows(files))
+        conn.execute("DELETE FROM meta")
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [
+                (key, json.dumps(payload[key]))
+                for key in META_KEYS
+                if key in payload
+            ],
+        )
+
+
+def _loc(meta: Dict[str, object], key: str) -> int:
+    value = meta.get(key, 0)
+    return value if isinstance(value, int) else 0
+
+
+def read_meta(path: Path, key: str) -> Optional[object]:
+    """
+    One meta value, without reading the files table.
+    """
+    with closing(connect(path)) as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return None if row is None else json.loads(row[0])
+
+
+def upsert_files(path: Path, files: Dict[str, Dict[str, object]]) -> None:
+    """
+    Write only the given file rows, in one transaction, adjusting the
+    stored summary by the difference.
+    """
+    with closing(connect(path)) as conn, conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'summary'").fetchone()
+        summary = None if row is None else parse_summary(json.loads(row[0]))
+        if summary is not None:
+            for rel, meta in files.items():
+                old = conn.execute(
+                    "SELECT total_loc, read_loc FROM files WHERE path = ?", (rel,)
+                ).fetchone()
+                if old is not None:
+                    add_file(summary, *old, sign=-1)
+                add_file(summary, _loc(meta, "total_loc"), _loc(meta, "read_loc"))
+        conn.executemany(UPSERT_FILE, _file_rows(files))
+        if summary is not None:
+            conn.execute(
+                "UPDATE meta SET value = ? WHERE key = 'summary'",
+                (json.dumps(summary),),
+            )
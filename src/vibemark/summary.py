@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional, Tuple
+
+# Counters kept in the "summary" block of the state, so totals can be
+# shown without building an entry for every file.
+SUMMARY_FIELDS = ("files", "total_loc", "read_loc", "unread", "partial", "done")
+
+
+def file_status(total_loc: int, read_loc: int) -> str:
+    if read_loc <= 0:
+        return "unread"
+    if read_loc >= total_loc:
+        return "done"
+    return "partial"
+
+
+def add_file(
+    summary: Dict[str, int], total_loc: int, read_loc: int, sign: int = 1
+) -> None:
+    """
+    Count one file into summary, or take it out again with sign=-1.
+    """
+    summary["files"] += sign
+    summary["total_loc"] += sign * total_loc
+    summary["read_loc"] += sign * read_loc
+    summary[file_status(total_loc, read_loc)] += sign
+
+
+def summarize(entries: Iterable[Tuple[int, int]]) -> Dict[str, int]:
+    """
+    Build a summary from (total_loc, read_loc) pairs.
+    """
+    summary = dict.fromkeys(SUMMARY_FIELDS, 0)
+    for total_loc, read_loc in entries:
+        add_file(summary, total_loc, read_loc)
+    return summary
+
+
+def parse_summary(value: object) -> Optional[Dict[str, int]]:
+    """
+    The stored summary, or None when it is missing or malformed (state
+    written by an older version) and totals must be computed instead.
+    """
+    if not isinstance(value, dict):
+        return None
+    summary: Dict[str, int] = {}
+    for key in SUMMARY_FIELDS:
+        count = value.get(key)
+        if not isinstance(count, int) or count < 0:
+            return None
+        summary[key] = count
+    return summary
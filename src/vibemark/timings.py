@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+import sys
+import time
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Generator,
+    Optional,
+    TypeVar,
+    cast,
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Counters reported even when they stay at zero, in this order.
+COUNTERS = ("files_walked", "files_read", "bytes_read", "excludes_evaluated")
+
+
+class Timings:
+    """
+    Wall time per phase and counters for one command, for --timings.
+
+    A phase entered again while it is already running (save_state calling
+    write_state, say) is only timed once, so phases never overlap and the
+    rest of the run is reported as "other".
+    """
+
+    def __init__(self, command: str, trace_memory: bool = True) -> None:
+        self.command = command
+        self.phases: Dict[str, float] = {}
+        self.counts: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.peak_memory: Optional[int] = None
+        self._active: Optional[str] = None
+        self._stop_tracing = False
+        if trace_memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._stop_tracing = True
+            tracemalloc.reset_peak()
+        self._started = time.perf_counter()
+        self.wall = 0.0
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        if self._active is not None:
+            yield
+            return
+        self._active = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (
+                time.perf_counter() - start
+            )
+            self._active = None
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def finish(self) -> None:
+        self.wall = time.perf_counter() - self._started
+        import tracemalloc
+
+        if tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._stop_tracing:
+                tracemalloc.stop()
+
+    def report(self) -> Dict[str, object]:
+        phases = dict(self.phases)
+        phases["other"] = max(0.0, self.wall - sum(self.phases.values()))
+        return {
+            "command": self.command,
+            "wall_seconds": round(self.wall, 6),
+            "phases": {name: round(seconds, 6) for name, seconds in phases.items()},
+            "counts": dict(self.counts),
+            "peak_memory_bytes": self.peak_memory,
+        }
+
+    def format(self) -> str:
+        phases = cast(Dict[str, float], self.report()["phases"])
+        lines = [f"timings: {self.command or 'vibemark'} {self.wall:.3f}s"]
+        for name, seconds in phases.items():
+            share = seconds / self.wall * 100 if self.wall else 0.0
+            lines.append(f"  {name:<20} {seconds:>9.3f}s {share:>5.1f}%")
+        for name, value in self.counts.items():
+            lines.append(f"  {name:<20} {value:>10}")
+        if self.peak_memory is not None:
+            lines.append(
+                f"  {'peak_memory':<20} {self.peak_memory / (1 << 20):>8.1f} MiB"
+            )
+        return "\n".join(lines)
+
+
+# The Timings of the running command, or None when --timings is off.
+active: Optional[Timings] = None
+
+
+def start(command: str, trace_memory: bool = True) -> Timings:
+    global active
+    active = Timings(command, trace_memory)
+    return active
+
+
+def stop(json_path: Optional[str] = None) -> None:
+    """
+    Finish the active Timings and report it: as JSON to json_path when
+    given, otherwise as text on stderr.
+    """
+    global active
+    timings, active = active, None
+    if timings is None:
+        return
+    timings.finish()
+    if json_path is None:
+        print(timings.format(), file=sys.stderr)
+        return
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(timings.report(), f, indent=2)
+        f.write("\n")
+
+
+def phase(name: str) -> ContextManager[None]:
+    if active is None:
+        return contextlib.nullcontext()
+    return active.phase(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    if active is not None:
+        active.count(name, n)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """
+    Decorator: run the function as phase name.
+    """
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if active is None:
+                return fn(*args, **kwargs)
+            with active.phase(name):
+                return fn(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorate
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import selectors
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple, Union
+
+# inotify(7) event bits.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+    | IN_EXCL_UNLINK
+)
+
+_EVENT = struct.Struct("iIII")
+
+# A signature per file, as returned by a polling snapshot.
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+class WatchError(RuntimeError):
+    pass
+
+
+class InotifyWatcher:
+    """
+    Report paths touched under root using Linux inotify.
+
+    Every directory that can_prune does not reject gets a watch; directories
+    created or moved in later are watched as they appear. poll() returns
+    relative posix paths: files, or directories whose whole subtree should
+    be re-checked. "" (the root) means the kernel queue overflowed and
+    everything must be re-checked.
+    """
+
+    def __init__(self, root: Path, can_prune: Callable[[str], bool]) -> None:
+        if not sys.platform.startswith("linux"):
+            raise WatchError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        try:
+            self._add = libc.inotify_add_watch
+            self._rm = libc.inotify_rm_watch
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except AttributeError as exc:
+            raise WatchError("libc has no inotify support") from exc
+        if fd < 0:
+            raise WatchError(os.strerror(ctypes.get_errno()))
+        self.root = root
+        self.fd = fd
+        self._can_prune = can_prune
+        self._dirs: Dict[int, str] = {}
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(fd, selectors.EVENT_READ)
+        self._watch_tree("")
+
+    def close(self) -> None:
+        self._selector.close()
+        os.close(self.fd)
+
+    def __enter__(self) -> InotifyWatcher:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _watch_tree(self, rel_dir: str) -> None:
+        stack = [rel_dir]
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(self.root, rel) if rel else str(self.root)
+            wd = self._add(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise WatchError(
+                        "inotify watch limit reached; raise "
+                        "fs.inotify.max_user_watches or use --poll"
+                    )
+                continue
+            self._dirs[wd] = rel
+            try:
+                with os.scandir(path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            prefix = rel + "/" if rel else ""
+            for entry in entries:
+                sub = prefix + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False) and not self._can_prune(sub):
+                        stack.append(sub)
+                except OSError:
+                    continue
+
+    def _unwatch_tree(self, rel_dir: str) -> None:
+        prefix = rel_dir + "/"
+        for wd, rel in list(self._dirs.items()):
+            if rel == rel_dir or rel.startswith(prefix):
+                del self._dirs[wd]
+                self._rm(self.fd, wd)
+
+    def poll(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait up to timeout seconds (forever if None) for events and return
+        the paths they touched; an empty set means the wait timed out.
+        """
+        if not self._selector.select(timeout):
+            return set()
+        touched: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            self._parse(data, touched)
+        return touched
+
+    def _parse(self, data: bytes, touched: Set[str]) -> None:
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                touched.add("")
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None or mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # Reported through the parent directory's event.
+                continue
+            rel = f"{parent}/{name}" if parent else name
+            if mask & IN_ISDIR:
+                if mask & (IN_MOVED_FROM | IN_DELETE):
+                    self._unwatch_tree(rel)
+                elif mask & (IN_CREATE | IN_MOVED_TO) and not self._can_prune(rel):
+                    self._watch_tree(rel)
+            touched.add(rel)
+
+
+class PollingWatcher:
+    """
+    Fallback watcher that compares stat snapshots every interval seconds.
+
+    snapshot() should list every candidate file with its (mtime_ns, size);
+    files whose signature changed, appeared or vanished are reported.
+    """
+
+    def __init__(self, snapshot: Callable[[], Snapshot], interval: float = 1.0) -> None:
+        self._snapshot = snapshot
+        self.interval = interval
+        self._last = snapshot()
+        self._due = time.monotonic() + interval
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> PollingWatcher:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def poll(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            wake = self._due if deadline is None else min(self._due, deadline)
+            if wake > now:
+                time.sleep(wake - now)
+            if time.monotonic() < self._due:
+                return set()
+            current = self._snapshot()
+            self._due = time.monotonic() + self.interval
+            touched = {
+                rel
+                for rel in self._last.keys() | current.keys()
+                if self._last.get(rel) != current.get(rel)
+            }
+            self._last = current
+            if touched or deadline is not None and time.monotonic() >= deadline:
+                return touched
+
+
+Watcher = Union[InotifyWatcher, PollingWatcher]
+
+
+def next_batch(
+    watcher: Watcher,
+    debounce: float,
+    max_wait: float = 5.0,
+    timeout: Optional[float] = None,
+) -> Set[str]:
+    """
+    Block until something changes (or timeout passes), then keep collecting
+    until debounce seconds go by without events, or max_wait is reached, so a
+    branch switch arrives as one batch.
+    """
+    touched = watcher.poll(timeout)
+    if not touched:
+        return touched
+    deadline = time.monotonic() + max_wait
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        more = watcher.poll(min(debounce, remaining))
+        if not more:
+            break
+        touched |= more
+    return touched
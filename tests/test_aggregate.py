@@ -0,0 +1,105 @@
+import random
+import sys
+
+import pytest
+
+from vibemark.aggregate import NUMPY_MIN_FILES, Aggregate, load_numpy
+from vibemark.filetable import FileProgress, FileTable
+from vibemark.summary import summarize
+
+BACKENDS = [
+    False,
+    pytest.param(
+        True,
+        marks=pytest.mark.skipif(
+            load_numpy(0, True) is None, reason="NumPy is not installed"
+        ),
+    ),
+]
+
+
+def _items() -> dict:
+    rng = random.Random(7)
+    items = {}
+    for i in range(300):
+        # Small ranges so many entries tie on remaining and total LOC.
+        total = rng.randrange(0, 12)
+        read = rng.choice([0, total, rng.randrange(0, total + 1)])
+        items[f"f{i}.py"] = FileProgress(f"f{i}.py", total, read, 0)
+    return items
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+@pytest.mark.parametrize("as_table", [False, True])
+def test_aggregate_matches_per_entry_computation(
+    use_numpy: bool, as_table: bool
+) -> None:
+    plain = _items()
+    items = FileTable(plain.values()) if as_table else plain
+    if as_table:
+        # Removed rows must not show up in any result.
+        for rel in list(items)[::10]:
+            del items[rel]
+            del plain[rel]
+    agg = Aggregate(items, use_numpy=use_numpy)
+
+    assert agg.totals() == (
+        sum(fp.total_loc for fp in plain.values()),
+        sum(fp.read_loc for fp in plain.values()),
+    )
+    summary = summarize((fp.total_loc, fp.read_loc) for fp in plain.values())
+    assert agg.status_counts() == {
+        k: summary[k] for k in ("unread", "partial", "done")
+    }
+
+    unfinished = [fp for fp in plain.values() if fp.read_loc < fp.total_loc]
+    expected = sorted(
+        unfinished, key=lambda fp: fp.total_loc - fp.read_loc, reverse=True
+    )
+    assert [fp.path for fp in agg.remaining()] == [fp.path for fp in expected]
+    for limit in (0, 1, 5, 37, 1000):
+        got = [fp.path for fp in agg.remaining(limit)]
+        assert got == [fp.path for fp in expected[:limit]]
+
+    done = sorted(
+        (fp for fp in plain.values() if fp.read_loc >= fp.total_loc),
+        key=lambda fp: fp.total_loc,
+        reverse=True,
+    )
+    assert [fp.path for fp in agg.done()] == [fp.path for fp in done]
+    assert [fp.path for fp in agg.done(3)] == [fp.path for fp in done[:3]]
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_aggregate_after_rows_are_reused(use_numpy: bool) -> None:
+    plain = _items()
+    items = FileTable(plain.values())
+    for rel in list(items)[::10]:
+        del items[rel]
+        del plain[rel]
+    # The new paths take over freed rows, out of mapping order.
+    for i in range(30):
+        fp = FileProgress(f"new{i}.py", 1000 + i, i, 0)
+        items[fp.path] = fp
+        plain[fp.path] = fp
+
+    paths, total, read = items.columns()
+    assert paths == list(plain)
+    assert list(total) == [fp.total_loc for fp in plain.values()]
+    assert list(read) == [fp.read_loc for fp in plain.values()]
+
+    agg = Aggregate(items, use_numpy=use_numpy)
+    expected = sorted(
+        (fp for fp in plain.values() if fp.read_loc < fp.total_loc),
+        key=lambda fp: fp.total_loc - fp.read_loc,
+        reverse=True,
+    )
+    got = [(fp.path, fp.total_loc, fp.read_loc) for fp in agg.remaining(40)]
+    assert got == [(fp.path, fp.total_loc, fp.read_loc) for fp in expected[:40]]
+
+
+def test_numpy_is_only_imported_for_large_states() -> None:
+    assert load_numpy(NUMPY_MIN_FILES, use_numpy=False) is None
+    if "numpy" not in sys.modules:
+        assert load_numpy(NUMPY_MIN_FILES - 1) is None
+        assert "numpy" not in sys.modules
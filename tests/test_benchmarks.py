@@ -0,0 +1,74 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CODE = (
+    "import hashlib, sys\n"
+    "from pathlib import Path\n"
+    "from benchmarks.generate import RepoShape, generate\n"
+    "shape = RepoShape(files=40, huge_files=1, huge_loc=500)\n"
+    "repo = generate(Path(sys.argv[1]), shape)\n"
+    "h = hashlib.sha1()\n"
+    "for p in sorted(repo.rglob('*.py')):\n"
+    "    h.update(p.relative_to(repo).as_posix().encode() + p.read_bytes())\n"
+    "print(h.hexdigest())\n"
+)
+
+
+def _bench(module: str, *args: str) -> subprocess.CompletedProcess:
+    """
+    Run a benchmarks module, or the snippet in CODE when module is "".
+    """
+    command = ["-m", module] if module else ["-c", CODE]
+    return subprocess.run(
+        [sys.executable, *command, *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def test_generator_is_deterministic(tmp_path: Path) -> None:
+    first = _bench("", str(tmp_path / "a"))
+    second = _bench("", str(tmp_path / "b"))
+    assert first.returncode == 0, first.stderr
+    assert first.stdout == second.stdout
+
+
+def test_runner_writes_results_and_flags_regressions(tmp_path: Path) -> None:
+    out = tmp_path / "results.json"
+    common = [
+        "benchmarks.run", "--sizes", "30", "--repeat", "1", "--huge-files", "0",
+        "--workdir", str(tmp_path / "repos"),
+    ]
+    result = _bench(*common, "--output", str(out))
+    assert result.returncode == 0, result.stderr
+    report = json.loads(out.read_text())
+    assert set(report["results"]["30"]) == {
+        "scan", "update_nochange", "update_1pct", "stats", "done",
+    }
+
+    # An impossibly fast baseline must be reported as a regression.
+    for scenarios in report["results"].values():
+        for name in scenarios:
+            scenarios[name] = 0.0
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report))
+    result = _bench(*common, "--baseline", str(baseline))
+    assert result.returncode == 1
+    assert "REGRESSION" in result.stderr
+
+
+def test_sloc_benchmark_flags_slowdown_over_threshold() -> None:
+    common = ["benchmarks.sloc", "--files", "2", "--lines", "50", "--repeat", "1"]
+    result = _bench(*common, "--max-slowdown", "1000")
+    assert result.returncode == 0, result.stderr
+    assert "python" in result.stdout
+
+    result = _bench(*common, "--max-slowdown", "0.01")
+    assert result.returncode == 1
+    assert "REGRESSION" in result.stderr
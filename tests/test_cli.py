@@ -1,3 +1,7 @@
+import json
+import os
+import shutil
+import subprocess
 from pathlib import Path
 
 import pytest
@@ -11,6 +15,7 @@ from vibemark.cli import (
     app,
     count_loc,
     is_excluded,
+    iter_source_files,
     load_excludes,
     load_extensions,
     load_state,
@@ -18,8 +23,12 @@ from vibemark.cli import (
     normalize_path_arg,
     save_state,
     scan,
+    scan_repo,
 )
 from vibemark import __version__
+from vibemark import cli
+from vibemark.filetable import FileTable
+from vibemark.loc import LocCounts
 
 runner = CliRunner()
 
@@ -37,6 +46,24 @@ def test_is_excluded_defaults() -> None:
     assert not is_excluded("src/vibemark/cli.py", DEFAULT_EXCLUDES)
 
 
+def test_iter_source_files_single_pass_with_pruning(tmp_path: Path) -> None:
+    (tmp_path / "a.py").write_text("x\n", encoding="utf-8")
+    (tmp_path / "notes.md").write_text("x\n", encoding="utf-8")
+    (tmp_path / "skip.txt").write_text("x\n", encoding="utf-8")
+    nested = tmp_path / "pkg" / "sub"
+    nested.mkdir(parents=True)
+    (nested / "b.py").write_text("x\n", encoding="utf-8")
+    git_dir = tmp_path / ".git"
+    git_dir.mkdir()
+    (git_dir / "hook.py").write_text("x\n", encoding="utf-8")
+
+    found = sorted(
+        rel for rel, _ in iter_source_files(tmp_path, DEFAULT_EXCLUDES, ["py", "md"])
+    )
+
+    assert found == ["a.py", "notes.md", "pkg/sub/b.py"]
+
+
 def test_normalize_path_arg(tmp_path: Path) -> None:
     root = tmp_path
     rel_path = "example.py"
@@ -145,6 +172,40 @@ def test_export_md_marks_completed_with_x(tmp_path: Path) -> None:
     assert "- [ ] todo.py" in result.output
 
 
+def test_export_streams_jsonl_and_html(tmp_path: Path) -> None:
+    items = {
+        "b.py": FileProgress("b.py", total_loc=5, read_loc=2, mtime_ns=0),
+        "a</script>.py": FileProgress("a</script>.py", 4, 4, 0),
+    }
+    save_state(tmp_path, items)
+    root = ["--root", str(tmp_path)]
+
+    result = runner.invoke(app, ["export", "--format", "jsonl", *root])
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [row["path"] for row in rows] == ["a</script>.py", "b.py"]
+    assert rows[1] == {
+        "path": "b.py",
+        "status": "partial",
+        "read_loc": 2,
+        "total_loc": 5,
+    }
+
+    out = tmp_path / "report.html"
+    result = runner.invoke(app, ["export", "--format", "html", "-o", str(out), *root])
+    assert result.exit_code == 0 and result.output == ""
+    html = out.read_text(encoding="utf-8")
+    data = html.split('id="data">', 1)[1].split("</script>", 1)[0]
+    assert json.loads(data) == [["a</script>.py", 4, 4], ["b.py", 5, 2]]
+
+    out = tmp_path / "review.md"
+    result = runner.invoke(app, ["export-md", "--output", str(out), *root])
+    assert out.read_text(encoding="utf-8").splitlines()[2:] == [
+        "- [x] a</script>.py  4 LOC",
+        "- [ ] b.py  5 LOC  (2/5 read)",
+    ]
+
+
 def test_update_handles_removed_changed_and_new_files(tmp_path: Path) -> None:
     (tmp_path / "a.py").write_text("print('a')\n", encoding="utf-8")
     (tmp_path / "b.py").write_text("print('b')\n", encoding="utf-8")
@@ -172,6 +233,523 @@ def test_update_handles_removed_changed_and_new_files(tmp_path: Path) -> None:
     assert updated["a.py"].read_loc == 1
 
 
+def test_scan_reuses_loc_for_unchanged_stat_signature(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "a.py").write_text("print('a')\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("print('b')\n", encoding="utf-8")
+    scan(root=tmp_path, loc_mode="physical", exclude=[], ext=[])
+    assert load_state(tmp_path)["a.py"].size > 0
+
+    (tmp_path / "b.py").write_text("print('b')\nprint('b2')\n", encoding="utf-8")
+    counted: list[str] = []
+    real_count_all = cli.count_all
+
+    def tracking_count_all(path: Path, sloc: bool = False) -> LocCounts:
+        counted.append(path.name)
+        return real_count_all(path, sloc=sloc)
+
+    monkeypatch.setattr(cli, "count_all", tracking_count_all)
+    scan(root=tmp_path, loc_mode="physical", exclude=[], ext=[])
+
+    assert counted == ["b.py"]
+    assert load_state(tmp_path)["b.py"].total_loc == 2
+
+    # Every mode but sloc was counted by the same read.
+    counted.clear()
+    scan(root=tmp_path, loc_mode="nonempty", exclude=[], ext=[])
+    assert counted == []
+    assert load_state(tmp_path)["b.py"].locs == LocCounts(2, 2)
+
+    scan(root=tmp_path, loc_mode="sloc", exclude=[], ext=[])
+    assert sorted(counted) == ["a.py", "b.py"]
+
+
+def test_update_accepts_state_without_sizes(tmp_path: Path) -> None:
+    # A state as written before sizes and per-mode counts were saved.
+    files = {}
+    for name, text in [("a.py", "x = 1\n"), ("b.py", "y = 2\nz = 3\n")]:
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        files[name] = {
+            "total_loc": text.count("\n"),
+            "read_loc": 1,
+            "mtime_ns": path.stat().st_mtime_ns,
+        }
+    payload = {"version": 1, "files": files, "excludes": [], "extensions": []}
+    (tmp_path / ".vibemark.json").write_text(json.dumps(payload), encoding="utf-8")
+
+    root = ["--root", str(tmp_path)]
+    result = runner.invoke(app, ["update", *root])
+    assert result.exit_code == 0
+    assert "No changes detected" in result.output
+    state = load_state(tmp_path)
+    assert [fp.read_loc for fp in state.values()] == [1, 1]
+    assert state["b.py"].size == (tmp_path / "b.py").stat().st_size
+
+    (tmp_path / "b.py").write_text("y = 2\n", encoding="utf-8")
+    os.utime(tmp_path / "b.py", ns=(0, state["b.py"].mtime_ns))
+    result = runner.invoke(app, ["update", "--reset-changed", "yes", *root])
+    assert "1 files changed" in result.output
+
+
+def test_loc_mode_switches_from_stored_counts(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "a.py").write_text("import os\n\n# c\nx = 1\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("a\n\nb\n\nc\n\nd\n\n", encoding="utf-8")
+    root = ["--root", str(tmp_path)]
+    assert runner.invoke(app, ["scan", *root]).exit_code == 0
+    assert runner.invoke(app, ["done", "a.py", *root]).exit_code == 0
+    assert runner.invoke(app, ["set", "b.py", "4", *root]).exit_code == 0
+
+    def no_reads(*args: object, **kwargs: object) -> None:
+        raise AssertionError("file read")
+
+    monkeypatch.setattr(cli, "count_all", no_reads)
+    result = runner.invoke(
+        app, ["stats", "--loc-mode", "nonempty", "--format", "csv", *root]
+    )
+    assert result.exit_code == 0
+    assert "b.py,partial,2,4,2" in result.output
+    # Only a view: the state keeps its mode.
+    assert load_state(tmp_path)["b.py"].total_loc == 8
+
+    result = runner.invoke(
+        app, ["update", "--loc-mode", "nonempty", "--reset-changed", "no", *root]
+    )
+    assert result.exit_code == 0
+    assert "No changes detected" in result.output
+    state = load_state(tmp_path)
+    assert (state["a.py"].read_loc, state["a.py"].total_loc) == (3, 3)
+    assert (state["b.py"].read_loc, state["b.py"].total_loc) == (2, 4)
+
+    result = runner.invoke(app, ["stats", "--loc-mode", "sloc", *root])
+    assert result.exit_code != 0
+
+    # sloc is counted on first use, then kept and switched to for free.
+    monkeypatch.undo()
+    result = runner.invoke(
+        app, ["update", "--loc-mode", "sloc", "--reset-changed", "no", *root]
+    )
+    assert "No changes detected" in result.output
+    assert load_state(tmp_path)["a.py"].locs == LocCounts(4, 3, 2)
+    assert load_state(tmp_path)["a.py"].read_loc == 2
+    monkeypatch.setattr(cli, "count_all", no_reads)
+    result = runner.invoke(app, ["scan", "--loc-mode", "physical", *root])
+    assert result.exit_code == 0
+    assert load_state(tmp_path)["a.py"].read_loc == 4
+
+
+def test_counts_sloc_checks_every_entry() -> None:
+    # b.py was counted in sloc mode, a.py was added by a later scan.
+    table = FileTable(
+        [
+            FileProgress("a.py", 2, 0, 0, locs=LocCounts(2, 2)),
+            FileProgress("b.py", 3, 0, 0, locs=LocCounts(3, 3, 1)),
+        ]
+    )
+    assert cli.counts_sloc(table)
+    assert cli.counts_sloc(dict(table))
+    del table["b.py"]
+    assert not cli.counts_sloc(table)
+
+
+def test_scan_repo_jobs_matches_serial(tmp_path: Path) -> None:
+    for i in range(12):
+        (tmp_path / f"m{i}.py").write_text("x\n" * (i + 1), encoding="utf-8")
+
+    serial = scan_repo(tmp_path, [], "physical", False, ["py"])
+    parallel = scan_repo(tmp_path, [], "physical", False, ["py"], jobs=4)
+
+    assert list(parallel.items()) == list(serial.items())
+    assert parallel["m11.py"][0] == 12
+
+
+def test_state_convert_round_trip_through_sqlite(tmp_path: Path) -> None:
+    items = {
+        "a.py": FileProgress("a.py", total_loc=10, read_loc=0, mtime_ns=1, size=40),
+        "b.py": FileProgress(
+            "b.py", total_loc=8, read_loc=3, mtime_ns=2, size=30, locs=LocCounts(9, 8)
+        ),
+    }
+    save_state(tmp_path, items, excludes=["skip/*"], extensions=["py", "md"])
+
+    result = runner.invoke(app, ["state", "convert", "sqlite", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert (tmp_path / ".vibemark.db").exists()
+    assert not (tmp_path / ".vibemark.json").exists()
+    assert load_state(tmp_path) == items
+    assert load_excludes(tmp_path) == ["skip/*"]
+
+    result = runner.invoke(app, ["done", "a.py", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert load_state(tmp_path)["a.py"].read_loc == 10
+
+    result = runner.invoke(app, ["state", "convert", "json", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert not (tmp_path / ".vibemark.db").exists()
+    converted = load_state(tmp_path)
+    assert converted["a.py"].read_loc == 10
+    assert converted["b.py"] == items["b.py"]
+    assert load_extensions(tmp_path) == ["py", "md"]
+
+
+@pytest.mark.parametrize(
+    "args",
+    [["scan"], ["update", "--reset-changed", "no"], ["done", "a.py"], ["stats"]],
+)
+def test_commands_parse_state_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, args: list[str]
+) -> None:
+    (tmp_path / "a.py").write_text("print('a')\n", encoding="utf-8")
+    save_state(tmp_path, {}, excludes=["skip/*"], extensions=["py"])
+    scan(root=tmp_path, loc_mode="physical", exclude=[], ext=[])
+
+    calls: list[Path] = []
+    real_load = cli.load_state_payload
+
+    def counting_load(root: Path) -> dict[str, object]:
+        calls.append(root)
+        return real_load(root)
+
+    monkeypatch.setattr(cli, "load_state_payload", counting_load)
+    result = runner.invoke(app, [*args, "--root", str(tmp_path)])
+
+    assert result.exit_code == 0
+    assert len(calls) == 1
+
+
+def test_progress_journal_replay_and_compact(tmp_path: Path) -> None:
+    items = {
+        "a.py": FileProgress("a.py", total_loc=10, read_loc=0, mtime_ns=0),
+        "b.py": FileProgress("b.py", total_loc=8, read_loc=0, mtime_ns=0),
+    }
+    save_state(tmp_path, items)
+    snapshot = (tmp_path / ".vibemark.json").read_text(encoding="utf-8")
+
+    assert runner.invoke(app, ["done", "a.py", "--root", str(tmp_path)]).exit_code == 0
+    assert runner.invoke(app, ["set", "b.py", "4", "--root", str(tmp_path)]).exit_code == 0
+    journal = tmp_path / ".vibemark.journal"
+    with journal.open("a", encoding="utf-8") as f:
+        f.write('{"path": "b.py", "read_')
+
+    assert (tmp_path / ".vibemark.json").read_text(encoding="utf-8") == snapshot
+    state = load_state(tmp_path)
+    assert state["a.py"].read_loc == 10
+    assert state["b.py"].read_loc == 4
+
+    # The next append starts on a fresh line instead of the torn one.
+    assert runner.invoke(app, ["done", "b.py", "--root", str(tmp_path)]).exit_code == 0
+    state = load_state(tmp_path)
+    assert state["b.py"].read_loc == 8
+
+    result = runner.invoke(app, ["compact", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert not journal.exists()
+    assert load_state(tmp_path) == state
+
+
+def test_snapshot_write_never_replays_older_journal(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    save_state(tmp_path, {"a.py": FileProgress("a.py", 10, 0, 0)})
+    assert runner.invoke(app, ["done", "a.py", "--root", str(tmp_path)]).exit_code == 0
+    replace = os.replace
+
+    def replace_then_crash(src: str, dst: str) -> None:
+        replace(src, dst)
+        raise KeyboardInterrupt
+
+    # The process dies right after the new snapshot is in place.
+    monkeypatch.setattr(os, "replace", replace_then_crash)
+    with pytest.raises(KeyboardInterrupt):
+        save_state(tmp_path, {"a.py": FileProgress("a.py", 10, 0, 0)})
+    monkeypatch.undo()
+
+    assert load_state(tmp_path)["a.py"].read_loc == 0
+
+
+def test_bulk_marking_with_globs_and_from_file(tmp_path: Path) -> None:
+    items = {
+        rel: FileProgress(rel, total_loc=10, read_loc=0, mtime_ns=0)
+        for rel in ["src/a.py", "src/b.py", "src/c.py", "tests/t.py", "z.py"]
+    }
+    save_state(tmp_path, items)
+
+    result = runner.invoke(
+        app, ["done", "src/*.py", "z.py", "missing.py", "--root", str(tmp_path)]
+    )
+    assert result.exit_code == 0
+    assert "Done 4 files." in result.output
+    assert "missing.py" in result.output
+    state = load_state(tmp_path)
+    assert [rel for rel, fp in state.items() if fp.status == "done"] == [
+        "src/a.py",
+        "src/b.py",
+        "src/c.py",
+        "z.py",
+    ]
+
+    result = runner.invoke(
+        app,
+        ["reset", "--from-file", "-", "--root", str(tmp_path)],
+        input="src/a.py\0z.py\0",
+    )
+    assert result.exit_code == 0
+    result = runner.invoke(
+        app, ["set", "src/b.py", "tests/t.py", "4", "--root", str(tmp_path)]
+    )
+    assert result.exit_code == 0
+
+    state = load_state(tmp_path)
+    assert state["src/a.py"].read_loc == 0
+    assert state["z.py"].read_loc == 0
+    assert state["src/b.py"].read_loc == 4
+    assert state["tests/t.py"].read_loc == 4
+    assert state["src/c.py"].read_loc == 10
+
+
+def test_done_unknown_single_path_errors(tmp_path: Path) -> None:
+    save_state(tmp_path, {"a.py": FileProgress("a.py", 1, 0, 0)})
+
+    result = runner.invoke(app, ["done", "nope.py", "--root", str(tmp_path)])
+
+    assert result.exit_code != 0
+    assert "Unknown file: nope.py" in result.output
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+def test_update_source_git_uses_blob_ids(tmp_path: Path) -> None:
+    def git(*args: str) -> None:
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    (tmp_path / "a.py").write_text("print('a')\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("print('b')\n", encoding="utf-8")
+    (tmp_path / "junk.py").write_text("print('untracked')\n", encoding="utf-8")
+    git("add", "a.py", "b.py")
+
+    result = runner.invoke(app, ["scan", "--source", "git", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    items = load_state(tmp_path)
+    assert sorted(items) == ["a.py", "b.py"]
+    assert items["a.py"].blob
+
+    items["a.py"].read_loc = 1
+    items["b.py"].read_loc = 1
+    save_state(tmp_path, items)
+    (tmp_path / "a.py").write_text("print('a')\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("print('b')\nprint('b2')\n", encoding="utf-8")
+
+    result = runner.invoke(
+        app,
+        ["update", "--source", "git", "--reset-changed", "yes", "--root", str(tmp_path)],
+    )
+    assert result.exit_code == 0
+    assert "1 files changed." in result.output
+    updated = load_state(tmp_path)
+    assert updated["a.py"].read_loc == 1
+    assert updated["b.py"].read_loc == 0
+    assert updated["b.py"].total_loc == 2
+    assert updated["b.py"].blob != items["b.py"].blob
+
+
+def test_update_track_lines_keeps_credit_for_unchanged_lines(tmp_path: Path) -> None:
+    body = "".join(f"line{i}\n" for i in range(10))
+    (tmp_path / "a.py").write_text(body, encoding="utf-8")
+    result = runner.invoke(app, ["scan", "--track-lines", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert runner.invoke(app, ["set", "a.py", "6", "--root", str(tmp_path)]).exit_code == 0
+
+    edited = "new0\nnew1\n" + body.replace("line2\n", "changed\n")
+    (tmp_path / "a.py").write_text(edited, encoding="utf-8")
+    result = runner.invoke(
+        app, ["update", "--reset-changed", "ask", "--root", str(tmp_path)]
+    )
+
+    assert result.exit_code == 0
+    assert "kept 5/6 read lines" in result.output
+    state = load_state(tmp_path)
+    assert state["a.py"].read_loc == 5
+    assert state["a.py"].total_loc == 12
+    assert state["a.py"].lines is not None and len(state["a.py"].lines) == 12
+
+
+def test_set_line_ranges_accumulate_and_follow_edits(tmp_path: Path) -> None:
+    body = "".join(f"line{i}\n" for i in range(10))
+    (tmp_path / "a.py").write_text(body, encoding="utf-8")
+    result = runner.invoke(app, ["scan", "--track-lines", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert runner.invoke(app, ["set", "a.py", "2", "--root", str(tmp_path)]).exit_code == 0
+
+    result = runner.invoke(app, ["set", "a.py", "7-9", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert "Updated a.py: 5/10 (lines 1-2,7-9)" in result.output
+    result = runner.invoke(app, ["set", "a.py", "x-1", "--root", str(tmp_path)])
+    assert result.exit_code != 0
+
+    (tmp_path / "b.py").write_text(body, encoding="utf-8")
+    assert runner.invoke(app, ["update", "--root", str(tmp_path)]).exit_code == 0
+    result = runner.invoke(app, ["set", "b.py", "20-30", "--root", str(tmp_path)])
+    assert "Updated b.py: 0/10\n" in result.output
+    assert load_state(tmp_path)["b.py"].ranges is None
+
+    (tmp_path / "a.py").write_text("new\n" + body, encoding="utf-8")
+    result = runner.invoke(
+        app, ["update", "--reset-changed", "ask", "--root", str(tmp_path)]
+    )
+    assert result.exit_code == 0
+    state = load_state(tmp_path)
+    assert str(state["a.py"].ranges) == "2-3,8-10"
+    assert state["a.py"].read_loc == 5
+
+    assert runner.invoke(app, ["set", "a.py", "4", "--root", str(tmp_path)]).exit_code == 0
+    state = load_state(tmp_path)
+    assert state["a.py"].ranges is None and state["a.py"].read_loc == 4
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_summary_block_tracks_progress_writes(
+    tmp_path: Path, backend: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    items = {
+        "a.py": FileProgress("a.py", total_loc=10, read_loc=0, mtime_ns=0),
+        "b.py": FileProgress("b.py", total_loc=8, read_loc=8, mtime_ns=0),
+        "c.py": FileProgress("c.py", total_loc=5, read_loc=2, mtime_ns=0),
+    }
+    save_state(tmp_path, items)
+    if backend == "sqlite":
+        result = runner.invoke(
+            app, ["state", "convert", "sqlite", "--root", str(tmp_path)]
+        )
+        assert result.exit_code == 0
+    assert runner.invoke(app, ["set", "a.py", "4", "--root", str(tmp_path)]).exit_code == 0
+    assert runner.invoke(app, ["reset", "b.py", "--root", str(tmp_path)]).exit_code == 0
+
+    assert cli.load_summary(tmp_path) == {
+        "files": 3,
+        "total_loc": 23,
+        "read_loc": 6,
+        "unread": 1,
+        "partial": 2,
+        "done": 0,
+    }
+
+    def no_entries(raw: object) -> None:
+        raise AssertionError("stats --no-table should use the summary")
+
+    monkeypatch.setattr(cli, "files_from_payload", no_entries)
+    result = runner.invoke(app, ["stats", "--no-table", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert "6/23" in result.output
+
+
+def test_top_remaining_matches_full_sort() -> None:
+    items = {
+        f"f{i}.py": FileProgress(
+            f"f{i}.py", total_loc=(i * 7) % 11, read_loc=i % 3, mtime_ns=0
+        )
+        for i in range(40)
+    }
+    full = sorted(
+        (fp for fp in items.values() if fp.read_loc < fp.total_loc),
+        key=lambda fp: fp.total_loc - fp.read_loc,
+        reverse=True,
+    )
+    assert cli.top_remaining(items, 5) == full[:5]
+    assert cli.top_remaining(items) == full
+
+
+def test_directory_prefix_and_stats_by_dir(tmp_path: Path) -> None:
+    items = {
+        rel: FileProgress(rel, total_loc=10, read_loc=0, mtime_ns=0)
+        for rel in ["src/pay/a.py", "src/pay/b.py", "src/ui/c.py", "main.py"]
+    }
+    save_state(tmp_path, items)
+
+    result = runner.invoke(app, ["done", "src/pay/", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert "Done 2 files." in result.output
+    state = load_state(tmp_path)
+    assert state["src/pay/a.py"].read_loc == 10
+    assert state["src/ui/c.py"].read_loc == 0
+
+    result = runner.invoke(
+        app, ["stats", "--by-dir", "--format", "csv", "--root", str(tmp_path)]
+    )
+    assert result.exit_code == 0
+    assert result.output.splitlines() == [
+        "directory,read,total,remaining,files",
+        "./,20,40,20,4",
+        "src/,20,30,10,3",
+        "src/pay/,20,20,0,2",
+        "src/ui/,0,10,10,1",
+    ]
+
+    result = runner.invoke(
+        app, ["stats", "--dir", "src", "--depth", "1", "--root", str(tmp_path)]
+    )
+    assert result.exit_code == 0
+    assert "pay/" in result.output and "66.7" in result.output
+
+
+def test_dot_targets_every_file(tmp_path: Path) -> None:
+    items = {
+        rel: FileProgress(rel, total_loc=10, read_loc=0, mtime_ns=0)
+        for rel in ["src/a.py", "main.py"]
+    }
+    save_state(tmp_path, items)
+
+    result = runner.invoke(app, ["done", ".", "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert "Done 2 files." in result.output
+    assert all(fp.read_loc == 10 for fp in load_state(tmp_path).values())
+
+    result = runner.invoke(app, ["reset", str(tmp_path), "--root", str(tmp_path)])
+    assert result.exit_code == 0
+    assert all(fp.read_loc == 0 for fp in load_state(tmp_path).values())
+
+
+def test_workspace_scan_update_and_stats(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for member, sizes in {"svc/a": [3, 9], "svc/b": [5]}.items():
+        (tmp_path / member).mkdir(parents=True)
+        for i, size in enumerate(sizes):
+            body = "x\n" * size
+            (tmp_path / member / f"m{i}.py").write_text(body, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    result = runner.invoke(app, ["workspace", "add", "svc/a", "svc/b", "svc/a"])
+    assert result.exit_code == 0
+    assert cli.load_workspace(tmp_path) == ["svc/a", "svc/b"]
+
+    result = runner.invoke(app, ["workspace", "scan", "--jobs", "1"])
+    assert result.exit_code == 0
+    assert "Total: 0/17 LOC read" in result.output
+    assert runner.invoke(app, ["done", "m1.py", "--root", "svc/a"]).exit_code == 0
+
+    (tmp_path / "svc" / "b" / "new.py").write_text("y\n", encoding="utf-8")
+    result = runner.invoke(app, ["workspace", "update", "--jobs", "1"])
+    assert result.exit_code == 0
+    assert "0 changed, 1 new, 0 moved, 0 removed." in result.output
+
+    reports = cli.map_members(
+        cli.member_stats, cli.member_calls(tmp_path, ["svc/a", "svc/b"], 5), jobs=2
+    )
+    assert [(r.member, r.read_loc, r.total_loc) for r in reports] == [
+        ("svc/a", 9, 12),
+        ("svc/b", 0, 6),
+    ]
+    merged = [row[1] for row in cli.merge_top(reports, 2)]
+    assert merged == ["svc/b/m0.py", "svc/a/m0.py"]
+
+    result = runner.invoke(app, ["workspace", "stats", "--top", "2"])
+    assert result.exit_code == 0
+    assert "Total: 9/18 LOC read" in result.output
+
+
 def test_stats_all_shows_all_remaining(tmp_path: Path) -> None:
     items = {
         "a.py": FileProgress("a.py", total_loc=10, read_loc=0, mtime_ns=0),
@@ -230,3 +808,40 @@ def test_stats_no_table_allows_nonpositive_top(tmp_path: Path) -> None:
 
     assert result.exit_code == 0
     assert "Total:" in result.output
+
+
+def test_timings_json_reports_phases_and_counts(tmp_path: Path) -> None:
+    (tmp_path / "a.py").write_text("x = 1\ny = 2\n", encoding="utf-8")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "gen.py").write_text("z = 3\n", encoding="utf-8")
+    out = tmp_path / "timings.json"
+
+    result = runner.invoke(
+        app, ["--timings-json", str(out), "scan", "--root", str(tmp_path)]
+    )
+
+    assert result.exit_code == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["command"] == "scan"
+    assert {"walk", "count", "save", "other"} <= set(report["phases"])
+    assert report["counts"]["files_walked"] == 1
+    assert report["counts"]["files_read"] == 1
+    assert report["counts"]["bytes_read"] == 12
+    assert report["counts"]["excludes_evaluated"] == 2
+    assert report["peak_memory_bytes"] > 0
+    assert cli.timings.active is None
+
+
+def test_profile_writes_pstats(tmp_path: Path) -> None:
+    import pstats
+
+    (tmp_path / "a.py").write_text("x = 1\n", encoding="utf-8")
+    out = tmp_path / "scan.prof"
+
+    result = runner.invoke(
+        app, ["--profile", str(out), "scan", "--root", str(tmp_path)]
+    )
+
+    assert result.exit_code == 0
+    functions = pstats.Stats(str(out)).get_stats_profile().func_profiles
+    assert "scan_repo" in functions
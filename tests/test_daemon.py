@@ -0,0 +1,87 @@
+import socket
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from vibemark.cli import FileProgress, load_state, save_state
+from vibemark import client
+from vibemark.client import forward, send
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs AF_UNIX")
+
+
+@pytest.fixture
+def runtime_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # Keep the socket path short and private to the test.
+    run = tmp_path / "run"
+    run.mkdir()
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(run))
+    monkeypatch.delenv("VIBEMARK_NO_DAEMON", raising=False)
+    return run
+
+
+def _start(root: Path) -> threading.Thread:
+    from vibemark.daemon import Daemon
+
+    daemon = Daemon(root, flush_delay=60)
+    thread = threading.Thread(target=daemon.serve, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if send(str(root.resolve()), {"op": "ping"}) is not None:
+            return thread
+        thread.join(0.02)
+    raise AssertionError("daemon did not start")
+
+
+def test_forward_falls_back_without_daemon(tmp_path: Path, runtime_dir: Path) -> None:
+    assert forward(["done", "a.py", "--root", str(tmp_path)]) is None
+    assert forward(["scan", "--root", str(tmp_path)]) is None
+
+
+def test_forward_falls_back_when_daemon_stalls(
+    tmp_path: Path, runtime_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(client, "REPLY_TIMEOUT", 0.1)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        # Accepts connections (through the backlog) but never answers.
+        server.bind(client.socket_path(str(tmp_path.resolve())))
+        server.listen()
+        assert forward(["done", "a.py", "--root", str(tmp_path)]) is None
+
+
+def test_daemon_serves_and_coalesces_progress(
+    tmp_path: Path,
+    runtime_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    root = tmp_path / "repo"
+    root.mkdir()
+    save_state(
+        root,
+        {
+            "a.py": FileProgress("a.py", 10, 0, 0),
+            "b.py": FileProgress("b.py", 5, 0, 0),
+        },
+    )
+    monkeypatch.chdir(root)
+    thread = _start(root)
+
+    assert forward(["done", "a.py"]) == 0
+    assert forward(["set", "b.py", "2"]) == 0
+    assert forward(["stats", "--no-table"]) == 0
+    assert forward(["done", "missing.py"]) != 0
+    out = capsys.readouterr().out
+    assert "Done" in out and "a.py" in out
+    assert "12" in out
+    # Held back until the flush delay or shutdown.
+    assert load_state(root)["a.py"].read_loc == 0
+
+    assert send(str(root.resolve()), {"op": "stop"}) == {"stopped": True}
+    thread.join(5)
+    state = load_state(root)
+    assert state["a.py"].read_loc == 10
+    assert state["b.py"].read_loc == 2
+    assert forward(["stats", "--no-table"]) is None
@@ -0,0 +1,44 @@
+from vibemark.cli import FileProgress
+from vibemark.dirtree import DirTree
+
+
+def _fp(path: str, total: int, read: int = 0) -> FileProgress:
+    return FileProgress(path, total_loc=total, read_loc=read, mtime_ns=0)
+
+
+def test_rollups_follow_add_update_and_remove() -> None:
+    a = _fp("src/pay/a.py", 10, 5)
+    tree = DirTree(
+        [a, _fp("src/pay/sub/b.py", 20), _fp("src/c.py", 4), _fp("top.py", 1)]
+    )
+
+    pay = tree.find("src/pay/")
+    assert pay is not None
+    assert (pay.read_loc, pay.total_loc, pay.file_count) == (5, 30, 2)
+    assert (tree.root.total_loc, tree.root.file_count) == (35, 4)
+
+    a.read_loc = 10
+    tree.update(a, 10, 5)
+    assert pay.read_loc == 10 and tree.root.read_loc == 10
+
+    tree.remove("src/pay/sub/b.py")
+    assert tree.find("src/pay/sub") is None
+    assert (pay.total_loc, pay.file_count) == (10, 1)
+    assert tree.find("nope") is None
+
+
+def test_iter_files_and_walk_cover_only_the_subtree() -> None:
+    tree = DirTree(
+        _fp(p, 1) for p in ["b/z.py", "a/y.py", "a/x/w.py", "a/v.py", "c.py"]
+    )
+    a = tree.find("a")
+    assert a is not None
+    assert [fp.path for fp in tree.iter_files(a)] == ["a/v.py", "a/y.py", "a/x/w.py"]
+
+    assert [(p, d) for p, d, _ in tree.walk()] == [
+        ("", 0),
+        ("a", 1),
+        ("a/x", 2),
+        ("b", 1),
+    ]
+    assert [p for p, _, _ in tree.walk("a", max_depth=0)] == ["a"]
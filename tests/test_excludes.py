@@ -0,0 +1,51 @@
+import pytest
+
+from vibemark.cli import DEFAULT_EXCLUDES, is_excluded
+from vibemark.excludes import ExcludeMatcher
+
+GLOBS = DEFAULT_EXCLUDES + [
+    "vendor/*",
+    "docs/build*",
+    "*.min.js",
+    "src/*/generated/*",
+    "notes.md",
+    "tmp?/*",
+    "[ab]lib/*",
+]
+
+PATHS = [
+    ".git/config",
+    "src/vibemark/cli.py",
+    "vendor/pkg/mod.py",
+    "vendor",
+    "docs/build/index.md",
+    "docs/buildinfo.md",
+    "docs/guide.md",
+    "web/app.min.js",
+    "src/pkg/generated/out.py",
+    "src/generated/out.py",
+    "notes.md",
+    "sub/notes.md",
+    "tmp1/x.py",
+    "tmp12/x.py",
+    "alib/x.py",
+    "clib/x.py",
+]
+
+
+@pytest.mark.parametrize("rel", PATHS)
+def test_matcher_agrees_with_fnmatch(rel: str) -> None:
+    assert ExcludeMatcher(GLOBS).matches(rel) == is_excluded(rel, GLOBS)
+
+
+def test_can_prune_only_when_whole_subtree_is_excluded() -> None:
+    matcher = ExcludeMatcher(GLOBS)
+    assert matcher.can_prune(".git")
+    assert matcher.can_prune("vendor/pkg")
+    assert matcher.can_prune("docs/build")
+    assert matcher.can_prune("alib")
+    assert not matcher.can_prune("docs")
+    assert not matcher.can_prune("src/pkg")
+    assert not matcher.can_prune("clib")
+    assert ExcludeMatcher(["*"]).can_prune("anything")
+    assert not ExcludeMatcher(["src/*.py"]).can_prune("src")
@@ -0,0 +1,89 @@
+from array import array
+
+from vibemark.cli import top_remaining, totals
+from vibemark.filetable import FileProgress, FileTable
+from vibemark.loc import LocCounts
+from vibemark.ranges import LineRanges
+
+
+def _entries() -> list:
+    return [
+        FileProgress("a.py", 10, 0, 1),
+        FileProgress("pkg/b.py", 30, 5, 2, size=300, blob="abc"),
+        FileProgress("pkg/c.py", 8, 8, 3, lines=array("I"), locs=LocCounts(9, 8, 5)),
+        FileProgress("d.py", 50, 10, 4, ranges=LineRanges([(0, 10)])),
+    ]
+
+
+def test_table_behaves_like_a_dict_of_entries() -> None:
+    entries = _entries()
+    table = FileTable(entries)
+    plain = {fp.path: fp for fp in entries}
+
+    assert len(table) == 4
+    assert list(table) == list(plain)
+    assert table == plain
+    assert "pkg/b.py" in table and "missing.py" not in table
+    assert table.get("missing.py") is None
+    assert table["pkg/b.py"].blob == "abc"
+    assert table["a.py"].blob == "" and table["a.py"].lines is None
+    # An empty fingerprint is kept apart from "no fingerprint".
+    assert table["pkg/c.py"].lines == array("I")
+    assert table["pkg/c.py"].status == "done"
+    assert table["pkg/c.py"].locs == LocCounts(9, 8, 5)
+    assert table["a.py"].locs is None
+
+
+def test_views_write_through_and_survive_removal() -> None:
+    table = FileTable(_entries())
+
+    fp = table["d.py"]
+    fp.read_loc = 20
+    fp.ranges = None
+    table["pkg/b.py"].blob = ""
+    table["a.py"].ranges = LineRanges([(0, 3)])
+    table["a.py"].clamp()
+    table["a.py"].locs = LocCounts(10, 7)
+
+    assert table["d.py"].read_loc == 20 and table["d.py"].ranges is None
+    assert table["pkg/b.py"].blob == ""
+    assert table["a.py"].read_loc == 3
+    assert table["a.py"].locs == LocCounts(10, 7, None)
+
+    removed = table.pop("pkg/b.py")
+    assert removed.path == "pkg/b.py" and removed.total_loc == 30
+    assert "pkg/b.py" not in table and len(table) == 3
+
+    table["pkg/b.py"] = FileProgress("pkg/b.py", 7, 1, 9)
+    assert table["pkg/b.py"].total_loc == 7
+    assert list(table) == ["a.py", "pkg/c.py", "d.py", "pkg/b.py"]
+    # pop hands back a copy, which outlives its row being reused.
+    assert removed.total_loc == 30 and removed.size == 300
+
+
+def test_deleted_rows_are_reused() -> None:
+    table = FileTable(_entries())
+    for n in range(100):
+        del table["d.py"]
+        table[f"new{n}.py"] = FileProgress(f"new{n}.py", n, 0, n)
+        table["d.py"] = table.pop(f"new{n}.py")
+        table["d.py"].ranges = LineRanges([(0, n)])
+
+    assert len(table._paths) == len(table) == 4
+    assert len(table._ranges) == 1
+    assert table["d.py"].total_loc == 99 and table["d.py"].path == "d.py"
+    assert list(table) == ["a.py", "pkg/b.py", "pkg/c.py", "d.py"]
+
+
+def test_column_helpers_skip_removed_rows() -> None:
+    entries = _entries()
+    table = FileTable(entries)
+    del table["d.py"]
+    plain = {fp.path: fp for fp in entries if fp.path != "d.py"}
+
+    assert totals(table) == totals(plain) == (48, 13)
+    pairs = [(fp.total_loc, fp.read_loc) for fp in plain.values()]
+    assert sorted(table.locs()) == sorted(pairs)
+    assert [r[0] for r in table.rows_by_path()] == ["a.py", "pkg/b.py", "pkg/c.py"]
+    assert top_remaining(table, 1) == top_remaining(plain, 1)
+    assert top_remaining(table) == top_remaining(plain)
@@ -0,0 +1,54 @@
+from array import array
+from pathlib import Path
+
+from vibemark.linediff import (
+    decode_hashes,
+    encode_hashes,
+    hashes_and_counts,
+    remap_ranges,
+    surviving_lines,
+)
+from vibemark.loc import count_all, count_loc
+from vibemark.ranges import LineRanges
+
+
+def _fp(*lines: int) -> array:
+    return array("I", lines)
+
+
+def test_line_hashes_align_with_count_loc(tmp_path: Path) -> None:
+    target = tmp_path / "sample.py"
+    target.write_text("a\r\n\n  \nb\rc # x\r# y\n", encoding="utf-8")
+
+    for mode in ("physical", "nonempty", "sloc"):
+        hashes, counts = hashes_and_counts(target, mode, sloc=True)
+        assert len(hashes) == count_loc(target, mode)
+        assert hashes == hashes_and_counts(target, mode)[0]
+        assert counts == count_all(target, sloc=True)
+        assert counts.for_mode(mode) == count_loc(target, mode)
+
+
+def test_encode_decode_round_trip() -> None:
+    hashes = _fp(0, 1, 2**32 - 1, 123456789)
+    assert decode_hashes(encode_hashes(hashes)) == hashes
+
+
+def test_surviving_lines_keeps_unchanged_read_lines() -> None:
+    old = _fp(*range(10))
+    # Insert two lines at the top: all read lines survive.
+    assert surviving_lines(old, _fp(100, 101, *range(10)), 6) == 6
+    # Edit line 2 and delete line 4 inside the read region.
+    new = _fp(0, 1, 200, 3, 5, 6, 7, 8, 9)
+    assert surviving_lines(old, new, 6) == 4
+    # Changes after the read region cost nothing.
+    assert surviving_lines(old, _fp(0, 1, 2, 3, 4, 5, 300), 6) == 6
+    assert surviving_lines(old, _fp(), 6) == 0
+    assert surviving_lines(old, old, 0) == 0
+
+
+def test_remap_ranges_follows_moved_lines() -> None:
+    old = _fp(*range(10))
+    ranges = LineRanges([(0, 2), (6, 9)])
+    # Two lines inserted at the top and line 7 edited.
+    new = _fp(100, 101, 0, 1, 2, 3, 4, 5, 6, 700, 8, 9)
+    assert list(remap_ranges(old, new, ranges)) == [(2, 4), (8, 9), (10, 11)]
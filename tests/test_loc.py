@@ -0,0 +1,42 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from vibemark import loc
+from vibemark.loc import count_lines, count_loc
+
+SAMPLES = [
+    b"",
+    b"\n",
+    b"line1\n\nline3\n",
+    b"no trailing newline",
+    b"crlf\r\nline\r\n\r\n",
+    b"old mac\rline\r",
+    b"mixed\r\n\r\n \t\nend",
+    b"vt\x0bff\x0cfs\x1cgs\x1drs\x1eus\x1f\n",
+    "nel\x85ls ps nbsp\xa0\n　\n".encode("utf-8"),
+    b"invalid \xe2\x80 bytes\xc2\n\x85\n",
+]
+
+
+def _expected(data: bytes, mode: str) -> int:
+    text = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="replace")
+    lines = text.read().splitlines()
+    if mode == "nonempty":
+        return sum(1 for ln in lines if ln.strip())
+    return len(lines)
+
+
+@pytest.mark.parametrize("mode", ["physical", "nonempty"])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, loc.CHUNK_SIZE])
+def test_count_lines_matches_splitlines(
+    mode: str, chunk_size: int, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(loc, "CHUNK_SIZE", chunk_size)
+    for data in SAMPLES:
+        assert count_lines(io.BytesIO(data), mode=mode) == _expected(data, mode), data
+
+
+def test_count_loc_unreadable_path_is_zero(tmp_path: Path) -> None:
+    assert count_loc(tmp_path / "missing.py") == 0
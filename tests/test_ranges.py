@@ -0,0 +1,41 @@
+import pytest
+
+from vibemark.ranges import LineRanges
+
+
+def test_add_merges_overlapping_and_touching_intervals() -> None:
+    ranges = LineRanges()
+    ranges.add(10, 20)
+    ranges.add(30, 40)
+    ranges.add(20, 25)
+    assert list(ranges) == [(10, 25), (30, 40)]
+    assert ranges.count == 25
+
+    ranges.add(5, 35)
+    assert list(ranges) == [(5, 40)]
+    assert ranges.count == 35
+
+    ranges.add(12, 18)
+    assert ranges.count == 35
+
+
+def test_clip_and_overlapping() -> None:
+    ranges = LineRanges([(0, 20), (399, 600), (711, 712)])
+    assert list(ranges.overlapping(10, 450)) == [(10, 20), (399, 450)]
+
+    ranges.clip(500)
+    assert list(ranges) == [(0, 20), (399, 500)]
+    assert ranges.count == 121
+    ranges.clip(0)
+    assert ranges.count == 0 and len(ranges) == 0
+
+
+def test_str_parse_round_trip() -> None:
+    ranges = LineRanges.parse("400-600, 1-20,712")
+    assert str(ranges) == "1-20,400-600,712"
+    assert ranges.count == 20 + 201 + 1
+    assert LineRanges.parse(str(ranges)) == ranges
+
+    for bad in ("0-5", "9-3", "a-b", "1-"):
+        with pytest.raises(ValueError):
+            LineRanges.parse(bad)
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+
+from vibemark.linediff import hashes_and_counts
+from vibemark.loc import count_loc
+from vibemark.sloc import language_for
+
+CASES = [
+    (
+        "mod.py",
+        '"""Module doc\n\nmore\n"""\nimport os  # c\n\n# x\ns = "# no"\n'
+        't = """a\n# b\n"""\ndef f():\n    \'\'\'d\'\'\'  # c\n    return 1\n',
+        7,
+    ),
+    (
+        "a.c",
+        'int a; /* c\n c */ int b;\n// x\nchar *s = "/* no */";\n'
+        "char c = '\"';\n/* one */\n",
+        4,
+    ),
+    ("a.ts", "const t = `a\n// in\n`;\n// c\nlet x = 1; /* c */\n", 4),
+    ("a.go", "x := `a\n/* in */`\n// c\ny := '\"'\n", 3),
+    (
+        "a.rs",
+        'let s = r#"a " // in"#;\nfn f<\'a>(x: &\'a str) {} // c\n'
+        "/* b\n*/\nlet c = '\"';\n",
+        3,
+    ),
+    ("a.sh", "echo $# ${#a} # c\n# full\nx=\"a # b\"\ny='#'\n", 3),
+    ("notes.txt", "# not a comment here\n\ntext\n", 2),
+]
+
+
+@pytest.mark.parametrize("name,text,expected", CASES)
+def test_sloc_skips_comments_but_not_strings(
+    tmp_path: Path, name: str, text: str, expected: int
+) -> None:
+    target = tmp_path / name
+    target.write_bytes(text.replace("\n", "\r\n").encode("utf-8"))
+
+    assert count_loc(target, "sloc") == expected
+    assert len(hashes_and_counts(target, "sloc")[0]) == expected
+
+
+def test_language_for_uses_the_extension() -> None:
+    assert language_for("src/Main.JAVA") == "c"
+    assert language_for("index.tsx") == "javascript"
+    assert language_for("Makefile") is None
+    assert language_for("archive.tar.gz") is None
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from vibemark.cli import FileProgress, save_state
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+# Only needed by commands that draw tables, prompt, or use other backends.
+LAZY_MODULES = [
+    "cProfile",
+    "concurrent.futures",
+    "importlib.metadata",
+    "numpy",
+    "rich.prompt",
+    "rich.table",
+    "sqlite3",
+    "tomllib",
+    "tracemalloc",
+    "vibemark.client",
+    "vibemark.export",
+    "vibemark.gitindex",
+    "vibemark.watch",
+]
+
+
+def _python(code: str) -> subprocess.CompletedProcess:
+    path = os.pathsep.join(filter(None, [SRC, os.environ.get("PYTHONPATH")]))
+    env = dict(os.environ, PYTHONPATH=path)
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _loaded_after(code: str) -> list:
+    out = _python(code + "\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))")
+    return [m for m in LAZY_MODULES if m in json.loads(out.stdout.splitlines()[-1])]
+
+
+def test_import_defers_heavy_modules() -> None:
+    assert _loaded_after("import vibemark.cli") == []
+
+
+@pytest.mark.parametrize("args", [["--no-table"], ["--format", "csv"]])
+def test_machine_readable_stats_skip_rich_tables(tmp_path: Path, args: list) -> None:
+    save_state(tmp_path, {"a.py": FileProgress("a.py", 10, 3, 0)})
+    argv = ["stats", "--root", str(tmp_path), *args]
+    code = (
+        "from vibemark.cli import app\n"
+        "try:\n"
+        f"    app({argv!r})\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+    assert _loaded_after(code) == []
+
+
+def test_cold_import_within_budget() -> None:
+    # Generous by default so slow CI machines pass; tighten locally with
+    # VIBEMARK_IMPORT_BUDGET_MS to catch regressions.
+    budget = float(os.environ.get("VIBEMARK_IMPORT_BUDGET_MS", "1000")) / 1000
+
+    def best_of_three(code: str) -> float:
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            _python(code)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    cost = best_of_three("import vibemark.cli") - best_of_three("pass")
+    assert cost < budget, f"importing vibemark.cli took {cost * 1000:.0f} ms"
@@ -0,0 +1,152 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+import vibemark.watch
+from vibemark.cli import (
+    FileProgress,
+    StateSession,
+    app,
+    apply_changes,
+    save_state,
+    scan_repo,
+)
+from vibemark.ranges import LineRanges
+from vibemark.watch import InotifyWatcher, PollingWatcher, WatchError, next_batch
+
+
+def _session(root: Path) -> StateSession:
+    scanned = scan_repo(root, [], "physical", False, ["py"])
+    save_state(
+        root,
+        {
+            rel: FileProgress(rel, sf.total_loc, 0, sf.mtime_ns, sf.size)
+            for rel, sf in scanned.items()
+        },
+        loc_mode="physical",
+    )
+    return StateSession.load(root)
+
+
+def test_apply_changes_rechecks_only_touched_paths(tmp_path: Path) -> None:
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "a.py").write_text("a\nb\nc\n", encoding="utf-8")
+    (tmp_path / "pkg" / "b.py").write_text("x\n", encoding="utf-8")
+    session = _session(tmp_path)
+    session.files["a.py"].read_loc = 3
+
+    (tmp_path / "a.py").write_text("a\n", encoding="utf-8")
+    (tmp_path / "pkg" / "b.py").unlink()
+    (tmp_path / "pkg" / "c.py").write_text("1\n2\n", encoding="utf-8")
+    (tmp_path / "skipped.py").write_text("not touched\n", encoding="utf-8")
+
+    summary = apply_changes(session, ["a.py", "pkg"], [], ["py"], "physical")
+
+    assert summary.changed == ["a.py"]
+    assert summary.added == ["pkg/c.py"]
+    assert summary.removed == ["pkg/b.py"]
+    assert session.files["a.py"].read_loc == 1
+    assert "skipped.py" not in session.files
+
+    summary = apply_changes(session, [""], [], ["py"], "physical")
+    assert summary.added == ["skipped.py"] and not summary.changed
+
+
+def test_apply_changes_drops_entries_of_moved_directories(tmp_path: Path) -> None:
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("1\n2\n", encoding="utf-8")
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "b.py").write_text("1\n2\n3\n", encoding="utf-8")
+    session = _session(tmp_path)
+    session.files["pkg/a.py"].read_loc = 1
+
+    (tmp_path / "pkg").rename(tmp_path / "pkg2")
+    summary = apply_changes(session, ["pkg", "pkg2"], [], ["py"], "physical")
+    assert summary.moved == [("pkg/a.py", "pkg2/a.py")]
+    assert not summary.removed and not summary.added
+    assert session.files["pkg2/a.py"].read_loc == 1
+
+    outside = tmp_path.parent / f"{tmp_path.name}-outside"
+    (tmp_path / "lib").rename(outside)
+    summary = apply_changes(session, ["lib"], [], ["py"], "physical")
+    assert summary.removed == ["lib/b.py"]
+    assert sorted(session.files) == ["pkg2/a.py"]
+    assert sum(fp.total_loc for fp in session.files.values()) == 2
+
+
+def test_apply_changes_keeps_progress_of_renamed_files(tmp_path: Path) -> None:
+    (tmp_path / "a.py").write_text("1\n2\n3\n4\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("1\n2\n", encoding="utf-8")
+    session = _session(tmp_path)
+    session.files["a.py"].read_loc = 2
+    session.files["a.py"].ranges = LineRanges([(1, 2)])
+
+    (tmp_path / "a.py").rename(tmp_path / "c.py")
+    (tmp_path / "b.py").unlink()
+    (tmp_path / "d.py").write_text("1\n2\n3\n", encoding="utf-8")
+    summary = apply_changes(
+        session, ["a.py", "b.py", "c.py", "d.py"], [], ["py"], "physical"
+    )
+
+    assert summary.moved == [("a.py", "c.py")]
+    assert summary.removed == ["b.py"] and summary.added == ["d.py"]
+    assert session.files["c.py"].read_loc == 2
+    assert session.files["c.py"].ranges == LineRanges([(1, 2)])
+    assert sorted(session.files) == ["c.py", "d.py"]
+
+
+def test_polling_watcher_reports_changed_files(tmp_path: Path) -> None:
+    sigs = {"a.py": (1, 1), "b.py": (1, 1)}
+    watcher = PollingWatcher(lambda: dict(sigs), interval=0.01)
+    assert watcher.poll(0.05) == set()
+
+    sigs["a.py"] = (2, 1)
+    del sigs["b.py"]
+    sigs["c.py"] = (1, 1)
+    assert next_batch(watcher, debounce=0.005, timeout=1) == {"a.py", "b.py", "c.py"}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs inotify")
+def test_inotify_watcher_follows_new_directories(tmp_path: Path) -> None:
+    (tmp_path / "build").mkdir()
+    try:
+        watcher = InotifyWatcher(tmp_path, lambda rel: rel == "build")
+    except WatchError as exc:
+        pytest.skip(str(exc))
+    with watcher:
+        (tmp_path / "build" / "ignored.py").write_text("x\n", encoding="utf-8")
+        (tmp_path / "a.py").write_text("x\n", encoding="utf-8")
+        assert next_batch(watcher, debounce=0.05, timeout=2) == {"a.py"}
+
+        (tmp_path / "pkg").mkdir()
+        assert next_batch(watcher, debounce=0.05, timeout=2) == {"pkg"}
+        (tmp_path / "pkg" / "b.py").write_text("x\n", encoding="utf-8")
+        os.rename(tmp_path / "a.py", tmp_path / "pkg" / "c.py")
+        assert next_batch(watcher, debounce=0.05, timeout=2) == {
+            "pkg/b.py",
+            "a.py",
+            "pkg/c.py",
+        }
+
+
+def test_watch_saves_loc_mode_switch_without_changes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "a.py").write_text("1\n\n2\n", encoding="utf-8")
+    _session(tmp_path)
+
+    def stop(*args: object, **kwargs: object) -> set:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(vibemark.watch, "next_batch", stop)
+    result = CliRunner().invoke(
+        app, ["watch", "--poll", "--loc-mode", "nonempty", "--root", str(tmp_path)]
+    )
+
+    assert result.exit_code == 0, result.output
+    session = StateSession.load(tmp_path)
+    assert session.loc_mode == "nonempty"
+    assert session.files["a.py"].total_loc == 2